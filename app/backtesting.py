@@ -0,0 +1,398 @@
+"""
+Backtesting par origine glissante pour Stokkel
+Mesure l'erreur hors échantillon et le temps de calcul de chaque famille de modèles
+"""
+
+import logging
+import time
+from concurrent.futures import as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .clustering import SeasonalClusters, cluster_series, scale_member_forecast
+from .config import settings
+from .data_utils import series_fingerprint
+from .forecasting import (
+    MODEL_FAMILIES,
+    ExponentialSmoothingForecaster,
+    ForecastEngine,
+    GlobalPanelForecaster,
+    IntermittentDemandForecaster,
+    SeasonalNaiveForecaster,
+    forecast_engine
+)
+from .metrics import BacktestMetrics, metrics_collector
+from .training_pool import extract_stan_params, fit_prophet, get_training_pool
+
+logger = logging.getLogger(__name__)
+
+# Familles dont tous les produits d'un fold sont ajustés en un seul calcul
+BATCH_FAMILIES = {
+    'naive': SeasonalNaiveForecaster,
+    'ets': ExponentialSmoothingForecaster,
+    'intermittent': IntermittentDemandForecaster,
+    'global': GlobalPanelForecaster
+}
+
+
+def rolling_cutoffs(last_date: pd.Timestamp, horizon: int, folds: int, step: int) -> List[pd.Timestamp]:
+    """
+    Dates de coupure des folds, de la plus ancienne à la plus récente
+
+    Le dernier fold teste les `horizon` derniers jours; chaque fold précédent
+    recule de `step` jours. L'entraînement s'étend depuis le début de l'historique.
+    """
+    return [
+        last_date - pd.Timedelta(days=horizon + (folds - 1 - k) * step)
+        for k in range(folds)
+    ]
+
+
+def split_fold(
+    series: Dict[str, pd.DataFrame],
+    cutoff: pd.Timestamp,
+    horizon: int
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.Series]]:
+    """
+    Découpe chaque série en entraînement (jusqu'à la coupure) et test (horizon suivant)
+
+    Les jours sans vente de la fenêtre de test comptent comme zéro, jusqu'au dernier
+    jour de la série. Les produits sans assez d'historique ou sans jour de test
+    sont écartés du fold.
+
+    Returns:
+        Tuple (séries d'entraînement, ventes observées indexées par date)
+    """
+    train, test = {}, {}
+    for product_id, data in series.items():
+        history = data[data['ds'] <= cutoff]
+        end = min(cutoff + pd.Timedelta(days=horizon), data['ds'].max())
+        if len(history) < settings.min_data_points or history['y'].sum() == 0 or end <= cutoff:
+            continue
+
+        dates = pd.date_range(cutoff + pd.Timedelta(days=1), end, freq='D')
+        train[product_id] = history.reset_index(drop=True)
+        test[product_id] = data.groupby('ds')['y'].sum().reindex(dates, fill_value=0.0)
+    return train, test
+
+
+def _backtest_prophet_product(
+    product_id: str,
+    data: pd.DataFrame,
+    cutoffs: List[pd.Timestamp],
+    horizon: int,
+    prophet_params: Dict
+) -> List[Dict]:
+    """
+    Tous les folds Prophet d'un produit, dans l'ordre chronologique
+
+    Les fenêtres d'entraînement se recouvrent: chaque fold repart des paramètres
+    du fold précédent (entraînement à chaud) au lieu de réoptimiser depuis zéro.
+
+    Returns:
+        Liste de {'fold', 'product_id', 'ds', 'p10', 'p50', 'p90', 'runtime_seconds'}
+    """
+    results = []
+    previous = None
+    for fold, cutoff in enumerate(cutoffs):
+        train, _ = split_fold({product_id: data}, cutoff, horizon)
+        if product_id not in train:
+            continue
+
+        start = time.perf_counter()
+        model, quality_metrics, _ = fit_prophet(train[product_id], prophet_params, previous)
+        future = pd.DataFrame({
+            'ds': pd.date_range(cutoff + pd.Timedelta(days=1), periods=horizon, freq='D')
+        })
+        p10, p50, p90 = ForecastEngine._predict_quantiles(model, future, quality_metrics)
+        results.append({
+            'fold': fold,
+            'product_id': product_id,
+            'ds': future['ds'].values,
+            'p10': np.maximum(0, p10),
+            'p50': np.maximum(0, p50),
+            'p90': np.maximum(0, p90),
+            'runtime_seconds': time.perf_counter() - start
+        })
+        previous = {'stan_params': extract_stan_params(model), 'quality_metrics': quality_metrics}
+    return results
+
+
+def _backtest_batch_fold(
+    family: str,
+    fold: int,
+    cutoff: pd.Timestamp,
+    train: Dict[str, pd.DataFrame],
+    horizon: int
+) -> List[Dict]:
+    """
+    Un fold d'une famille vectorisée: tous les produits en un seul ajustement
+
+    Chaque série est prévue depuis sa dernière vente: l'horizon est allongé de
+    l'écart le plus long entre cette vente et la coupure. Le temps de calcul du
+    fold est réparti également entre les produits.
+    """
+    start = time.perf_counter()
+    gap = max((cutoff - data['ds'].max()).days for data in train.values())
+    forecaster = BATCH_FAMILIES[family]()
+    if family == 'global':
+        forecaster.fit(train)
+    predictions = forecaster.forecast_batch(train, horizon + gap)
+    runtime = (time.perf_counter() - start) / max(len(predictions), 1)
+
+    return [
+        {
+            'fold': fold,
+            'product_id': product_id,
+            'ds': prediction['ds'],
+            'p10': prediction['p10'],
+            'p50': prediction['p50'],
+            'p90': prediction['p90'],
+            'runtime_seconds': runtime
+        }
+        for product_id, prediction in predictions.items()
+    ]
+
+
+def _backtest_cluster_fold(
+    fold: int,
+    cutoff: pd.Timestamp,
+    train: Dict[str, pd.DataFrame],
+    horizon: int,
+    prophet_params: Dict
+) -> List[Dict]:
+    """Un fold du mode cluster: regroupement puis un modèle Prophet par cluster"""
+    start = time.perf_counter()
+    clusters = SeasonalClusters()
+    clusters.update(train, {product_id: series_fingerprint(data) for product_id, data in train.items()})
+
+    results = []
+    for cluster_id in sorted(set(clusters.assignments.values())):
+        members = clusters.members(cluster_id)
+        normalized = cluster_series(train, members)
+        if len(normalized) < settings.min_data_points:
+            continue
+
+        model, _, _ = fit_prophet(normalized, prophet_params)
+        for product_id in members:
+            data = train[product_id]
+            future = pd.date_range(cutoff + pd.Timedelta(days=1), periods=horizon, freq='D')
+            yhat = ForecastEngine._cluster_yhat(model, pd.DatetimeIndex(data['ds']).append(future))
+            member = scale_member_forecast(data['y'].values, yhat.values[:len(data)], yhat.values[len(data):])
+            results.append({
+                'fold': fold,
+                'product_id': product_id,
+                'ds': future.values,
+                'p10': member['p10'],
+                'p50': member['p50'],
+                'p90': member['p90']
+            })
+
+    runtime = (time.perf_counter() - start) / max(len(results), 1)
+    for result in results:
+        result['runtime_seconds'] = runtime
+    return results
+
+
+def score_fold(prediction: Dict, actual: pd.Series) -> Dict:
+    """
+    Erreurs d'un fold sur les jours de test observés
+
+    Returns:
+        Dict avec 'sae', 'sse', 'sape', 'n', 'n_nonzero', 'covered' (sommes, agrégées ensuite)
+    """
+    forecast = pd.DataFrame(
+        {'p10': prediction['p10'], 'p50': prediction['p50'], 'p90': prediction['p90']},
+        index=pd.DatetimeIndex(prediction['ds'])
+    ).reindex(actual.index)
+    observed = actual.to_numpy(dtype=float)
+    errors = forecast['p50'].to_numpy() - observed
+    nonzero = observed != 0
+
+    return {
+        'sae': float(np.abs(errors).sum()),
+        'sse': float((errors ** 2).sum()),
+        'sape': float(np.abs(errors[nonzero] / observed[nonzero]).sum()),
+        'n': len(observed),
+        'n_nonzero': int(nonzero.sum()),
+        'covered': int(((observed >= forecast['p10']) & (observed <= forecast['p90'])).sum())
+    }
+
+
+def run_backtest(
+    series: Dict[str, pd.DataFrame],
+    model_families: List[str],
+    horizon: int,
+    folds: int,
+    step: Optional[int] = None,
+    prophet_params: Optional[Callable[[str], Dict]] = None,
+    record: bool = True
+) -> Dict:
+    """
+    Backtest par origine glissante de plusieurs familles de modèles
+
+    Les tâches (un produit pour Prophet, un fold pour les familles vectorisées et
+    le mode cluster) tournent dans le pool d'entraînement; en dessous de
+    parallel_training_min_products tâches, elles tournent dans le processus courant.
+
+    Args:
+        series: Dict {product_id: DataFrame (ds, y)}
+        model_families: Familles à comparer
+        horizon: Jours prévus à chaque fold
+        folds: Nombre d'origines
+        step: Jours entre deux origines (défaut: horizon)
+        prophet_params: Paramètres Prophet d'un produit (défaut: ceux du moteur de prévision)
+        record: Enregistrer les résultats dans le magasin de métriques
+
+    Returns:
+        Dict avec les coupures, le résumé par famille et le détail par produit
+    """
+    unknown = [family for family in model_families if family not in MODEL_FAMILIES]
+    if unknown:
+        raise ValueError(
+            f"Familles de modèles inconnues: {', '.join(unknown)} "
+            f"(disponibles: {', '.join(MODEL_FAMILIES)})"
+        )
+    if not series:
+        raise ValueError("Aucun produit à évaluer")
+
+    started = time.perf_counter()
+    step = step or horizon
+    last_date = max(data['ds'].max() for data in series.values())
+    cutoffs = rolling_cutoffs(last_date, horizon, folds, step)
+    folds_data = [split_fold(series, cutoff, horizon) for cutoff in cutoffs]
+    params_for = prophet_params or forecast_engine._prophet_params
+
+    # (famille, fonction, arguments): un produit pour Prophet, un fold sinon
+    tasks: List[Tuple[str, Callable, Tuple]] = []
+    for family in model_families:
+        if family == 'prophet':
+            for product_id, data in series.items():
+                args = (product_id, data, cutoffs, horizon, params_for(product_id))
+                tasks.append((family, _backtest_prophet_product, args))
+            continue
+        for fold, (cutoff, (train, _)) in enumerate(zip(cutoffs, folds_data)):
+            if not train:
+                continue
+            if family == 'cluster':
+                tasks.append((family, _backtest_cluster_fold, (fold, cutoff, train, horizon, params_for('cluster'))))
+            else:
+                tasks.append((family, _backtest_batch_fold, (family, fold, cutoff, train, horizon)))
+
+    logger.info(
+        f"🧪 Backtest | produits={len(series)} familles={model_families} "
+        f"folds={folds} horizon={horizon}j tâches={len(tasks)}"
+    )
+    results = _run_tasks([(func, args) for _, func, args in tasks])
+
+    # Agrégation des erreurs par (produit, famille)
+    totals: Dict[Tuple[str, str], Dict] = {}
+    for (family, _, _), task_results in zip(tasks, results):
+        for result in task_results:
+            actual = folds_data[result['fold']][1].get(result['product_id'])
+            if actual is None:
+                continue
+            score = score_fold(result, actual)
+            total = totals.setdefault(
+                (result['product_id'], family),
+                {'sae': 0.0, 'sse': 0.0, 'sape': 0.0, 'n': 0, 'n_nonzero': 0, 'covered': 0,
+                 'runtime_seconds': 0.0, 'folds': 0}
+            )
+            for key, value in score.items():
+                total[key] += value
+            total['runtime_seconds'] += result['runtime_seconds']
+            total['folds'] += 1
+
+    products: Dict[str, Dict] = {}
+    timestamp = datetime.now()
+    for (product_id, family), total in totals.items():
+        metrics = BacktestMetrics(
+            product_id=product_id,
+            model_family=family,
+            timestamp=timestamp,
+            horizon_days=horizon,
+            folds=total['folds'],
+            mape=round(total['sape'] / total['n_nonzero'] * 100, 2) if total['n_nonzero'] else None,
+            mae=round(total['sae'] / total['n'], 3),
+            rmse=round(float(np.sqrt(total['sse'] / total['n'])), 3),
+            coverage=round(total['covered'] / total['n'], 3),
+            runtime_seconds=round(total['runtime_seconds'] / total['folds'], 4)
+        )
+        if record:
+            metrics_collector.record_backtest(metrics)
+        products.setdefault(product_id, {})[family] = {
+            key: value for key, value in metrics.to_dict().items()
+            if key not in ('product_id', 'model_family', 'timestamp', 'horizon_days')
+        }
+
+    for product_results in products.values():
+        product_results['best_family'] = best_family(product_results)
+
+    return {
+        'horizon_days': horizon,
+        'folds': folds,
+        'step_days': step,
+        'cutoffs': [cutoff.strftime('%Y-%m-%d') for cutoff in cutoffs],
+        'families': summarize_families(products, model_families),
+        'products': products,
+        'duration_seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+def _run_tasks(tasks: List[Tuple]) -> List[List[Dict]]:
+    """
+    Exécute les tâches dans le pool d'entraînement (ou localement s'il y en a peu)
+
+    Une tâche en échec est journalisée et ne produit aucun fold, sans interrompre
+    les autres produits.
+    """
+    results: List[List[Dict]] = [[] for _ in tasks]
+    if settings.training_workers <= 1 or len(tasks) < settings.parallel_training_min_products:
+        for i, (func, args) in enumerate(tasks):
+            try:
+                results[i] = func(*args)
+            except Exception as e:
+                logger.warning(f"⚠️ Tâche de backtest en échec: {e}")
+        return results
+
+    pool = get_training_pool()
+    futures = {pool.submit(func, *args): i for i, (func, args) in enumerate(tasks)}
+    for future in as_completed(futures):
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            logger.warning(f"⚠️ Tâche de backtest en échec: {e}")
+    return results
+
+
+def best_family(product_results: Dict[str, Dict]) -> Optional[str]:
+    """Famille de plus faible MAE hors échantillon; le temps de calcul départage les égalités"""
+    candidates = [
+        (result['mae'], result['runtime_seconds'], family)
+        for family, result in product_results.items() if isinstance(result, dict)
+    ]
+    return min(candidates)[2] if candidates else None
+
+
+def summarize_families(products: Dict[str, Dict], model_families: List[str]) -> Dict[str, Dict]:
+    """Moyenne des erreurs et du temps de calcul de chaque famille sur les produits évalués"""
+    summary = {}
+    for family in model_families:
+        results = [product[family] for product in products.values() if family in product]
+        if not results:
+            summary[family] = {'products': 0}
+            continue
+        mapes = [result['mape'] for result in results if result['mape'] is not None]
+        summary[family] = {
+            'products': len(results),
+            'mae': round(float(np.mean([result['mae'] for result in results])), 3),
+            'rmse': round(float(np.mean([result['rmse'] for result in results])), 3),
+            'mape': round(float(np.mean(mapes)), 2) if mapes else None,
+            'coverage': round(float(np.mean([result['coverage'] for result in results])), 3),
+            'runtime_seconds': round(float(np.mean([result['runtime_seconds'] for result in results])), 4),
+            'best_for': sum(1 for product in products.values() if product.get('best_family') == family)
+        }
+    return summary
@@ -2,9 +2,12 @@
 Système de cache avec Redis (production) ou dict (dev)
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
+from collections import OrderedDict
+from threading import Lock
 import json
 import pickle
+import time
 from abc import ABC, abstractmethod
 import logging
 
@@ -30,25 +33,49 @@ class CacheBackend(ABC):
         pass
 
 class DictCache(CacheBackend):
-    """Cache en mémoire (dev)"""
+    """
+    Cache en mémoire (dev), thread-safe
     
-    def __init__(self):
-        self._cache = {}
-        logger.info("🗄️ Cache en mémoire initialisé")
+    Comme Redis, les entrées expirent après leur TTL (à la lecture). Le nombre
+    d'entrées est borné: au-delà de max_entries, les moins récemment utilisées
+    sont évincées.
+    """
+    
+    def __init__(self, max_entries: int = 20_000):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()  # clé -> (valeur, expiration)
+        self._lock = Lock()
+        logger.info(f"🗄️ Cache en mémoire initialisé | max_entries={max_entries}")
     
     def get(self, key: str) -> Optional[Any]:
-        return self._cache.get(key)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return value
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
-        self._cache[key] = value
-        logger.debug(f"💾 Cache set | key={key}")
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._cache[key] = (value, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        logger.debug(f"💾 Cache set | key={key} ttl={ttl}")
     
     def delete(self, key: str):
-        self._cache.pop(key, None)
+        with self._lock:
+            self._cache.pop(key, None)
         logger.debug(f"🗑️ Cache delete | key={key}")
     
     def clear(self):
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
         logger.info("🗑️ Cache complet nettoyé")
 
 class RedisCache(CacheBackend):
@@ -113,9 +140,9 @@ def create_cache() -> CacheBackend:
             return RedisCache(settings.redis_url)
         except (ImportError, ConnectionError):
             logger.warning("⚠️ Redis non disponible, utilisation du cache en mémoire")
-            return DictCache()
+            return DictCache(settings.memory_cache_max_entries)
     else:
-        return DictCache()
+        return DictCache(settings.memory_cache_max_entries)
 
 # Instance globale
 cache = create_cache()
\ No newline at end of file
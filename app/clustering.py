@@ -0,0 +1,214 @@
+"""
+Regroupement des produits par forme de saisonnalité hebdomadaire
+Un modèle Prophet par cluster remplace un modèle par produit pour la longue traîne
+"""
+
+import logging
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.cluster import KMeans
+
+from .config import settings
+from .data_utils import panel_fingerprint
+from .training_pool import error_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def weekly_profile(data: pd.DataFrame) -> np.ndarray:
+    """
+    Forme hebdomadaire normalisée d'une série journalière (colonnes ds, y)
+
+    Vente moyenne de chaque jour de la semaine (lundi = 0) divisée par la vente
+    moyenne: un produit 10 fois plus vendu avec la même forme a le même profil.
+
+    Returns:
+        Tableau de 7 valeurs de moyenne 1 (que des 1 si la série est nulle)
+    """
+    weekdays = pd.DatetimeIndex(data['ds']).dayofweek
+    y = np.asarray(data['y'], dtype=float)
+    totals = np.bincount(weekdays, weights=y, minlength=7)
+    counts = np.maximum(np.bincount(weekdays, minlength=7), 1)
+    means = totals / counts
+    if means.mean() <= 0:
+        return np.ones(7)
+    return means / means.mean()
+
+
+class SeasonalClusters:
+    """
+    Affectation des produits à des clusters de profils hebdomadaires (KMeans)
+
+    Le premier chargement regroupe tout le catalogue. Les chargements suivants ne
+    réaffectent que les produits nouveaux ou modifiés au centroïde le plus proche;
+    le regroupement complet n'est refait que si une part du catalogue supérieure à
+    cluster_refit_ratio a changé.
+    """
+
+    def __init__(self, n_clusters: Optional[int] = None, refit_ratio: Optional[float] = None):
+        self.n_clusters = n_clusters or settings.cluster_count
+        self.refit_ratio = settings.cluster_refit_ratio if refit_ratio is None else refit_ratio
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Dict[str, int] = {}
+        self.profiles: Dict[str, np.ndarray] = {}
+        self.fingerprints: Dict[str, str] = {}  # Empreinte de la série de chaque membre
+
+    def update(self, series: Dict[str, pd.DataFrame], fingerprints: Dict[str, str]) -> Set[int]:
+        """
+        Met à jour l'affectation après un chargement de données
+
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)} de tout le catalogue
+            fingerprints: Empreinte de la série de chaque produit
+
+        Returns:
+            Clusters dont la composition ou les données ont changé
+        """
+        removed = [product_id for product_id in self.assignments if product_id not in series]
+        changed = [
+            product_id for product_id in series
+            if fingerprints[product_id] != self.fingerprints.get(product_id)
+        ]
+
+        for product_id in changed:
+            self.profiles[product_id] = weekly_profile(series[product_id])
+        for product_id in removed:
+            self.profiles.pop(product_id, None)
+        self.fingerprints = dict(fingerprints)
+
+        if self.centroids is None or len(changed) > self.refit_ratio * len(series):
+            previous = dict(self.assignments)
+            self._fit()
+            logger.info(
+                f"🧩 Regroupement complet: {len(self.assignments)} produits, "
+                f"{0 if self.centroids is None else len(self.centroids)} clusters"
+            )
+            return set(self.assignments.values()) | set(previous.values())
+
+        affected = {self.assignments.pop(product_id) for product_id in removed}
+        for product_id in changed:
+            if product_id in self.assignments:
+                affected.add(self.assignments[product_id])
+            self.assignments[product_id] = self.nearest(self.profiles[product_id])
+            affected.add(self.assignments[product_id])
+        self._update_centroids(affected)
+
+        if changed or removed:
+            logger.info(
+                f"🧩 Réaffectation incrémentale: {len(changed)} modifiés, "
+                f"{len(removed)} retirés, {len(affected)} clusters touchés"
+            )
+        return affected
+
+    def _fit(self):
+        """Regroupe tous les profils avec KMeans"""
+        product_ids = list(self.profiles)
+        if not product_ids:
+            self.centroids, self.assignments = None, {}
+            return
+        matrix = np.array([self.profiles[product_id] for product_id in product_ids])
+        n_clusters = min(self.n_clusters, len(product_ids))
+        kmeans = KMeans(n_clusters=n_clusters, n_init=4, random_state=0).fit(matrix)
+        self.centroids = kmeans.cluster_centers_
+        self.assignments = dict(zip(product_ids, (int(label) for label in kmeans.labels_)))
+
+    def _update_centroids(self, cluster_ids: Set[int]):
+        """Recentre les clusters touchés sur leurs membres actuels"""
+        for cluster_id in cluster_ids:
+            members = self.members(cluster_id)
+            if members:
+                self.centroids[cluster_id] = np.mean([self.profiles[m] for m in members], axis=0)
+
+    def nearest(self, profile: np.ndarray) -> int:
+        """Cluster dont le centroïde est le plus proche d'un profil"""
+        if self.centroids is None:
+            raise ValueError("Aucun cluster calculé")
+        return int(np.argmin(((self.centroids - profile) ** 2).sum(axis=1)))
+
+    def members(self, cluster_id: int) -> List[str]:
+        return [product_id for product_id, assigned in self.assignments.items() if assigned == cluster_id]
+
+    def cluster_fingerprint(self, cluster_id: int) -> str:
+        """Empreinte des membres d'un cluster et de leurs données (version du modèle du cluster)"""
+        return panel_fingerprint({
+            product_id: self.fingerprints[product_id] for product_id in self.members(cluster_id)
+        })
+
+    def to_dict(self) -> Dict:
+        """État sérialisable (cache partagé entre workers)"""
+        return {
+            'centroids': None if self.centroids is None else self.centroids.tolist(),
+            'assignments': self.assignments,
+            'profiles': {product_id: profile.tolist() for product_id, profile in self.profiles.items()},
+            'fingerprints': self.fingerprints
+        }
+
+    def load(self, state: Dict):
+        """Restaure un état produit par to_dict"""
+        self.centroids = None if state['centroids'] is None else np.array(state['centroids'])
+        self.assignments = {product_id: int(c) for product_id, c in state['assignments'].items()}
+        self.profiles = {product_id: np.array(p) for product_id, p in state['profiles'].items()}
+        self.fingerprints = dict(state['fingerprints'])
+
+
+def cluster_series(series: Dict[str, pd.DataFrame], members: List[str]) -> pd.DataFrame:
+    """
+    Série normalisée d'un cluster: moyenne par date des ventes de chaque membre divisées par son niveau
+
+    Args:
+        series: Dict {product_id: DataFrame (ds, y)}
+        members: Produits du cluster
+
+    Returns:
+        DataFrame (ds, y) dont le niveau moyen vaut environ 1
+    """
+    frames = []
+    for product_id in members:
+        data = series[product_id]
+        level = float(data['y'].mean())
+        if level > 0:
+            frames.append(pd.DataFrame({'ds': data['ds'].values, 'y': data['y'].values / level}))
+    if not frames:
+        return pd.DataFrame({'ds': pd.Series(dtype='datetime64[ns]'), 'y': pd.Series(dtype=float)})
+    return pd.concat(frames, ignore_index=True).groupby('ds', sort=True)['y'].mean().reset_index()
+
+
+def scale_member_forecast(
+    actual: np.ndarray,
+    normalized_fitted: np.ndarray,
+    normalized_future: np.ndarray,
+    interval_width: Optional[float] = None
+) -> Dict:
+    """
+    Met la courbe normalisée d'un cluster au niveau d'un de ses membres
+
+    P50 = yhat normalisé × vente moyenne du membre; l'intervalle est tiré des
+    résidus du membre autour de la courbe sur son historique.
+
+    Args:
+        actual: Ventes observées du membre
+        normalized_fitted: yhat normalisé du cluster aux dates de l'historique du membre
+        normalized_future: yhat normalisé du cluster aux dates à prévoir
+        interval_width: Largeur de l'intervalle P10-P90 (défaut: réglage global)
+
+    Returns:
+        Dict avec 'p10', 'p50', 'p90' (positifs, arrondis), 'quality_metrics' et 'level'
+    """
+    interval_width = interval_width or settings.prophet_interval_width
+    actual = np.asarray(actual, dtype=float)
+    level = float(actual.mean())
+    fitted = normalized_fitted * level
+    sigma = float(np.sqrt(np.mean((actual - fitted) ** 2)))
+    spread = stats.norm.ppf(0.5 + interval_width / 2) * sigma
+    p50 = normalized_future * level
+
+    return {
+        'p10': np.round(np.maximum(0, p50 - spread), 2),
+        'p50': np.round(np.maximum(0, p50), 2),
+        'p90': np.round(np.maximum(0, p50 + spread), 2),
+        'quality_metrics': error_metrics(actual, fitted),
+        'level': level
+    }
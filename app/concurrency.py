@@ -0,0 +1,94 @@
+"""
+Verrous inter-processus pour Stokkel
+Garantit un seul entraînement par produit entre les workers uvicorn
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou inter-processus
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeout(Exception):
+    """Le verrou n'a pas pu être obtenu dans le délai imparti"""
+    pass
+
+
+class FileLock:
+    """
+    Verrou exclusif basé sur flock, partagé par tous les processus de la machine
+
+    Le verrou est libéré par le système si le processus meurt, il ne peut donc pas
+    rester bloqué après un crash. Sans fcntl (Windows), il ne protège que le
+    processus courant et le verrouillage réussit toujours.
+    """
+
+    POLL_INTERVAL_SECONDS = 0.05
+
+    def __init__(self, path: Path, timeout: Optional[float] = None):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Obtient le verrou
+
+        Args:
+            blocking: Attendre le verrou (jusqu'à timeout) plutôt que d'abandonner
+
+        Returns:
+            True si le verrou est obtenu, False si non bloquant et déjà pris
+
+        Raises:
+            LockTimeout: si le délai est dépassé en mode bloquant
+        """
+        if fcntl is None:
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return True
+            except BlockingIOError:
+                if not blocking:
+                    os.close(fd)
+                    return False
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Verrou {self.path} non obtenu après {self.timeout}s")
+                time.sleep(self.POLL_INTERVAL_SECONDS)
+
+    def release(self):
+        """Libère le verrou"""
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
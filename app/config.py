@@ -4,7 +4,7 @@ Version: 1.1.0 - Améliorée avec auth optionnelle et cache
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -31,19 +31,94 @@ class Settings(BaseSettings):
     max_forecast_horizon: int = 365  # ⬅️ NOUVEAU
     confidence_interval: float = 0.80
     
+    # Model Selection
+    forecast_model: str = "prophet"  # prophet | ets | naive | global | cluster | auto (tournoi par produit)
+    forecast_model_overrides: Dict[str, str] = {}  # product_id -> famille de modèle (ou auto)
+    ets_season_length: int = 7  # Saisonnalité hebdomadaire
+    
+    # Demande intermittente (classification ADI / CV² de Syntetos-Boylan)
+    intermittent_routing_enabled: bool = True  # intermittent et lumpy -> Croston/TSB
+    intermittent_method: str = "tsb"  # croston | tsb
+    demand_adi_threshold: float = 1.32
+    demand_cv2_threshold: float = 0.49
+    
+    # Modèle global (HistGradientBoosting quantile entraîné sur le panel de tous les produits)
+    global_model_train_horizon: int = 28  # Pas de prévision appris
+    global_model_max_origins: int = 26  # Origines hebdomadaires par produit
+    global_model_max_rows: int = 500_000  # Panel échantillonné au-delà
+    global_model_max_iter: int = 200
+    
+    # Clusters de saisonnalité (un modèle Prophet par cluster de profils hebdomadaires)
+    cluster_count: int = 12
+    cluster_refit_ratio: float = 0.2  # Part du catalogue modifiée au-delà de laquelle on regroupe tout
+    
+    # Tournoi de modèles (politique auto): naïf saisonnier, ETS, Croston/TSB, Prophet
+    tournament_holdout_days: int = 28  # Fenêtre de validation
+    tournament_tolerance: float = 0.05  # Le moins cher à moins de 5% du meilleur MAE l'emporte
+    tournament_cache_ttl_seconds: int = 30 * 24 * 3600  # Vainqueur versionné par l'empreinte des données: valable jusqu'au prochain upload
+    
     # Forecasting Settings (Prophet)
     prophet_changepoint_prior_scale: float = 0.05
     prophet_seasonality_prior_scale: float = 10.0
     prophet_interval_width: float = 0.80
+    prophet_uncertainty_mode: str = "sampling"  # sampling | analytic (résidus in-sample)
+    prophet_uncertainty_samples: int = 1000  # Trajectoires simulées en mode sampling
+    warm_start_enabled: bool = True  # Réentraînement initialisé par le modèle précédent
+    warm_start_max_rmse_increase: float = 0.25  # Au-delà: réentraînement à froid
+    
+    # Recherche des priors Prophet par produit (backtest sur folds, abandon des perdants)
+    tuning_folds: int = 3
+    tuning_horizon_days: int = 14
+    tuning_prune_ratio: float = 1.2  # Abandon si MAE > 1.2 × MAE de la meilleure configuration
+    
+    # Parallel Training
+    training_workers: int = max(1, (os.cpu_count() or 2) - 1)
+    parallel_training_min_products: int = 4  # En dessous: entraînement séquentiel
+    training_lock_timeout_seconds: float = 600.0  # Attente max d'un entraînement d'un autre worker
+    training_pool_warmup: bool = True
+    
+    # Exécuteurs des endpoints (travail bloquant hors de la boucle asyncio)
+    compute_executor_workers: int = max(2, os.cpu_count() or 2)  # Prévision, optimisation
+    compute_executor_max_pending: int = 64  # Au-delà: 503
+    io_executor_workers: int = 4  # Parsing CSV, fichiers, cache
+    io_executor_max_pending: int = 16
     
     # Data Storage
     data_dir: str = "./data"
     models_dir: str = "./models"
     metrics_dir: str = "./metrics"  # ⬅️ NOUVEAU
+    storage_format: str = "parquet"  # parquet (seaux de produits, pyarrow requis) | csv
+    storage_buckets: int = 64  # Seaux de hachage des produits (fichiers Parquet)
+    ingest_chunk_rows: int = 500_000  # Lignes lues par bloc à l'upload (mémoire bornée)
+    upload_max_bytes: int = 2 * 1024 ** 3  # Taille maximale d'un fichier uploadé (compressé), 413 au-delà
+    upload_chunk_bytes: int = 1024 * 1024  # Blocs de copie de l'upload vers le disque
     
     # Cache
     redis_url: Optional[str] = None  # ⬅️ NOUVEAU: None = dict cache
     cache_ttl_seconds: int = 3600
+    memory_cache_max_entries: int = 20_000  # Cache en mémoire (sans Redis): LRU, au moins le nombre de produits
+    forecast_cache_enabled: bool = True
+    forecast_cache_ttl_seconds: int = 3600
+    forecast_store_ttl_seconds: int = 26 * 3600  # Prévisions jusqu'à l'horizon max (versionnées): au-delà d'un cycle de précalcul
+    
+    # Précalcul des prévisions de tout le catalogue en tâche de fond
+    precompute_enabled: bool = True
+    precompute_daily_at: Optional[str] = "02:00"  # HH:MM, heure locale (None: au démarrage et sur POST /admin/precompute uniquement)
+    precompute_batch_size: int = 50  # Produits par tâche
+    precompute_executor_workers: int = 2
+    precompute_executor_max_pending: int = 4
+    
+    # Réentraînement des produits modifiés après upload (job en tâche de fond)
+    retrain_on_upload: bool = True
+    retrain_batch_size: int = 16  # Produits par lot, par ordre de priorité (annulation entre deux lots)
+    retrain_jobs_history: int = 20  # Jobs conservés pour GET /jobs/{job_id}
+    
+    # Liste des produits (GET /products)
+    products_max_page_size: int = 1000  # Plafond de limit (pagination sur demande: sans limit, tous les produits)
+    
+    # Cache mémoire des modèles entraînés (LRU, évincés vers models_dir)
+    model_cache_max_models: int = 200
+    model_cache_max_bytes: int = 512 * 1024 * 1024
     
     # Logging
     log_level: str = "INFO"
@@ -5,17 +5,47 @@ Gère le stockage et la récupération des données de ventes
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from pathlib import Path
-import json
 
 from .config import settings
 from .validators import DataValidator, ValidationError
+from .data_utils import fingerprint_arrays, compute_demand_profiles
+from .storage import PartitionedSalesStore, parquet_available
 
 logger = logging.getLogger(__name__)
 
+# Colonnes de la table des statistiques produits (champs de ProductInfo), triables et filtrables
+PRODUCT_FIELDS = (
+    'product_id', 'data_points', 'date_range_start', 'date_range_end', 'days',
+    'average_daily_sales', 'median_sales', 'std_dev', 'min_sales', 'max_sales',
+    'total_sales', 'coefficient_of_variation', 'iqr'
+)
+PRODUCT_DATE_FIELDS = ('date_range_start', 'date_range_end')
+FILTER_OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+}
+
+
+class SalesSnapshot(NamedTuple):
+    """
+    Ventes indexées, publiées en une seule affectation
+    
+    Un upload (exécuteur io) remplace l'instantané pendant que les threads de calcul
+    lisent les séries: chaque lecteur prend l'instantané une fois, pour que les
+    plages de lignes correspondent toujours aux DataFrames lus.
+    """
+    sales: pd.DataFrame  # Ventes journalières par produit, triées par produit puis date
+    daily: pd.DataFrame  # Mêmes lignes au format Prophet (ds, y), sans copie
+    rows: Dict[str, Tuple[int, int]]  # Plage de lignes de chaque produit
+
 
 class DataManager:
     """Gestionnaire centralisé des données de ventes"""
@@ -23,8 +53,29 @@ class DataManager:
     def __init__(self):
         self.data_dir = Path(settings.data_dir)
         self.data_dir.mkdir(exist_ok=True)
-        self.sales_data: Optional[pd.DataFrame] = None
+        self._snapshot: Optional[SalesSnapshot] = None
+        self.product_stats: Optional[pd.DataFrame] = None  # Une ligne par produit (PRODUCT_FIELDS)
         self.products_cache: Dict = {}
+        self.product_fingerprints: Dict[str, str] = {}  # Empreinte de la série journalière
+        self.changed_products: List[str] = []  # Produits modifiés par le dernier chargement
+        self.demand_profiles: Dict[str, Dict] = {}  # ADI, CV² et classe de demande par produit
+    
+    @property
+    def sales_data(self) -> Optional[pd.DataFrame]:
+        """Ventes journalières par produit, triées par produit puis date"""
+        snapshot = self._snapshot
+        return snapshot.sales if snapshot is not None else None
+    
+    @property
+    def daily_data(self) -> Optional[pd.DataFrame]:
+        """Mêmes lignes que sales_data au format Prophet (ds, y)"""
+        snapshot = self._snapshot
+        return snapshot.daily if snapshot is not None else None
+    
+    @property
+    def _sales_rows(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = self._snapshot
+        return snapshot.rows if snapshot is not None else {}
     
     def _detect_column_mapping(self, df: pd.DataFrame) -> dict:
         """Détecte automatiquement le mapping des colonnes"""
@@ -47,61 +98,54 @@ class DataManager:
         
     def load_sales_data(self, filepath: str) -> Dict:
         """
-        Charge les données de ventes depuis un fichier CSV
+        Charge les données de ventes depuis un fichier CSV (éventuellement
+        compressé: .gz, .zip, décompressé au fil de la lecture) ou XLSX, lu par blocs
+        
+        Chaque bloc est renommé, validé, converti puis agrégé en totaux journaliers
+        par produit: la mémoire reste bornée par la taille d'un bloc et l'agrégat
+        journalier, quelle que soit la taille du fichier.
         
         Args:
-            filepath: Chemin vers le fichier CSV
+            filepath: Chemin vers le fichier (l'extension donne le format et la compression)
             
         Returns:
             Dict avec les statistiques de chargement
         """
         try:
-            # Lecture du CSV
-            df = pd.read_csv(filepath)
-            
-            # Détection automatique du mapping des colonnes
-            column_mapping = self._detect_column_mapping(df)
-            
-            # Application du mapping si détecté
-            if column_mapping:
-                logger.info(f"Mapping automatique detecte: {column_mapping}")
-                df = df.rename(columns=column_mapping)
+            total_records = 0
+            partials: List[pd.Series] = []
+            pending_rows = compacted_rows = 0
             
-            # Validation des colonnes requises
-            required_cols = ['product_id', 'date', 'quantity']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            
-            if missing_cols:
-                raise ValueError(f"Colonnes manquantes: {missing_cols}")
-            
-            # Validation centralisée
-            is_valid, error_msg = DataValidator.validate_sales_dataframe(df)
-            if not is_valid:
-                raise ValidationError(error_msg)
-            
-            # Conversion et nettoyage
-            df['date'] = pd.to_datetime(df['date'])
-            df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-            
-            # Suppression des valeurs invalides
-            df = df.dropna(subset=['product_id', 'date', 'quantity'])
-            df = df[df['quantity'] >= 0]  # Pas de quantités négatives
+            for chunk in self._read_sales_chunks(filepath):
+                total_records += len(chunk)
+                partials.append(chunk.groupby(['product_id', 'date'], sort=False)['quantity'].sum())
+                pending_rows += len(partials[-1])  # Lignes ajoutées depuis la dernière fusion
+                
+                # Fusion dès que les nouveaux agrégats partiels dépassent l'agrégat déjà fusionné:
+                # chaque fusion au moins double la taille traitée, le coût total reste linéaire
+                if pending_rows > max(compacted_rows, settings.ingest_chunk_rows):
+                    partials = [self._merge_daily_totals(partials)]
+                    compacted_rows, pending_rows = len(partials[0]), 0
             
-            # Tri par date
-            df = df.sort_values(['product_id', 'date'])
+            if not partials:
+                raise ValidationError("Le fichier ne contient aucune donnée (vide)")
             
-            # Stockage
-            self.sales_data = df
+            # Stockage, tri par produit et date et index des plages de lignes
+            self._index_sales_data(self._merge_daily_totals(partials).reset_index())
             self._update_products_cache()
+            self.changed_products = self._update_fingerprints()
             
             # Sauvegarde locale
             self._save_data()
             
+            df = self.sales_data
+            
             # Statistiques
             stats = {
                 'message': 'Données chargées avec succès',
-                'products_count': df['product_id'].nunique(),
-                'total_records': len(df),
+                'products_count': len(self._sales_rows),
+                'total_records': total_records,
+                'products_changed': len(self.changed_products),
                 'date_range': {
                     'start': df['date'].min().strftime('%Y-%m-%d'),
                     'end': df['date'].max().strftime('%Y-%m-%d')
@@ -109,7 +153,9 @@ class DataManager:
             }
             
             logger.info(f"Données chargées: {stats['products_count']} produits, "
-                       f"{stats['total_records']} enregistrements")
+                       f"{stats['total_records']} enregistrements "
+                       f"({len(df)} jours-produits), "
+                       f"{stats['products_changed']} produits modifiés")
             
             return stats
             
@@ -117,6 +163,96 @@ class DataManager:
             logger.error(f"Erreur lors du chargement des données: {str(e)}")
             raise
     
+    def _read_sales_chunks(self, filepath: str) -> Iterator[pd.DataFrame]:
+        """
+        Lit le CSV par blocs de settings.ingest_chunk_rows lignes, limités aux
+        colonnes utiles, et renvoie des blocs renommés, validés et typés
+        (un classeur XLSX est lu en une fois: au plus ~1M lignes)
+        """
+        excel = str(filepath).lower().endswith('.xlsx')
+        read = pd.read_excel if excel else pd.read_csv
+        
+        # Mapping des colonnes détecté sur l'en-tête seul
+        header = read(filepath, nrows=0)
+        column_mapping = self._detect_column_mapping(header)
+        
+        # Application du mapping si détecté
+        if column_mapping:
+            logger.info(f"Mapping automatique detecte: {column_mapping}")
+        source_columns = {column_mapping.get(col, col): col for col in header.columns}
+        
+        # Validation des colonnes requises
+        required_cols = ['product_id', 'date', 'quantity']
+        missing_cols = [col for col in required_cols if col not in source_columns]
+        
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes: {missing_cols}")
+        
+        columns = {
+            'usecols': [source_columns[col] for col in required_cols],
+            'dtype': {source_columns['product_id']: str}
+        }
+        if excel:
+            reader = [pd.read_excel(filepath, **columns)]
+        else:
+            reader = pd.read_csv(filepath, chunksize=settings.ingest_chunk_rows, **columns)
+        try:
+            for chunk in reader:
+                chunk = chunk.rename(columns=column_mapping)
+                
+                # Validation centralisée
+                is_valid, error_msg = DataValidator.validate_sales_dataframe(chunk)
+                if not is_valid:
+                    raise ValidationError(error_msg)
+                
+                # Conversion et nettoyage (colonnes typées, identiques à celles relues du stockage)
+                chunk['date'] = pd.to_datetime(chunk['date'])
+                chunk['quantity'] = pd.to_numeric(chunk['quantity'], errors='coerce').astype('float64')
+                
+                # Suppression des valeurs invalides
+                chunk = chunk.dropna(subset=['product_id', 'date', 'quantity'])
+                chunk = chunk[chunk['quantity'] >= 0]  # Pas de quantités négatives
+                
+                if not chunk.empty:
+                    yield chunk
+        finally:
+            if not excel:
+                reader.close()  # Fichier (et flux de décompression) fermé même en cas d'erreur
+    
+    @staticmethod
+    def _merge_daily_totals(partials: List[pd.Series]) -> pd.Series:
+        """Fusionne des totaux journaliers partiels (index product_id, date), triés par produit et date"""
+        merged = pd.concat(partials) if len(partials) > 1 else partials[0]
+        return merged.groupby(level=['product_id', 'date'], sort=True).sum()
+    
+    @staticmethod
+    def _row_ranges(product_ids: np.ndarray) -> Dict[str, Tuple[int, int]]:
+        """Plage [début, fin) des lignes de chaque produit dans une colonne triée par produit"""
+        if len(product_ids) == 0:
+            return {}
+        starts = np.concatenate(([0], np.flatnonzero(product_ids[1:] != product_ids[:-1]) + 1))
+        ends = np.append(starts[1:], len(product_ids))
+        return {product_ids[start]: (int(start), int(end)) for start, end in zip(starts, ends)}
+    
+    def _index_sales_data(self, sales: pd.DataFrame):
+        """
+        Trie les ventes par produit et date, agrège les éventuels doublons du jour
+        et indexe la plage de lignes de chaque produit (une seule passe au chargement),
+        puis publie le tout en un seul instantané
+        """
+        sales = sales.sort_values(['product_id', 'date'], kind='stable').reset_index(drop=True)
+        
+        # Ventes brutes (CSV historique): plusieurs lignes par produit et par jour
+        product_ids, dates = sales['product_id'].to_numpy(), sales['date'].to_numpy()
+        if ((product_ids[1:] == product_ids[:-1]) & (dates[1:] == dates[:-1])).any():
+            sales = sales.groupby(['product_id', 'date'], sort=True)['quantity'].sum().reset_index()
+        
+        self._snapshot = SalesSnapshot(
+            sales=sales,
+            daily=pd.DataFrame({'ds': sales['date'], 'y': sales['quantity']}, copy=False),
+            rows=self._row_ranges(sales['product_id'].to_numpy())
+        )
+    
     def get_product_data(self, product_id: str) -> pd.DataFrame:
         """
         Récupère les données d'un produit spécifique
@@ -125,19 +261,18 @@ class DataManager:
             product_id: Identifiant du produit
             
         Returns:
-            DataFrame avec les données du produit
+            DataFrame avec les données du produit, triées par date: tranche sans
+            copie de sales_data, à ne pas modifier
         """
-        if self.sales_data is None:
+        snapshot = self._snapshot  # Lu une fois: un upload peut le remplacer en parallèle
+        if snapshot is None:
             raise ValueError("Aucune donnée chargée")
         
-        product_data = self.sales_data[
-            self.sales_data['product_id'] == product_id
-        ].copy()
-        
-        if product_data.empty:
+        rows = snapshot.rows.get(product_id)
+        if rows is None:
             raise ValueError(f"Produit {product_id} non trouvé")
         
-        return product_data.sort_values('date')
+        return snapshot.sales.iloc[rows[0]:rows[1]]
     
     def get_all_products(self) -> List[Dict]:
         """
@@ -146,31 +281,85 @@ class DataManager:
         Returns:
             Liste de dictionnaires contenant les infos produits
         """
-        if self.sales_data is None:
+        if self.product_stats is None:
             return []
         
-        products_info = []
+        return self._product_records(self.product_stats)
+    
+    def query_products(self, offset: int = 0, limit: Optional[int] = None,
+                       sort_by: str = 'product_id', descending: bool = False,
+                       filters: Optional[List[str]] = None,
+                       search: Optional[str] = None) -> Tuple[int, List[Dict]]:
+        """
+        Liste paginée, triée et filtrée des produits, lue dans la table des statistiques
         
-        for product_id in self.sales_data['product_id'].unique():
-            product_data = self.get_product_data(product_id)
-            
-            info = {
-                'product_id': product_id,
-                'data_points': len(product_data),
-                'date_range_start': product_data['date'].min().strftime('%Y-%m-%d'),
-                'date_range_end': product_data['date'].max().strftime('%Y-%m-%d'),
-                'average_daily_sales': float(product_data['quantity'].mean()),
-                'total_sales': float(product_data['quantity'].sum()),
-                'std_dev': float(product_data['quantity'].std())
-            }
+        Args:
+            offset: Nombre de produits à sauter
+            limit: Nombre maximal de produits renvoyés (tous si None)
+            sort_by: Champ de tri (PRODUCT_FIELDS)
+            descending: Tri décroissant
+            filters: Conditions 'champ:opérateur:valeur' combinées par ET
+                (opérateurs: eq, ne, gt, gte, lt, lte), ex. 'total_sales:gte:100'
+            search: Sous-chaîne recherchée dans product_id (insensible à la casse)
             
-            products_info.append(info)
+        Returns:
+            Tuple (nombre de produits retenus avant pagination, page de produits)
+        """
+        if self.product_stats is None:
+            return 0, []
+        if sort_by not in PRODUCT_FIELDS:
+            raise ValueError(f"Champ de tri inconnu: {sort_by} (champs: {', '.join(PRODUCT_FIELDS)})")
+        
+        table = self.product_stats
+        mask = np.ones(len(table), dtype=bool)
+        for condition in filters or []:
+            field, operator, value = self._parse_filter(condition)
+            mask &= FILTER_OPERATORS[operator](table[field], value).to_numpy()
+        if search:
+            mask &= table['product_id'].str.contains(search, case=False, regex=False).to_numpy()
         
-        return products_info
+        selected = table[mask]
+        # Tri stable, valeurs manquantes en dernier, product_id pour départager
+        selected = selected.sort_values(
+            [sort_by, 'product_id'] if sort_by != 'product_id' else ['product_id'],
+            ascending=not descending, kind='stable', na_position='last'
+        )
+        end = None if limit is None else offset + limit
+        return len(selected), self._product_records(selected.iloc[offset:end])
+    
+    def _parse_filter(self, condition: str) -> Tuple[str, str, object]:
+        """Décode un filtre 'champ:opérateur:valeur' et convertit la valeur au type du champ"""
+        parts = condition.split(':', 2)
+        if len(parts) != 3:
+            raise ValueError(f"Filtre invalide: {condition} (format attendu: champ:opérateur:valeur)")
+        field, operator, raw = parts
+        if field not in PRODUCT_FIELDS:
+            raise ValueError(f"Champ de filtre inconnu: {field} (champs: {', '.join(PRODUCT_FIELDS)})")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Opérateur inconnu: {operator} (opérateurs: {', '.join(FILTER_OPERATORS)})")
+        
+        try:
+            if field == 'product_id':
+                value = raw
+            elif field in PRODUCT_DATE_FIELDS:
+                value = pd.Timestamp(raw)
+            else:
+                value = float(raw)
+        except ValueError:
+            raise ValueError(f"Valeur invalide pour {field}: {raw}")
+        return field, operator, value
+    
+    @staticmethod
+    def _product_records(table: pd.DataFrame) -> List[Dict]:
+        """Lignes de la table des statistiques au format ProductInfo (dates ISO, NaN -> None)"""
+        records = table.assign(**{
+            field: table[field].dt.strftime('%Y-%m-%d') for field in PRODUCT_DATE_FIELDS
+        }).astype(object)
+        return records.where(records.notna(), None).to_dict('records')
     
     def get_product_statistics(self, product_id: str) -> Dict:
         """
-        Calcule les statistiques détaillées d'un produit
+        Statistiques détaillées d'un produit, lues dans la table calculée au chargement
         
         Args:
             product_id: Identifiant du produit
@@ -178,36 +367,39 @@ class DataManager:
         Returns:
             Dict avec les statistiques
         """
-        product_data = self.get_product_data(product_id)
+        product_stats = self.product_stats
+        if product_stats is None:
+            raise ValueError("Aucune donnée chargée")
+        if product_id not in product_stats.index:
+            raise ValueError(f"Produit {product_id} non trouvé")
         
-        stats = {
+        return self._statistics_from_row(product_stats.loc[product_id].to_dict())
+    
+    @staticmethod
+    def _statistics_from_row(row: Dict) -> Dict:
+        """Statistiques détaillées (format products_cache) d'une ligne de la table"""
+        product_id = row['product_id']
+        return {
             'product_id': product_id,
-            'total_observations': len(product_data),
+            'total_observations': int(row['data_points']),
             'date_range': {
-                'start': product_data['date'].min(),
-                'end': product_data['date'].max(),
-                'days': (product_data['date'].max() - product_data['date'].min()).days
+                'start': row['date_range_start'],
+                'end': row['date_range_end'],
+                'days': int(row['days'])
             },
             'sales': {
-                'mean': float(product_data['quantity'].mean()),
-                'median': float(product_data['quantity'].median()),
-                'std': float(product_data['quantity'].std()),
-                'min': float(product_data['quantity'].min()),
-                'max': float(product_data['quantity'].max()),
-                'total': float(product_data['quantity'].sum())
+                'mean': float(row['average_daily_sales']),
+                'median': float(row['median_sales']),
+                'std': float(row['std_dev']),
+                'min': float(row['min_sales']),
+                'max': float(row['max_sales']),
+                'total': float(row['total_sales'])
             },
             'variability': {
-                'coefficient_of_variation': float(
-                    product_data['quantity'].std() / product_data['quantity'].mean()
-                ) if product_data['quantity'].mean() > 0 else 0,
-                'iqr': float(
-                    product_data['quantity'].quantile(0.75) - 
-                    product_data['quantity'].quantile(0.25)
-                )
+                'coefficient_of_variation': float(row['coefficient_of_variation']),
+                'iqr': float(row['iqr'])
             }
         }
-        
-        return stats
     
     def prepare_forecast_data(self, product_id: str) -> pd.DataFrame:
         """
@@ -217,74 +409,148 @@ class DataManager:
             product_id: Identifiant du produit
             
         Returns:
-            DataFrame formaté pour Prophet (colonnes: ds, y)
+            DataFrame formaté pour Prophet (colonnes: ds, y), une ligne par jour
+            de vente: tranche sans copie de daily_data, à ne pas modifier
         """
-        product_data = self.get_product_data(product_id)
+        snapshot = self._snapshot  # Lu une fois: un upload peut le remplacer en parallèle
+        if snapshot is None:
+            raise ValueError("Aucune donnée chargée")
         
-        # Agrégation journalière (au cas où il y aurait plusieurs entrées par jour)
-        daily_data = product_data.groupby('date')['quantity'].sum().reset_index()
+        # Séries journalières agrégées au chargement (plusieurs entrées par jour sommées)
+        rows = snapshot.rows.get(product_id)
+        if rows is None:
+            raise ValueError(f"Produit {product_id} non trouvé")
         
-        # Format Prophet
-        forecast_df = pd.DataFrame({
-            'ds': daily_data['date'],
-            'y': daily_data['quantity']
-        })
+        return snapshot.daily.iloc[rows[0]:rows[1]]
+    
+    def _compute_product_stats(self):
+        """
+        Calcule les statistiques de tous les produits en une agrégation groupée
+        (une ligne par produit, index et colonne product_id, colonnes PRODUCT_FIELDS)
+        """
+        grouped = self.sales_data.groupby('product_id', sort=False)
+        quantity = grouped['quantity']
+        stats = grouped.agg(
+            data_points=('quantity', 'size'),
+            date_range_start=('date', 'min'),
+            date_range_end=('date', 'max'),
+            average_daily_sales=('quantity', 'mean'),
+            median_sales=('quantity', 'median'),
+            std_dev=('quantity', 'std'),
+            min_sales=('quantity', 'min'),
+            max_sales=('quantity', 'max'),
+            total_sales=('quantity', 'sum')
+        )
+        quartiles = quantity.quantile([0.25, 0.75]).unstack()
         
-        return forecast_df
+        stats['days'] = (stats['date_range_end'] - stats['date_range_start']).dt.days
+        stats['coefficient_of_variation'] = np.where(
+            stats['average_daily_sales'] > 0,
+            stats['std_dev'] / stats['average_daily_sales'].where(stats['average_daily_sales'] > 0),
+            0.0
+        )
+        stats['iqr'] = quartiles[0.75] - quartiles[0.25]
+        stats['product_id'] = stats.index
+        stats.index.name = None  # product_id reste la clé de l'index et une colonne triable
+        float_fields = ['average_daily_sales', 'median_sales', 'std_dev', 'min_sales', 'max_sales', 'total_sales']
+        stats[float_fields] = stats[float_fields].astype(float)
+        self.product_stats = stats[list(PRODUCT_FIELDS)]
     
     def _update_products_cache(self):
-        """Met à jour le cache des produits"""
+        """Met à jour la table des statistiques et le cache des produits"""
         if self.sales_data is not None:
+            self._compute_product_stats()
             self.products_cache = {
-                product_id: self.get_product_statistics(product_id)
-                for product_id in self.sales_data['product_id'].unique()
+                product_id: self._statistics_from_row(row)
+                for product_id, row in self.product_stats.to_dict('index').items()
             }
     
+    def _update_fingerprints(self) -> List[str]:
+        """
+        Recalcule l'empreinte et le profil de demande de la série journalière de chaque produit
+        
+        Returns:
+            Liste des produits nouveaux, modifiés ou supprimés depuis le chargement précédent
+        """
+        previous = self.product_fingerprints
+        snapshot = self._snapshot
+        
+        ds = snapshot.daily['ds'].to_numpy(dtype='datetime64[ns]')
+        y = snapshot.daily['y'].to_numpy(dtype='float64')
+        self.product_fingerprints = {
+            product_id: fingerprint_arrays(ds[start:end], y[start:end])
+            for product_id, (start, end) in snapshot.rows.items()
+        }
+        daily = snapshot.daily.assign(product_id=snapshot.sales['product_id'])
+        self.demand_profiles = compute_demand_profiles(
+            daily, settings.demand_adi_threshold, settings.demand_cv2_threshold
+        )
+        
+        changed = [
+            product_id for product_id, fingerprint in self.product_fingerprints.items()
+            if previous.get(product_id) != fingerprint
+        ]
+        removed = [product_id for product_id in previous if product_id not in self.product_fingerprints]
+        
+        return changed + removed
+    
+    def _sales_store(self) -> Optional[PartitionedSalesStore]:
+        """Stockage Parquet partitionné, ou None pour le CSV historique"""
+        if settings.storage_format != 'parquet':
+            return None
+        if not parquet_available():
+            logger.warning("⚠️ pyarrow non installé: stockage des ventes en CSV (pip install pyarrow)")
+            return None
+        return PartitionedSalesStore(self.data_dir / "sales", settings.storage_buckets)
+    
     def _save_data(self):
-        """Sauvegarde les données localement"""
+        """Sauvegarde les données localement (seuls les seaux modifiés en Parquet)"""
         try:
             if self.sales_data is not None:
+                store = self._sales_store()
+                if store is not None:
+                    written = store.save(self.sales_data)
+                    logger.info(
+                        f"💾 Données sauvegardées: {store.root} "
+                        f"({len(written)} seau(x) réécrit(s) sur {store.buckets})"
+                    )
+                    return
+                
                 filepath = self.data_dir / "sales_data.csv"
                 self.sales_data.to_csv(filepath, index=False)
-                
-                # Sauvegarde du cache
-                cache_filepath = self.data_dir / "products_cache.json"
-                with open(cache_filepath, 'w') as f:
-                    # Conversion des Timestamps en strings pour JSON
-                    cache_serializable = {}
-                    for k, v in self.products_cache.items():
-                        cache_copy = v.copy()
-                        if 'date_range' in cache_copy:
-                            cache_copy['date_range'] = {
-                                kk: vv.strftime('%Y-%m-%d') if isinstance(vv, datetime) else vv
-                                for kk, vv in cache_copy['date_range'].items()
-                            }
-                        cache_serializable[k] = cache_copy
-                    
-                    json.dump(cache_serializable, f, indent=2)
-                
                 logger.info(f"Données sauvegardées: {filepath}")
         except Exception as e:
             logger.warning(f"Erreur lors de la sauvegarde: {str(e)}")
     
     def load_saved_data(self):
-        """Charge les données sauvegardées localement"""
+        """Charge les données sauvegardées localement (Parquet, sinon CSV historique)"""
         try:
+            store = self._sales_store()
             filepath = self.data_dir / "sales_data.csv"
-            if filepath.exists():
-                self.sales_data = pd.read_csv(filepath)
-                self.sales_data['date'] = pd.to_datetime(self.sales_data['date'])
-                
-                # Chargement du cache
-                cache_filepath = self.data_dir / "products_cache.json"
-                if cache_filepath.exists():
-                    with open(cache_filepath, 'r') as f:
-                        self.products_cache = json.load(f)
-                else:
-                    self._update_products_cache()
-                
-                logger.info(f"Données chargées depuis: {filepath}")
-                return True
+            if store is not None and store.exists():
+                source = store.root
+                sales = store.load()
+            elif filepath.exists():
+                source = filepath
+                sales = pd.read_csv(filepath, dtype={'product_id': str})
+                sales['date'] = pd.to_datetime(sales['date'])
+                sales['quantity'] = sales['quantity'].astype('float64')
+                if store is not None:
+                    # Migration du CSV vers le stockage partitionné
+                    store.save(sales)
+            else:
+                return False
+            
+            self._index_sales_data(sales)
+            
+            # Statistiques recalculées (une agrégation vectorisée)
+            self._update_products_cache()
+            
+            self._update_fingerprints()
+            self.changed_products = []
+            
+            logger.info(f"Données chargées depuis: {source}")
+            return True
         except Exception as e:
             logger.warning(f"Impossible de charger les données sauvegardées: {str(e)}")
         
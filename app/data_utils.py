@@ -3,6 +3,7 @@ app/data_utils.py
 Utilitaires pour validation et traitement des données
 """
 
+import hashlib
 import pandas as pd
 from typing import Tuple, List, Dict
 import numpy as np
@@ -226,6 +227,129 @@ def generate_sample_data(num_products: int = 2, num_days: int = 30) -> pd.DataFr
     return pd.DataFrame(data)
 
 
+def series_fingerprint(data: pd.DataFrame) -> str:
+    """
+    Calcule l'empreinte du contenu d'une série journalière (colonnes ds, y)
+    
+    Deux séries avec les mêmes dates et les mêmes quantités ont la même empreinte,
+    quel que soit le type d'origine des colonnes.
+    
+    Returns:
+        Empreinte hexadécimale (16 caractères)
+    """
+    return fingerprint_arrays(data['ds'].values, data['y'].values)
+
+
+def fingerprint_arrays(ds: np.ndarray, y: np.ndarray) -> str:
+    """Empreinte d'une série journalière donnée par ses tableaux de dates et de quantités"""
+    ds = np.asarray(ds, dtype='datetime64[ns]').view('int64')
+    y = np.asarray(y, dtype='float64')
+    
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(ds).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def panel_fingerprint(fingerprints: Dict[str, str]) -> str:
+    """
+    Calcule l'empreinte d'un ensemble de produits à partir de l'empreinte de leurs séries
+    
+    Change dès qu'un produit est ajouté, retiré ou modifié.
+    
+    Args:
+        fingerprints: Dict {product_id: empreinte de la série}
+        
+    Returns:
+        Empreinte hexadécimale (16 caractères)
+    """
+    digest = hashlib.sha1()
+    for product_id in sorted(fingerprints):
+        digest.update(f"{product_id}:{fingerprints[product_id]};".encode())
+    return digest.hexdigest()[:16]
+
+
+# Seuils de Syntetos-Boylan pour la classification de la demande
+ADI_THRESHOLD = 1.32
+CV2_THRESHOLD = 0.49
+
+
+def demand_class(adi: float, cv2: float,
+                 adi_threshold: float = ADI_THRESHOLD,
+                 cv2_threshold: float = CV2_THRESHOLD) -> str:
+    """
+    Classe de demande selon l'intervalle moyen entre ventes (ADI) et la
+    variabilité des quantités vendues (CV²)
+    
+    Returns:
+        'smooth', 'erratic', 'intermittent' ou 'lumpy'
+    """
+    if adi < adi_threshold:
+        return 'smooth' if cv2 < cv2_threshold else 'erratic'
+    return 'intermittent' if cv2 < cv2_threshold else 'lumpy'
+
+
+def compute_demand_profiles(daily: pd.DataFrame,
+                            adi_threshold: float = ADI_THRESHOLD,
+                            cv2_threshold: float = CV2_THRESHOLD) -> Dict[str, Dict]:
+    """
+    Calcule ADI, CV² et la classe de demande de tous les produits en un seul groupby
+    
+    Les jours absents entre la première et la dernière date d'un produit comptent
+    comme des jours sans vente.
+    
+    Args:
+        daily: DataFrame journalier avec colonnes product_id, ds, y
+        
+    Returns:
+        Dict {product_id: {'adi', 'cv2', 'demand_class', 'zero_ratio'}}
+    """
+    sales = daily.assign(
+        nonzero=daily['y'] > 0,
+        size=daily['y'].where(daily['y'] > 0)
+    )
+    grouped = sales.groupby('product_id', sort=False).agg(
+        first=('ds', 'min'),
+        last=('ds', 'max'),
+        n_demands=('nonzero', 'sum'),
+        size_count=('size', 'count'),
+        size_mean=('size', 'mean'),
+        size_var=('size', 'var')
+    )
+    # Écart-type de population (ddof=0), 0 pour une seule vente
+    size_count = grouped['size_count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grouped['size_std'] = np.sqrt((grouped['size_var'] * (size_count - 1) / size_count).fillna(0))
+    
+    periods = (grouped['last'] - grouped['first']).dt.days.to_numpy() + 1
+    n_demands = grouped['n_demands'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adi = np.where(n_demands > 0, periods / np.maximum(n_demands, 1), np.inf)
+        cv2 = np.nan_to_num((grouped['size_std'] / grouped['size_mean']).to_numpy() ** 2)
+    
+    return {
+        product_id: {
+            'adi': round(float(adi[i]), 3) if np.isfinite(adi[i]) else None,
+            'cv2': round(float(cv2[i]), 3),
+            'demand_class': demand_class(adi[i], cv2[i], adi_threshold, cv2_threshold),
+            'zero_ratio': round(float(1 - n_demands[i] / periods[i]), 3)
+        }
+        for i, product_id in enumerate(grouped.index)
+    }
+
+
+def classify_demand(data: pd.DataFrame,
+                    adi_threshold: float = ADI_THRESHOLD,
+                    cv2_threshold: float = CV2_THRESHOLD) -> Dict:
+    """
+    Profil de demande d'une seule série journalière (colonnes ds, y)
+    
+    Returns:
+        Dict {'adi', 'cv2', 'demand_class', 'zero_ratio'}
+    """
+    daily = pd.DataFrame({'product_id': 0, 'ds': pd.to_datetime(data['ds']), 'y': data['y']})
+    return compute_demand_profiles(daily, adi_threshold, cv2_threshold)[0]
+
 if __name__ == "__main__":
     # Test des fonctions
     print("🧪 Test des utilitaires de données...")
@@ -0,0 +1,110 @@
+"""
+Exécuteurs bornés pour le travail bloquant des endpoints
+Les calculs (Prophet, optimisation) et les entrées/sorties (CSV, modèles)
+tournent hors de la boucle asyncio pour que /health reste instantané
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Catégories de travail: calcul (prévision, optimisation), entrées/sorties (CSV, fichiers)
+# et précalcul des prévisions en tâche de fond
+EXECUTOR_KINDS = ('compute', 'io', 'precompute')
+
+
+class BoundedExecutor:
+    """
+    Pool de threads dont le nombre de tâches en attente est borné
+
+    Au-delà de max_pending tâches (en cours + en file), les nouvelles demandes
+    sont refusées avec un 503 plutôt que d'allonger indéfiniment la file.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"stokkel-{name}")
+        self._pending = 0
+        self._lock = Lock()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Exécute func(*args, **kwargs) dans le pool et attend son résultat"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                logger.warning(f"⚠️ Exécuteur '{self.name}' saturé ({self._pending} tâches)")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Serveur occupé ({self.name}), réessayez dans quelques instants"
+                )
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> Dict:
+        """État de l'exécuteur (pour /health)"""
+        return {
+            'workers': self.max_workers,
+            'pending': self._pending,
+            'max_pending': self.max_pending
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = Lock()
+
+
+def get_executor(kind: str) -> BoundedExecutor:
+    """Retourne l'exécuteur d'une catégorie (créé à la première utilisation)"""
+    with _executors_lock:
+        if kind not in _executors:
+            if kind not in EXECUTOR_KINDS:
+                raise ValueError(f"Catégorie d'exécuteur inconnue: {kind}")
+            _executors[kind] = BoundedExecutor(
+                kind,
+                max_workers=getattr(settings, f"{kind}_executor_workers"),
+                max_pending=getattr(settings, f"{kind}_executor_max_pending")
+            )
+            logger.info(f"🧵 Exécuteur '{kind}' créé | workers={_executors[kind].max_workers}")
+        return _executors[kind]
+
+
+async def run_compute(func: Callable, *args, **kwargs) -> Any:
+    """Exécute un calcul bloquant (prévision, optimisation) hors de la boucle asyncio"""
+    return await get_executor('compute').run(func, *args, **kwargs)
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """Exécute une entrée/sortie bloquante (CSV, fichiers, cache) hors de la boucle asyncio"""
+    return await get_executor('io').run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict]:
+    """État des exécuteurs déjà créés"""
+    return {kind: executor.stats() for kind, executor in _executors.items()}
+
+
+def shutdown_executors():
+    """Arrête les exécuteurs (fin du lifespan)"""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
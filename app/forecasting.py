@@ -5,23 +5,38 @@ Implémente les modèles de forecasting (Prophet, SARIMA)
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from scipy import stats
+from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
+import os
 from pathlib import Path
 from threading import Lock
+from concurrent.futures import as_completed
 
 from prophet import Prophet
 from prophet.serialize import model_to_json, model_from_json
+from sklearn.ensemble import HistGradientBoostingRegressor
+import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
 
 from .config import settings
-from .schemas import ForecastPoint
+from .schemas import ForecastPoint, ForecastResponse
 from .validators import DataValidator, ValidationError
-from .cache import cache
+from .cache import cache, DictCache
+from .model_cache import ModelLRUCache
+from .concurrency import FileLock, LockTimeout
+from .data_utils import series_fingerprint, panel_fingerprint, classify_demand
+from .clustering import SeasonalClusters, weekly_profile, cluster_series, scale_member_forecast
+from .training_pool import (
+    get_training_pool, fit_prophet, fit_prophet_worker, compute_in_sample_metrics, extract_stan_params
+)
 
 # Exceptions personnalisées
 class ForecastError(Exception):
@@ -35,6 +50,748 @@ class InsufficientDataError(ForecastError):
 logger = logging.getLogger(__name__)
 
 
+# Formats de réponse de /forecast
+FORECAST_RESPONSE_FORMATS = ('points', 'columnar')
+
+# Calcul de l'incertitude des prévisions Prophet
+UNCERTAINTY_MODES = ('sampling', 'analytic')
+
+# Familles de modèles disponibles
+MODEL_FAMILIES = ('prophet', 'ets', 'intermittent', 'global', 'cluster', 'naive')
+
+# Politique de modèle: famille choisie par produit par un tournoi sur une fenêtre de validation
+AUTO_MODEL_POLICY = 'auto'
+
+# Classes de demande routées vers la famille 'intermittent'
+INTERMITTENT_DEMAND_CLASSES = ('intermittent', 'lumpy')
+
+# Grilles de paramètres de lissage évaluées simultanément pour chaque méthode
+ETS_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.8)
+ETS_BETAS = (0.01, 0.05, 0.15)
+ETS_GAMMAS = (0.05, 0.15, 0.3)
+
+# Grille de lissage des tailles de demande et des probabilités / intervalles (Croston, TSB)
+INTERMITTENT_ALPHAS = (0.05, 0.1, 0.2, 0.3)
+INTERMITTENT_BETAS = (0.01, 0.05, 0.1, 0.2)
+
+
+def forecast_frame_to_points(forecast_frame: pd.DataFrame) -> List[ForecastPoint]:
+    """
+    Convertit une prévision en colonnes en ForecastPoint
+    
+    Les quantiles sont déjà bornés à zéro et arrondis par le moteur: les points
+    sont construits sans revalidation.
+    """
+    return [
+        ForecastPoint.model_construct(date=day, p10=p10, p50=p50, p90=p90)
+        for day, p10, p50, p90 in zip(
+            forecast_frame['date'].dt.date,
+            forecast_frame['p10'].tolist(),
+            forecast_frame['p50'].tolist(),
+            forecast_frame['p90'].tolist()
+        )
+    ]
+
+
+def forecast_frame_to_columns(forecast_frame: pd.DataFrame) -> Dict[str, List]:
+    """Sérialise une prévision en colonnes: un tableau par champ (dates au format YYYY-MM-DD)"""
+    return {
+        'date': forecast_frame['date'].dt.strftime('%Y-%m-%d').tolist(),
+        'p10': forecast_frame['p10'].tolist(),
+        'p50': forecast_frame['p50'].tolist(),
+        'p90': forecast_frame['p90'].tolist()
+    }
+
+
+def align_daily_series(
+    series: Dict[str, pd.DataFrame]
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Aligne des séries journalières dans une matrice produits × jours
+    
+    Les jours sans vente sont complétés par zéro et chaque série est alignée à
+    droite (son dernier jour dans la dernière colonne); les colonnes antérieures
+    au début de la série valent NaN.
+    
+    Args:
+        series: Dict {product_id: DataFrame (ds, y)}
+        
+    Returns:
+        Tuple (product_ids, matrice (N, T), dernier jour de chaque série en jours epoch)
+    """
+    product_ids = list(series)
+    rows = []
+    last_days = np.empty(len(product_ids), dtype=np.int64)
+    
+    for i, product_id in enumerate(product_ids):
+        data = series[product_id].dropna(subset=['y'])
+        days = data['ds'].values.astype('datetime64[D]').astype(np.int64)
+        row = np.zeros(days.max() - days.min() + 1)
+        np.add.at(row, days - days.min(), data['y'].values.astype(float))
+        rows.append(row)
+        last_days[i] = days.max()
+    
+    length = max(len(row) for row in rows)
+    matrix = np.full((len(rows), length), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, length - len(row):] = row
+    
+    return product_ids, matrix, last_days
+
+
+class SeasonalNaiveForecaster:
+    """
+    Naïf saisonnier vectorisé: chaque jour prévu reprend la vente du même jour de la dernière saison
+
+    Aucun paramètre à ajuster: c'est la référence la moins chère du tournoi de
+    modèles. L'intervalle est tiré des erreurs de la méthode sur l'historique et
+    s'élargit à chaque saison supplémentaire de l'horizon.
+    """
+
+    def __init__(self, season_length: Optional[int] = None, interval_width: Optional[float] = None):
+        self.season_length = season_length or settings.ets_season_length
+        self.interval_width = interval_width or settings.prophet_interval_width
+
+    def forecast_batch(self, series: Dict[str, pd.DataFrame], horizon: int) -> Dict[str, Dict]:
+        """
+        Prévoit toutes les séries en un seul calcul vectorisé
+
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            horizon: Nombre de jours à prévoir
+
+        Returns:
+            Dict {product_id: prévision} au même format que ExponentialSmoothingForecaster
+        """
+        if not series:
+            return {}
+
+        product_ids, matrix, last_days = align_daily_series(series)
+        season = self.season_length
+        if matrix.shape[1] < season:
+            matrix = np.hstack([np.full((len(product_ids), season - matrix.shape[1]), np.nan), matrix])
+
+        # Dernière saison observée (jours antérieurs au début de la série: moyenne de la série)
+        last_season = matrix[:, -season:]
+        last_season = np.where(np.isnan(last_season), np.nanmean(matrix, axis=1)[:, None], last_season)
+
+        # Erreurs de la prévision naïve sur l'historique
+        actual, previous = matrix[:, season:], matrix[:, :-season]
+        errors = actual - previous
+        valid = ~np.isnan(errors)
+        nonzero = valid & (actual != 0)
+        n_errors = np.maximum(valid.sum(axis=1), 1)
+        n_nonzero = nonzero.sum(axis=1)
+        abs_errors = np.where(valid, np.abs(errors), 0.0)
+        sigma = np.sqrt((abs_errors ** 2).sum(axis=1) / n_errors)
+        sape = np.where(nonzero, abs_errors / np.where(nonzero, actual, 1.0), 0.0).sum(axis=1)
+
+        steps = np.arange(horizon)
+        mean = last_season[:, steps % season]
+        spread = (
+            stats.norm.ppf(0.5 + self.interval_width / 2)
+            * sigma[:, None] * np.sqrt(steps // season + 1)[None, :]
+        )
+        p10 = np.round(np.maximum(0, mean - spread), 2)
+        p50 = np.round(np.maximum(0, mean), 2)
+        p90 = np.round(np.maximum(0, mean + spread), 2)
+
+        predictions = {}
+        for i, product_id in enumerate(product_ids):
+            first_day = np.datetime64(int(last_days[i]) + 1, 'D')
+            predictions[product_id] = {
+                'ds': np.arange(first_day, first_day + horizon).astype('datetime64[ns]'),
+                'p10': p10[i],
+                'p50': p50[i],
+                'p90': p90[i],
+                'quality_metrics': {
+                    'mape': round(float(sape[i] / n_nonzero[i] * 100), 2) if n_nonzero[i] else 'N/A',
+                    'mae': round(float(abs_errors[i].sum() / n_errors[i]), 2),
+                    'rmse': round(float(sigma[i]), 2)
+                },
+                'model_used': 'SeasonalNaive',
+                'parameters': {'season_length': season}
+            }
+
+        return predictions
+
+
+class ExponentialSmoothingForecaster:
+    """
+    Lissage exponentiel vectorisé (simple, Holt, Holt-Winters hebdomadaire)
+    
+    Toutes les séries d'une matrice produits × jours et toutes les combinaisons de
+    paramètres d'une méthode sont filtrées en une seule passe sur le temps. Chaque
+    série retient la méthode et les paramètres de plus faible AIC.
+    """
+    
+    METHODS = ('simple', 'holt', 'holt_winters')
+    
+    def __init__(self, season_length: Optional[int] = None, interval_width: Optional[float] = None):
+        self.season_length = season_length or settings.ets_season_length
+        self.interval_width = interval_width or settings.prophet_interval_width
+    
+    def _parameter_grid(self, method: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """Grille (alpha, beta, gamma) d'une méthode et nombre de paramètres estimés"""
+        betas = ETS_BETAS if method in ('holt', 'holt_winters') else (0.0,)
+        gammas = ETS_GAMMAS if method == 'holt_winters' else (0.0,)
+        grid = np.array([
+            (alpha, beta, gamma) for alpha in ETS_ALPHAS for beta in betas for gamma in gammas
+        ])
+        n_params = {'simple': 2, 'holt': 4, 'holt_winters': 5 + self.season_length}[method]
+        return grid[:, :1], grid[:, 1:2], grid[:, 2:3], n_params
+    
+    def _filter(
+        self,
+        matrix: np.ndarray,
+        alpha: np.ndarray,
+        beta: np.ndarray,
+        gamma: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Filtre additif appliqué à toutes les séries et combinaisons de paramètres
+        
+        Les séries doivent commencer à la première colonne: une série plus courte est
+        précédée de sa première valeur, ce qui laisse ses états inchangés (erreur nulle)
+        jusqu'à son vrai début.
+        
+        Args:
+            matrix: Séries alignées (N, T), sans NaN
+            alpha, beta, gamma: Paramètres de lissage (G, 1)
+            
+        Returns:
+            États finaux et sommes d'erreurs à un pas, de forme (G, N)
+        """
+        n_series, length = matrix.shape
+        shape = (alpha.shape[0], n_series)
+        
+        # Colonnes contiguës et inverses précalculés (0 pour les jours sans vente)
+        columns = np.ascontiguousarray(matrix.T)
+        with np.errstate(divide='ignore'):
+            inverse = np.where(columns != 0, 1.0 / columns, 0.0)
+        
+        level = np.broadcast_to(matrix[:, 0], shape).copy()
+        trend = np.zeros(shape)
+        season = np.zeros((self.season_length,) + shape)
+        sse, sae, sape = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        
+        for t in range(1, length):
+            y = columns[t]
+            # Le créneau saisonnier ne dépend que de t: chaque colonne avance d'un jour
+            seasonal = season[t % self.season_length]
+            
+            # Erreur de prévision à un pas
+            error = y - level - trend - seasonal
+            abs_error = np.abs(error)
+            sse += error * error
+            sae += abs_error
+            sape += abs_error * inverse[t]
+            
+            # Mise à jour des états
+            new_level = level + trend + alpha * error
+            trend += beta * (new_level - level - trend)
+            seasonal += gamma * (y - new_level - seasonal)
+            level = new_level
+        
+        return {'level': level, 'trend': trend, 'season': season, 'sse': sse, 'sae': sae, 'sape': sape}
+    
+    def forecast_batch(self, series: Dict[str, pd.DataFrame], horizon: int) -> Dict[str, Dict]:
+        """
+        Ajuste et prévoit toutes les séries en un seul calcul vectorisé
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            horizon: Nombre de jours à prévoir
+            
+        Returns:
+            Dict {product_id: prévision} avec les tableaux 'ds', 'p10', 'p50', 'p90',
+            les 'quality_metrics' in-sample et le 'model_used'
+        """
+        if not series:
+            return {}
+        
+        product_ids, matrix, last_days = align_daily_series(series)
+        n_series, length = matrix.shape
+        rows = np.arange(n_series)
+        
+        # Remplissage du début des séries courtes par leur première valeur
+        observed = ~np.isnan(matrix)
+        start = np.argmax(observed, axis=1)
+        first_values = matrix[rows, start]
+        matrix = np.where(observed, matrix, first_values[:, None])
+        
+        # Nombre d'erreurs à un pas réellement observées (hors première valeur)
+        after_start = np.arange(length)[None, :] > start[:, None]
+        n_errors = np.maximum(after_start.sum(axis=1), 1)
+        n_nonzero = (after_start & (matrix != 0)).sum(axis=1)
+        
+        best: Optional[Dict[str, np.ndarray]] = None
+        for method in self.METHODS:
+            alpha, beta, gamma, n_params = self._parameter_grid(method)
+            states = self._filter(matrix, alpha, beta, gamma)
+            
+            aic = n_errors * np.log(np.maximum(states['sse'], 1e-9) / n_errors) + 2 * n_params
+            choice = np.argmin(aic, axis=0)
+            
+            candidate = {key: value[choice, rows] for key, value in states.items() if key != 'season'}
+            candidate['season'] = states['season'][:, choice, rows].T
+            candidate.update({
+                'aic': aic[choice, rows],
+                'alpha': alpha[choice, 0], 'beta': beta[choice, 0], 'gamma': gamma[choice, 0],
+                'method': np.full(n_series, method, dtype=object)
+            })
+            
+            if best is None:
+                best = candidate
+            else:
+                better = candidate['aic'] < best['aic']
+                for key in best:
+                    mask = better[:, None] if best[key].ndim == 2 else better
+                    best[key] = np.where(mask, candidate[key], best[key])
+        
+        # Prévision et intervalles (variance à h pas du modèle de Holt)
+        steps = np.arange(1, horizon + 1)
+        slots = (length - 1 + steps) % self.season_length
+        mean = (
+            best['level'][:, None]
+            + steps[None, :] * best['trend'][:, None]
+            + best['season'][:, slots]
+        )
+        
+        alpha, beta = best['alpha'][:, None], best['beta'][:, None]
+        h = steps[None, :] - 1
+        variance_factor = (
+            1 + h * alpha ** 2 + alpha * beta * h * (h + 1) + beta ** 2 * h * (h + 1) * (2 * h + 1) / 6
+        )
+        sigma = np.sqrt(best['sse'] / n_errors)[:, None]
+        spread = stats.norm.ppf(0.5 + self.interval_width / 2) * sigma * np.sqrt(variance_factor)
+        
+        p10 = np.round(np.maximum(0, mean - spread), 2)
+        p50 = np.round(np.maximum(0, mean), 2)
+        p90 = np.round(np.maximum(0, mean + spread), 2)
+        
+        mape = np.where(n_nonzero > 0, best['sape'] / np.maximum(n_nonzero, 1) * 100, np.nan)
+        mae = best['sae'] / n_errors
+        rmse = np.sqrt(best['sse'] / n_errors)
+        
+        predictions = {}
+        for i, product_id in enumerate(product_ids):
+            first_day = np.datetime64(int(last_days[i]) + 1, 'D')
+            predictions[product_id] = {
+                'ds': np.arange(first_day, first_day + horizon).astype('datetime64[ns]'),
+                'p10': p10[i],
+                'p50': p50[i],
+                'p90': p90[i],
+                'quality_metrics': {
+                    'mape': round(float(mape[i]), 2) if not np.isnan(mape[i]) else 'N/A',
+                    'mae': round(float(mae[i]), 2),
+                    'rmse': round(float(rmse[i]), 2)
+                },
+                'model_used': f"ExponentialSmoothing ({best['method'][i]})",
+                'parameters': {
+                    'alpha': float(best['alpha'][i]),
+                    'beta': float(best['beta'][i]),
+                    'gamma': float(best['gamma'][i])
+                }
+            }
+        
+        return predictions
+
+
+class IntermittentDemandForecaster:
+    """
+    Croston (correction SBA) et TSB vectorisés pour la demande intermittente
+    
+    Aucune optimisation Stan: toutes les séries et toutes les combinaisons de la
+    grille sont filtrées en une seule passe sur le temps, et chaque série retient
+    les paramètres de plus faible erreur quadratique à un pas. La prévision est un
+    taux journalier constant sur l'horizon.
+    """
+    
+    METHODS = ('croston', 'tsb')
+    
+    def __init__(self, method: Optional[str] = None, interval_width: Optional[float] = None):
+        self.method = method or settings.intermittent_method
+        if self.method not in self.METHODS:
+            raise ForecastError(
+                f"Méthode de demande intermittente inconnue: {self.method} "
+                f"(disponibles: {', '.join(self.METHODS)})"
+            )
+        self.interval_width = interval_width or settings.prophet_interval_width
+    
+    def _filter(
+        self,
+        matrix: np.ndarray,
+        alpha: np.ndarray,
+        beta: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Filtre Croston/TSB appliqué à toutes les séries et combinaisons de paramètres
+        
+        Args:
+            matrix: Séries alignées (N, T), NaN avant le début de chaque série
+            alpha: Lissage des tailles de demande (G, 1)
+            beta: Lissage de la probabilité (TSB) ou de l'intervalle (Croston) (G, 1)
+            
+        Returns:
+            Prévision finale et sommes d'erreurs à un pas, de forme (G, N)
+        """
+        n_series, length = matrix.shape
+        shape = (alpha.shape[0], n_series)
+        
+        observed = ~np.isnan(matrix)
+        values = np.where(observed, matrix, 0.0)
+        demand = values > 0
+        
+        # Initialisation: taille moyenne des ventes et fréquence observée
+        n_observed = np.maximum(observed.sum(axis=1), 1)
+        n_demands = np.maximum(demand.sum(axis=1), 1)
+        size = np.broadcast_to(values.sum(axis=1) / n_demands, shape).copy()
+        probability = np.broadcast_to(demand.sum(axis=1) / n_observed, shape).copy()
+        interval = 1.0 / np.maximum(probability, 1e-9)
+        since_demand = np.zeros(n_series)
+        sse, sae, sape = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        
+        for t in range(length):
+            y, is_observed, is_demand = values[:, t], observed[:, t], demand[:, t]
+            
+            if self.method == 'tsb':
+                forecast = probability * size
+            else:
+                forecast = (1 - alpha / 2) * size / interval
+            
+            # Erreur de prévision à un pas (jours observés uniquement)
+            error = np.where(is_observed, y - forecast, 0.0)
+            abs_error = np.abs(error)
+            sse += error * error
+            sae += abs_error
+            if is_demand.any():
+                sape += np.where(is_demand, abs_error / np.where(is_demand, y, 1.0), 0.0)
+            
+            # Mise à jour des états
+            size = np.where(is_demand, size + alpha * (y - size), size)
+            if self.method == 'tsb':
+                probability = np.where(is_observed, probability + beta * (is_demand - probability), probability)
+            else:
+                since_demand += is_observed
+                interval = np.where(is_demand, interval + beta * (since_demand - interval), interval)
+                since_demand = np.where(is_demand, 0.0, since_demand)
+        
+        if self.method == 'tsb':
+            forecast = probability * size
+        else:
+            forecast = (1 - alpha / 2) * size / interval
+        
+        return {'forecast': forecast, 'sse': sse, 'sae': sae, 'sape': sape}
+    
+    def forecast_batch(self, series: Dict[str, pd.DataFrame], horizon: int) -> Dict[str, Dict]:
+        """
+        Ajuste et prévoit toutes les séries en un seul calcul vectorisé
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            horizon: Nombre de jours à prévoir
+            
+        Returns:
+            Dict {product_id: prévision} au même format que ExponentialSmoothingForecaster
+        """
+        if not series:
+            return {}
+        
+        product_ids, matrix, last_days = align_daily_series(series)
+        rows = np.arange(len(product_ids))
+        
+        grid = np.array([(alpha, beta) for alpha in INTERMITTENT_ALPHAS for beta in INTERMITTENT_BETAS])
+        alpha, beta = grid[:, :1], grid[:, 1:2]
+        states = self._filter(matrix, alpha, beta)
+        choice = np.argmin(states['sse'], axis=0)
+        best = {key: value[choice, rows] for key, value in states.items()}
+        
+        # Taux journalier constant; intervalle tiré de l'erreur à un pas
+        n_errors = np.maximum((~np.isnan(matrix)).sum(axis=1), 1)
+        n_nonzero = np.maximum((matrix > 0).sum(axis=1), 1)
+        sigma = np.sqrt(best['sse'] / n_errors)
+        spread = stats.norm.ppf(0.5 + self.interval_width / 2) * sigma
+        
+        rate = np.maximum(0, best['forecast'])
+        p10 = np.round(np.maximum(0, rate - spread), 2)
+        p50 = np.round(rate, 2)
+        p90 = np.round(rate + spread, 2)
+        
+        model_used = 'TSB' if self.method == 'tsb' else 'Croston (SBA)'
+        predictions = {}
+        for i, product_id in enumerate(product_ids):
+            first_day = np.datetime64(int(last_days[i]) + 1, 'D')
+            predictions[product_id] = {
+                'ds': np.arange(first_day, first_day + horizon).astype('datetime64[ns]'),
+                'p10': np.full(horizon, p10[i]),
+                'p50': np.full(horizon, p50[i]),
+                'p90': np.full(horizon, p90[i]),
+                'quality_metrics': {
+                    'mape': round(float(best['sape'][i] / n_nonzero[i] * 100), 2),
+                    'mae': round(float(best['sae'][i] / n_errors[i]), 2),
+                    'rmse': round(float(sigma[i]), 2)
+                },
+                'model_used': model_used,
+                'parameters': {
+                    'alpha': float(alpha[choice[i], 0]),
+                    'beta': float(beta[choice[i], 0])
+                }
+            }
+        
+        return predictions
+
+
+class GlobalPanelForecaster:
+    """
+    Modèle global entraîné une seule fois sur le panel de tous les produits
+    
+    Un HistGradientBoostingRegressor par quantile (perte pinball) apprend la vente
+    à h jours à partir d'origines passées de toutes les séries: retards et moyennes
+    glissantes à l'origine, calendrier de la date cible et caractéristiques du
+    produit. Les séries sont normalisées par leur niveau récent, si bien que les
+    produits peu vendus profitent des motifs appris sur les autres. La prévision
+    de tout le catalogue tient en un appel predict par quantile.
+    """
+    
+    FEATURES = (
+        'horizon', 'day_of_week', 'day_of_month', 'month',
+        'last', 'mean_7', 'mean_28', 'same_weekday_28',
+        'zero_ratio_28', 'history_days', 'log_level'
+    )
+    
+    def __init__(self, interval_width: Optional[float] = None):
+        self.interval_width = interval_width or settings.prophet_interval_width
+        self.models: Dict[float, HistGradientBoostingRegressor] = {}
+        self.quality_metrics: Dict[str, Dict] = {}  # Métriques in-sample par produit du panel
+        self.version: Optional[str] = None  # Empreinte du panel d'entraînement
+    
+    @property
+    def quantiles(self) -> Tuple[float, float, float]:
+        lower = (1 - self.interval_width) / 2
+        return lower, 0.5, 1 - lower
+    
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self.models)
+    
+    @staticmethod
+    def panel_version(series: Dict[str, pd.DataFrame]) -> str:
+        """Empreinte d'un panel: change dès qu'un produit est ajouté, retiré ou modifié"""
+        return panel_fingerprint({
+            product_id: series_fingerprint(data) for product_id, data in series.items()
+        })
+    
+    @staticmethod
+    def _origin_features(matrix: np.ndarray, origins: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Caractéristiques de chaque série à chaque origine (colonne de la matrice)
+        
+        Les sommes cumulées rendent chaque fenêtre glissante O(1) par origine.
+        
+        Returns:
+            Dict de tableaux (N, K); 'same_weekday' est (N, K, 7), indexé par le
+            nombre de jours entre l'origine et le dernier jour de même jour de semaine
+        """
+        observed = ~np.isnan(matrix)
+        values = np.where(observed, matrix, 0.0)
+        pad = np.zeros((len(matrix), 1))
+        sums = np.hstack([pad, np.cumsum(values, axis=1)])
+        counts = np.hstack([pad, np.cumsum(observed, axis=1)])
+        zeros = np.hstack([pad, np.cumsum(observed & (values == 0), axis=1)])
+        
+        def window(cumulative: np.ndarray, width: int) -> np.ndarray:
+            start = np.maximum(origins + 1 - width, 0)
+            return cumulative[:, origins + 1] - cumulative[:, start]
+        
+        history_days = counts[:, origins + 1]
+        n_7 = np.maximum(window(counts, 7), 1)
+        n_28 = np.maximum(window(counts, 28), 1)
+        mean_28 = window(sums, 28) / n_28
+        level = sums[:, origins + 1] / np.maximum(history_days, 1)
+        
+        # Moyenne des 4 dernières semaines pour chaque jour de la semaine
+        same_weekday = np.zeros((len(matrix), len(origins), 7))
+        for lag in range(7):
+            positions = origins[:, None] - lag - 7 * np.arange(4)[None, :]
+            weights = observed[:, np.maximum(positions, 0)] & (positions >= 0)
+            total = np.where(weights, values[:, np.maximum(positions, 0)], 0.0).sum(axis=2)
+            same_weekday[:, :, lag] = total / np.maximum(weights.sum(axis=2), 1)
+        
+        return {
+            'observed': observed[:, origins],
+            'last': values[:, origins],
+            'mean_7': window(sums, 7) / n_7,
+            'mean_28': mean_28,
+            'same_weekday': same_weekday,
+            'zero_ratio_28': window(zeros, 28) / n_28,
+            'history_days': history_days,
+            'level': level,
+            # Niveau de normalisation: récent, sinon historique, sinon 1
+            'scale': np.where(mean_28 > 0, mean_28, np.where(level > 0, level, 1.0))
+        }
+    
+    def _design(
+        self,
+        features: Dict[str, np.ndarray],
+        horizons: np.ndarray,
+        target_days: np.ndarray
+    ) -> np.ndarray:
+        """
+        Matrice de caractéristiques (N × K × H lignes) pour chaque couple origine / horizon
+        
+        Args:
+            features: Caractéristiques aux origines (_origin_features)
+            horizons: Pas de prévision (H,)
+            target_days: Dates cibles en jours epoch (N, K, H)
+        """
+        shape = target_days.shape
+        scale = features['scale'][:, :, None]
+        dates = target_days.astype('datetime64[D]')
+        months = dates.astype('datetime64[M]')
+        
+        columns = [
+            horizons,
+            (target_days + 3) % 7,  # 1970-01-01 est un jeudi: lundi = 0
+            (dates - months).astype(np.int64) + 1,
+            months.astype(np.int64) % 12 + 1,
+            features['last'][:, :, None] / scale,
+            features['mean_7'][:, :, None] / scale,
+            features['mean_28'][:, :, None] / scale,
+            features['same_weekday'][:, :, (-horizons) % 7] / scale,
+            features['zero_ratio_28'][:, :, None],
+            features['history_days'][:, :, None],
+            np.log1p(features['level'])[:, :, None]
+        ]
+        design = np.stack([np.broadcast_to(column, shape) for column in columns], axis=-1)
+        return design.reshape(-1, len(self.FEATURES)).astype(np.float32)
+    
+    def fit(self, series: Dict[str, pd.DataFrame]) -> "GlobalPanelForecaster":
+        """
+        Entraîne les modèles quantiles sur le panel de toutes les séries
+        
+        Chaque série fournit des origines hebdomadaires (les plus récentes d'abord)
+        et les ventes des global_model_train_horizon jours suivants comme cibles.
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            
+        Returns:
+            Le forecaster entraîné
+        """
+        product_ids, matrix, last_days = align_daily_series(series)
+        n_products, length = matrix.shape
+        
+        horizon = min(settings.global_model_train_horizon, length - 1)
+        if horizon < 1:
+            raise InsufficientDataError("Historique trop court pour entraîner le modèle global")
+        horizons = np.arange(1, horizon + 1)
+        origins = np.arange(length - 1 - horizon, -1, -7)[:settings.global_model_max_origins]
+        
+        features = self._origin_features(matrix, origins)
+        target_columns = origins[:, None] + horizons[None, :]
+        targets = matrix[:, target_columns]
+        target_days = last_days[:, None, None] - (length - 1) + target_columns[None, :, :]
+        mask = features['observed'][:, :, None] & ~np.isnan(targets)
+        
+        design = self._design(features, horizons, target_days)[mask.ravel()]
+        scale = np.broadcast_to(features['scale'][:, :, None], mask.shape)[mask]
+        actual = targets[mask]
+        rows = np.broadcast_to(np.arange(n_products)[:, None, None], mask.shape)[mask]
+        
+        if len(actual) > settings.global_model_max_rows:
+            sample = np.sort(np.random.default_rng(0).choice(
+                len(actual), settings.global_model_max_rows, replace=False
+            ))
+            design, scale, actual, rows = design[sample], scale[sample], actual[sample], rows[sample]
+        
+        logger.info(
+            f"🌐 Entraînement du modèle global | produits={n_products} lignes={len(actual)}"
+        )
+        self.models = {}
+        for quantile in self.quantiles:
+            model = HistGradientBoostingRegressor(
+                loss='quantile',
+                quantile=quantile,
+                max_iter=settings.global_model_max_iter,
+                random_state=0
+            )
+            self.models[quantile] = model.fit(design, actual / scale)
+        
+        # Erreurs in-sample de la médiane, agrégées par produit
+        errors = self.models[0.5].predict(design) * scale - actual
+        n_rows = np.bincount(rows, minlength=n_products)
+        nonzero = actual != 0
+        n_nonzero = np.bincount(rows[nonzero], minlength=n_products)
+        sae = np.bincount(rows, weights=np.abs(errors), minlength=n_products)
+        sse = np.bincount(rows, weights=errors ** 2, minlength=n_products)
+        sape = np.bincount(
+            rows[nonzero], weights=np.abs(errors[nonzero] / actual[nonzero]), minlength=n_products
+        )
+        self.quality_metrics = {
+            product_id: {
+                'mape': round(float(sape[i] / n_nonzero[i] * 100), 2) if n_nonzero[i] else None,
+                'mae': round(float(sae[i] / n_rows[i]), 2),
+                'rmse': round(float(np.sqrt(sse[i] / n_rows[i])), 2)
+            }
+            for i, product_id in enumerate(product_ids) if n_rows[i]
+        }
+        self.version = self.panel_version(series)
+        return self
+    
+    def forecast_batch(self, series: Dict[str, pd.DataFrame], horizon: int) -> Dict[str, Dict]:
+        """
+        Prévoit toutes les séries avec le modèle global, en un appel predict par quantile
+        
+        Les séries absentes du panel d'entraînement sont prévues de la même façon,
+        sans métriques de qualité. Au-delà de global_model_train_horizon, le pas
+        de prévision est vu comme le dernier pas appris.
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            horizon: Nombre de jours à prévoir
+            
+        Returns:
+            Dict {product_id: prévision} au même format que ExponentialSmoothingForecaster
+        """
+        if not self.is_fitted:
+            raise ForecastError("Modèle global non entraîné: chargez d'abord des données de ventes")
+        if not series:
+            return {}
+        
+        product_ids, matrix, last_days = align_daily_series(series)
+        origins = np.array([matrix.shape[1] - 1])
+        horizons = np.arange(1, horizon + 1)
+        
+        features = self._origin_features(matrix, origins)
+        target_days = last_days[:, None, None] + horizons[None, None, :]
+        design = self._design(features, horizons, target_days)
+        scale = features['scale']
+        
+        quantiles = np.stack([
+            self.models[quantile].predict(design).reshape(len(product_ids), horizon) * scale
+            for quantile in self.quantiles
+        ])
+        # Quantiles positifs et non croisés
+        p10, p50, p90 = np.round(np.sort(np.maximum(0, quantiles), axis=0), 2)
+        
+        empty_metrics = {'mape': None, 'mae': None, 'rmse': None}
+        predictions = {}
+        for i, product_id in enumerate(product_ids):
+            first_day = np.datetime64(int(last_days[i]) + 1, 'D')
+            predictions[product_id] = {
+                'ds': np.arange(first_day, first_day + horizon).astype('datetime64[ns]'),
+                'p10': p10[i],
+                'p50': p50[i],
+                'p90': p90[i],
+                'quality_metrics': self.quality_metrics.get(product_id, empty_metrics),
+                'model_used': 'GlobalPanel (HistGradientBoosting)',
+                'parameters': {'version': self.version}
+            }
+        
+        return predictions
+
+
 class ForecastEngine:
     """Moteur de prévision thread-safe utilisant Prophet pour les prévisions probabilistes"""
     
@@ -43,9 +800,37 @@ class ForecastEngine:
         self.models_dir.mkdir(exist_ok=True)
         
         # Cache thread-safe
-        self.trained_models: Dict[str, Prophet] = {}
+        self.trained_models = ModelLRUCache(
+            max_models=settings.model_cache_max_models,
+            max_bytes=settings.model_cache_max_bytes,
+            on_evict=self._spill_model
+        )
+        self._model_info: Dict[str, Dict] = {}  # Empreinte des données et métriques de chaque modèle
+        self._tuned_configs: Dict[str, Tuple[int, Dict]] = {}  # Priors ajustés par produit: (mtime du fichier, config)
         self._cache_locks: Dict[str, Lock] = {}  # Lock par produit
         self._global_lock = Lock()  # Lock pour gérer les locks eux-mêmes
+        
+        # Cache des prévisions (sérialisées et tableaux de quantiles)
+        self._forecast_keys: Dict[str, Set[str]] = {}  # Clés de cache par produit
+        self._forecast_cache_hits = 0
+        self._forecast_cache_misses = 0
+        self._forecast_stats_lock = Lock()  # Compteurs incrémentés depuis les threads de calcul
+        
+        # Modèles vectorisés pour les familles autres que Prophet
+        self.vectorized_forecasters = {
+            'naive': SeasonalNaiveForecaster(),
+            'ets': ExponentialSmoothingForecaster(),
+            'intermittent': IntermittentDemandForecaster(),
+            'global': GlobalPanelForecaster()
+        }
+        self._global_model_lock = Lock()
+        
+        # Clusters de saisonnalité hebdomadaire: un modèle Prophet par cluster
+        self.clusters = SeasonalClusters()
+        self._clusters_version: Optional[str] = None  # Empreinte du panel de l'affectation courante
+        self._cluster_series: Dict[int, pd.DataFrame] = {}  # Série normalisée de chaque cluster
+        self._cluster_models: Dict[int, Dict] = {}  # Modèle, empreinte et yhat de chaque cluster
+        self._clusters_lock = Lock()
     
     def _get_lock(self, product_id: str) -> Lock:
         """Obtient ou crée un lock pour un produit"""
@@ -58,7 +843,8 @@ class ForecastEngine:
         self,
         product_id: str,
         historical_data: pd.DataFrame,
-        horizon_days: int = 30
+        horizon_days: int = 30,
+        demand_profile: Optional[Dict] = None
     ) -> Tuple[List[ForecastPoint], Dict]:
         """
         Génère une prévision probabiliste pour un produit
@@ -67,10 +853,38 @@ class ForecastEngine:
             product_id: Identifiant du produit
             historical_data: DataFrame avec colonnes 'ds' (date) et 'y' (quantité)
             horizon_days: Nombre de jours à prévoir
+            demand_profile: Profil de demande calculé à l'ingestion (recalculé si absent)
             
         Returns:
             Tuple (liste de ForecastPoint, metadata dict)
         """
+        forecast_frame, metadata = self.generate_forecast_frame(
+            product_id, historical_data, horizon_days, demand_profile
+        )
+        return forecast_frame_to_points(forecast_frame), metadata
+    
+    def generate_forecast_frame(
+        self,
+        product_id: str,
+        historical_data: pd.DataFrame,
+        horizon_days: int = 30,
+        demand_profile: Optional[Dict] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Génère une prévision probabiliste au format colonnes
+        
+        Les quantiles sont découpés directement dans les tableaux de la prévision,
+        sans objet par jour: c'est le format attendu par StockOptimizer.
+        
+        Args:
+            product_id: Identifiant du produit
+            historical_data: DataFrame avec colonnes 'ds' (date) et 'y' (quantité)
+            horizon_days: Nombre de jours à prévoir
+            demand_profile: Profil de demande calculé à l'ingestion (recalculé si absent)
+            
+        Returns:
+            Tuple (DataFrame date/p10/p50/p90, metadata dict)
+        """
         try:
             logger.info(f"Generation prevision | product={product_id} horizon={horizon_days}j")
             
@@ -96,47 +910,44 @@ class ForecastEngine:
                     f"Impossible de générer une prévision significative."
                 )
             
-            # Entraînement ou chargement du modèle
-            model = self._get_or_train_model(product_id, historical_data)
-            
-            # Création du dataframe de dates futures
-            future = model.make_future_dataframe(periods=horizon_days, freq='D')
-            
-            # Génération des prévisions
-            forecast = model.predict(future)
-            
-            # Extraction des prévisions futures uniquement
-            future_forecast = forecast.tail(horizon_days)
-            
-            # Construction des ForecastPoints avec quantiles
-            forecast_points = []
-            for _, row in future_forecast.iterrows():
-                # Prophet fournit yhat_lower et yhat_upper pour l'intervalle de confiance
-                # On calcule les quantiles approximatifs
-                yhat = max(0, row['yhat'])  # Pas de prévisions négatives
-                yhat_lower = max(0, row['yhat_lower'])
-                yhat_upper = max(0, row['yhat_upper'])
-                
-                # Approximation des quantiles
-                # P10 ≈ valeur basse de l'intervalle
-                # P50 = médiane (yhat)
-                # P90 ≈ valeur haute de l'intervalle
-                point = ForecastPoint(
-                    date=row['ds'].date(),  # Convertir en date object
-                    p10=round(yhat_lower, 2),
-                    p50=round(yhat, 2),
-                    p90=round(yhat_upper, 2)
+            # Prévision jusqu'à l'horizon maximal, calculée une fois par version du modèle
+            fingerprint = series_fingerprint(historical_data)
+            if demand_profile is None:
+                demand_profile = self._demand_profile(historical_data)
+            family, routing_reason = self._resolve_model_family(
+                product_id, demand_profile, historical_data
+            )
+            if family in self.vectorized_forecasters:
+                prediction = self._get_vectorized_prediction(
+                    family, product_id, historical_data, fingerprint
                 )
-                forecast_points.append(point)
+            elif family == 'cluster':
+                prediction = self._get_cluster_prediction(product_id, historical_data, fingerprint)
+            else:
+                # Entraînement ou chargement du modèle (versionné par l'empreinte des données)
+                model = self._get_or_train_model(product_id, historical_data, fingerprint)
+                prediction = self._get_prediction(product_id, model, fingerprint)
+            
+            # Découpage à l'horizon demandé
+            forecast_frame = pd.DataFrame({
+                'date': pd.DatetimeIndex(prediction['ds'][:horizon_days]),
+                'p10': prediction['p10'][:horizon_days],
+                'p50': prediction['p50'][:horizon_days],
+                'p90': prediction['p90'][:horizon_days]
+            })
             
             # Métriques de qualité
-            metadata = self._calculate_forecast_metadata(
-                model, historical_data, forecast, product_id
-            )
+            metadata = self._calculate_forecast_metadata(historical_data, prediction, product_id)
+            metadata['demand_profile'] = demand_profile
+            metadata['routing'] = {'model_family': family, 'reason': routing_reason}
+            if routing_reason == 'tournament':
+                metadata['routing']['tournament'] = self.select_models(
+                    {product_id: historical_data}, {product_id: demand_profile}
+                )[product_id]
             
             logger.info(f"Prévision générée avec succès pour {product_id}")
             
-            return forecast_points, metadata
+            return forecast_frame, metadata
             
         except InsufficientDataError as e:
             # Erreur utilisateur: données insuffisantes
@@ -177,183 +988,1253 @@ class ForecastEngine:
                 }
             )
     
-    def _get_or_train_model(self, product_id: str, data: pd.DataFrame) -> Prophet:
+    def get_forecast_response(
+        self,
+        product_id: str,
+        historical_data: pd.DataFrame,
+        horizon_days: int = 30,
+        demand_profile: Optional[Dict] = None,
+        response_format: str = 'points'
+    ) -> Dict:
         """
-        Récupère un modèle entraîné du cache ou en entraîne un nouveau (thread-safe)
+        Retourne la ForecastResponse sérialisée d'un produit, depuis le cache si possible
+        
+        La clé de cache combine le produit, l'empreinte des données, la version de
+        la configuration du modèle, l'horizon et le format: un hit ne touche pas à
+        Prophet, et toute modification des données ou des réglages change la clé.
         
         Args:
             product_id: Identifiant du produit
-            data: Données d'entraînement
+            historical_data: DataFrame avec colonnes 'ds' (date) et 'y' (quantité)
+            horizon_days: Nombre de jours à prévoir
+            demand_profile: Profil de demande calculé à l'ingestion
+            response_format: 'points' (un objet par jour) ou 'columnar' (un tableau par quantile)
             
         Returns:
-            Modèle Prophet entraîné
+            ForecastResponse sérialisée (types JSON)
         """
-        # Vérification rapide sans lock
-        if product_id in self.trained_models:
-            logger.info(f"✅ Modèle en cache pour {product_id}")
-            return self.trained_models[product_id]
+        if response_format not in FORECAST_RESPONSE_FORMATS:
+            raise ValueError(
+                f"Format de réponse inconnu: {response_format} "
+                f"(disponibles: {', '.join(FORECAST_RESPONSE_FORMATS)})"
+            )
         
-        # Vérifier le cache Redis
-        cache_key = f"model:{product_id}"
-        cached_model = cache.get(cache_key)
-        if cached_model:
-            logger.info(f"🔴 Modèle depuis Redis pour {product_id}")
-            self.trained_models[product_id] = cached_model
-            return cached_model
+        fingerprint = series_fingerprint(historical_data)
+        cache_key = (
+            f"forecast:{product_id}:{fingerprint}:{self._model_config_version(product_id)}"
+            f":{horizon_days}:{response_format}"
+        )
         
-        # Obtenir le lock spécifique au produit
-        product_lock = self._get_lock(product_id)
+        if settings.forecast_cache_enabled:
+            cached_response = cache.get(cache_key)
+            with self._forecast_stats_lock:
+                if cached_response is not None:
+                    self._forecast_cache_hits += 1
+                else:
+                    self._forecast_cache_misses += 1
+            if cached_response is not None:
+                logger.info(f"⚡ Prévision depuis le cache pour {product_id} ({horizon_days}j)")
+                return cached_response
         
-        with product_lock:
-            # Double-check après avoir acquis le lock
-            if product_id in self.trained_models:
-                logger.info(f"✅ Modèle en cache (double-check) pour {product_id}")
-                return self.trained_models[product_id]
-            
-            # Vérifier si un modèle sauvegardé existe
-            model_path = self.models_dir / f"{product_id}_model.json"
-            if model_path.exists():
-                try:
-                    with open(model_path, 'r') as f:
-                        model = model_from_json(f.read())
-                    self.trained_models[product_id] = model
-                    logger.info(f"📂 Modèle chargé depuis {model_path}")
-                    return model
-                except Exception as e:
-                    logger.warning(f"⚠️ Impossible de charger {model_path}: {e}")
-            
-            # Entraîner un nouveau modèle
-            logger.info(f"🔄 Entraînement d'un nouveau modèle pour {product_id}")
-            model = self._train_new_model(product_id, data)
-            
-            # Sauvegarder dans le cache local
-            self.trained_models[product_id] = model
-            
-            # Sauvegarder dans le cache Redis (TTL 1 heure)
-            cache.set(cache_key, model, ttl=settings.cache_ttl_seconds)
-            logger.info(f"🔴 Modèle sauvegardé dans Redis pour {product_id}")
-            
-            return model
-    
-    def clear_cache(self, product_id: Optional[str] = None):
-        """Nettoie le cache de manière thread-safe"""
-        if product_id:
-            product_lock = self._get_lock(product_id)
-            with product_lock:
-                if product_id in self.trained_models:
-                    del self.trained_models[product_id]
-                # Nettoyer aussi le cache Redis
-                cache_key = f"model:{product_id}"
-                cache.delete(cache_key)
-                logger.info(f"🗑️ Cache nettoyé pour {product_id}")
+        forecast_frame, metadata = self.generate_forecast_frame(
+            product_id, historical_data, horizon_days, demand_profile=demand_profile
+        )
+        if response_format == 'columnar':
+            # Pas de validation par point: les tableaux sont sérialisés tels quels
+            response = {
+                'product_id': product_id,
+                'format': 'columnar',
+                'forecasts': forecast_frame_to_columns(forecast_frame),
+                'metadata': jsonable_encoder(metadata),
+                'generated_at': datetime.now().isoformat()
+            }
         else:
-            with self._global_lock:
-                self.trained_models.clear()
-                # Nettoyer tout le cache Redis
-                cache.clear()
-                logger.info("🗑️ Cache complet nettoyé")
+            response = ForecastResponse(
+                product_id=product_id,
+                forecasts=forecast_frame_to_points(forecast_frame),
+                metadata=metadata
+            ).model_dump(mode='json')
+        
+        if settings.forecast_cache_enabled:
+            cache.set(cache_key, response, ttl=settings.forecast_cache_ttl_seconds)
+            self._track_cache_key(product_id, cache_key)
+        
+        return response
     
-    def _train_new_model(self, product_id: str, data: pd.DataFrame) -> Prophet:
+    def _model_config_version(self, product_id: str) -> str:
         """
-        Entraîne un nouveau modèle Prophet
+        Empreinte des réglages qui déterminent la prévision d'un produit
         
-        Args:
-            product_id: Identifiant du produit
-            data: Données d'entraînement (colonnes ds, y)
-            
-        Returns:
-            Modèle Prophet entraîné
+        Priors Prophet (ajustés ou non), politique de routage (famille, surcharge,
+        routage intermittent: le vainqueur du tournoi ne dépend ensuite que des
+        données et des priors) et mode d'incertitude.
         """
-        logger.info(f"Entraînement d'un nouveau modèle pour {product_id}")
-        
-        # Configuration du modèle Prophet
-        model = Prophet(
-            interval_width=settings.prophet_interval_width,
-            changepoint_prior_scale=settings.prophet_changepoint_prior_scale,
-            seasonality_prior_scale=settings.prophet_seasonality_prior_scale,
-            daily_seasonality=False,
-            weekly_seasonality=True,
-            yearly_seasonality='auto',
-            seasonality_mode='multiplicative'  # Meilleur pour les ventes
+        config = {
+            'prophet_params': self._prophet_params(product_id),
+            'model': settings.forecast_model_overrides.get(product_id, settings.forecast_model),
+            'intermittent_routing': settings.intermittent_routing_enabled,
+            'uncertainty': self._uncertainty_tag()
+        }
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+    
+    def _get_prediction(
+        self,
+        product_id: str,
+        model: Prophet,
+        fingerprint: str
+    ) -> Dict:
+        """
+        Retourne la prévision jusqu'à max_forecast_horizon pour une version du modèle
+        
+        Prophet n'est appelé qu'une fois par (produit, empreinte): tout horizon plus
+        court est servi en découpant les tableaux de quantiles.
+        
+        Returns:
+            Dict avec les tableaux 'ds', 'p10', 'p50', 'p90' et les 'quality_metrics'
+        """
+        cache_key = f"prediction:prophet:{product_id}:{fingerprint}:{self._uncertainty_tag()}"
+        prediction = cache.get(cache_key)
+        if prediction is not None:
+            return prediction
+        
+        quality_metrics = self._get_quality_metrics(product_id, model, fingerprint)
+        
+        # Dates futures uniquement: le coût de predict ne dépend pas de la longueur de l'historique
+        future = pd.DataFrame({
+            'ds': pd.date_range(
+                model.history['ds'].max() + pd.Timedelta(days=1),
+                periods=settings.max_forecast_horizon,
+                freq='D'
+            )
+        })
+        p10, p50, p90 = self._predict_quantiles(model, future, quality_metrics)
+        
+        # Pas de prévisions négatives
+        prediction = {
+            'ds': future['ds'].values,
+            'p10': np.round(np.maximum(0, p10), 2),
+            'p50': np.round(np.maximum(0, p50), 2),
+            'p90': np.round(np.maximum(0, p90), 2),
+            'quality_metrics': quality_metrics,
+            'model_used': 'Prophet',
+            'training': self._model_info.get(product_id, {}).get('training')
+        }
+        
+        cache.set(cache_key, prediction, ttl=settings.forecast_store_ttl_seconds)
+        self._track_cache_key(product_id, cache_key)
+        
+        return prediction
+    
+    def _demand_profile(self, historical_data: pd.DataFrame) -> Dict:
+        """Profil de demande (ADI, CV², classe) d'une série sans profil précalculé"""
+        return classify_demand(
+            historical_data, settings.demand_adi_threshold, settings.demand_cv2_threshold
+        )
+    
+    @staticmethod
+    def _uncertainty_tag() -> str:
+        """Identifiant du mode d'incertitude, inclus dans la clé de cache des prévisions"""
+        if settings.prophet_uncertainty_mode == 'analytic':
+            return 'analytic'
+        return f"sampling{settings.prophet_uncertainty_samples}"
+    
+    @staticmethod
+    def _predict_quantiles(
+        model: Prophet,
+        future: pd.DataFrame,
+        quality_metrics: Dict
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calcule P10, P50 et P90 sur les dates futures selon le mode d'incertitude
+        
+        - 'sampling': une seule matrice de trajectoires simulées
+          (prophet_uncertainty_samples) dont on lit tous les quantiles
+        - 'analytic': yhat sans simulation, intervalle normal de largeur fixée
+          par le RMSE in-sample calculé à l'entraînement
+        
+        Returns:
+            Tuple (p10, p50, p90) non bornés
+        """
+        mode = settings.prophet_uncertainty_mode
+        if mode not in UNCERTAINTY_MODES:
+            raise ForecastError(
+                f"Mode d'incertitude inconnu: {mode} (disponibles: {', '.join(UNCERTAINTY_MODES)})"
+            )
+        
+        lower = (1 - settings.prophet_interval_width) / 2
+        
+        if mode == 'analytic':
+            model.uncertainty_samples = 0
+            yhat = model.predict(future)['yhat'].values
+            rmse = quality_metrics.get('rmse')
+            sigma = rmse if isinstance(rmse, (int, float)) else 0.0
+            spread = stats.norm.ppf(1 - lower) * sigma
+            return yhat - spread, yhat, yhat + spread
+        
+        model.uncertainty_samples = settings.prophet_uncertainty_samples
+        samples = model.predictive_samples(future)['yhat']
+        p10, p50, p90 = np.quantile(samples, [lower, 0.5, 1 - lower], axis=1)
+        return p10, p50, p90
+    
+    def _model_policy(self, product_id: str, demand_profile: Optional[Dict] = None) -> Tuple[str, str]:
+        """
+        Famille (ou politique 'auto') configurée pour un produit et raison du choix
+        
+        Une surcharge par produit est prioritaire. Avec la politique 'auto' par défaut,
+        le tournoi tranche pour tous les produits (Croston/TSB en est un candidat);
+        sinon la demande intermittente ou erratique par à-coups (lumpy) est routée
+        vers Croston/TSB, et les autres produits suivent le réglage global.
+        
+        Returns:
+            Tuple (famille ou 'auto', raison: 'override' | 'demand_class' | 'default')
+        """
+        if product_id in settings.forecast_model_overrides:
+            return settings.forecast_model_overrides[product_id], 'override'
+        if (
+            settings.forecast_model != AUTO_MODEL_POLICY
+            and settings.intermittent_routing_enabled
+            and demand_profile is not None
+            and demand_profile['demand_class'] in INTERMITTENT_DEMAND_CLASSES
+        ):
+            return 'intermittent', 'demand_class'
+        return settings.forecast_model, 'default'
+    
+    def _resolve_model_family(
+        self,
+        product_id: str,
+        demand_profile: Optional[Dict] = None,
+        historical_data: Optional[pd.DataFrame] = None
+    ) -> Tuple[str, str]:
+        """
+        Famille de modèle d'un produit et raison du choix
+        
+        La politique 'auto' est résolue par le tournoi de modèles du produit (mis en
+        cache par version des données), ce qui nécessite son historique.
+        
+        Returns:
+            Tuple (famille, raison: 'override' | 'demand_class' | 'default' | 'tournament')
+        """
+        family, reason = self._model_policy(product_id, demand_profile)
+        
+        if family == AUTO_MODEL_POLICY:
+            if historical_data is None:
+                raise ForecastError(f"Historique requis pour le tournoi de modèles de {product_id}")
+            family = self.select_models(
+                {product_id: historical_data}, {product_id: demand_profile}
+            )[product_id]['winner']
+            reason = 'tournament'
+        
+        if family not in MODEL_FAMILIES:
+            raise ForecastError(
+                f"Famille de modèle inconnue pour {product_id}: {family} "
+                f"(disponibles: {', '.join(MODEL_FAMILIES + (AUTO_MODEL_POLICY,))})"
+            )
+        return family, reason
+    
+    def model_tournament_in_use(self) -> bool:
+        """Vrai si la politique 'auto' est la politique par défaut ou celle d'au moins un produit"""
+        return (
+            settings.forecast_model == AUTO_MODEL_POLICY
+            or AUTO_MODEL_POLICY in settings.forecast_model_overrides.values()
+        )
+    
+    def select_models(
+        self,
+        series: Dict[str, pd.DataFrame],
+        demand_profiles: Optional[Dict[str, Dict]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Résultat du tournoi de modèles de chaque produit
+        
+        Les vainqueurs sont mis en cache par version des données (empreinte de la
+        série); les produits absents du cache passent ensemble un seul tournoi.
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            demand_profiles: Profils de demande par produit (recalculés si absents)
+            
+        Returns:
+            Dict {product_id: {'winner', 'scores', 'reason', ...}}
+        """
+        from .tournament import run_tournament
+        
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, pd.DataFrame] = {}
+        cache_keys: Dict[str, str] = {}
+        for product_id, data in series.items():
+            data = data.dropna(subset=['y'])
+            cache_key = f"tournament:{product_id}:{series_fingerprint(data)}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                results[product_id] = cached
+                continue
+            pending[product_id] = data
+            cache_keys[product_id] = cache_key
+        
+        if pending:
+            for product_id, result in run_tournament(pending, demand_profiles, self._prophet_params).items():
+                cache.set(cache_keys[product_id], result, ttl=settings.tournament_cache_ttl_seconds)
+                self._track_cache_key(product_id, cache_keys[product_id])
+                results[product_id] = result
+        
+        return results
+    
+    def _get_vectorized_prediction(
+        self,
+        family: str,
+        product_id: str,
+        historical_data: pd.DataFrame,
+        fingerprint: str
+    ) -> Dict:
+        """Prévision d'un modèle vectorisé jusqu'à max_forecast_horizon, mise en cache"""
+        cache_key = self._vectorized_cache_key(family, product_id, fingerprint)
+        prediction = cache.get(cache_key)
+        if prediction is not None:
+            return prediction
+        
+        prediction = self.vectorized_forecasters[family].forecast_batch(
+            {product_id: historical_data}, settings.max_forecast_horizon
+        )[product_id]
+        
+        cache.set(cache_key, prediction, ttl=settings.forecast_store_ttl_seconds)
+        self._track_cache_key(product_id, cache_key)
+        
+        return prediction
+    
+    def prepare_batch(
+        self,
+        series: Dict[str, pd.DataFrame],
+        demand_profiles: Optional[Dict[str, Dict]] = None
+    ):
+        """
+        Prépare en une passe les prévisions d'un lot de produits
+        
+        Les produits en politique 'auto' passent d'abord un tournoi commun. Les
+        produits des familles vectorisées (naïf saisonnier, lissage exponentiel,
+        Croston/TSB, modèle global) sont prévus ensemble dans une seule matrice par
+        famille; les modèles Prophet manquants sont entraînés dans le pool.
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            demand_profiles: Profils de demande par produit (recalculés si absents)
+        """
+        demand_profiles = {
+            product_id: (demand_profiles or {}).get(product_id) or self._demand_profile(data)
+            for product_id, data in series.items()
+        }
+        
+        # Un seul tournoi pour tous les produits en politique 'auto' sans vainqueur en cache
+        auto = {
+            product_id: data for product_id, data in series.items()
+            if self._model_policy(product_id, demand_profiles[product_id])[0] == AUTO_MODEL_POLICY
+        }
+        if auto:
+            self.select_models(auto, demand_profiles)
+        
+        by_family: Dict[str, Dict[str, pd.DataFrame]] = {}
+        for product_id, data in series.items():
+            family, _ = self._resolve_model_family(product_id, demand_profiles[product_id], data)
+            by_family.setdefault(family, {})[product_id] = data
+        
+        for family in self.vectorized_forecasters:
+            if family in by_family:
+                self._precompute_vectorized_predictions(family, by_family[family])
+        if 'prophet' in by_family:
+            self.train_models_parallel(by_family['prophet'])
+    
+    def _precompute_vectorized_predictions(self, family: str, series: Dict[str, pd.DataFrame]):
+        """Calcule en un seul passage vectorisé les prévisions d'une famille absentes du cache"""
+        pending: Dict[str, pd.DataFrame] = {}
+        cache_keys: Dict[str, str] = {}
+        
+        for product_id, data in series.items():
+            data = data.dropna(subset=['y'])
+            cache_key = self._vectorized_cache_key(family, product_id, series_fingerprint(data))
+            if cache.get(cache_key) is not None:
+                continue
+            
+            is_valid, error_msg = DataValidator.validate_product_data(
+                data, product_id, settings.min_data_points
+            )
+            if not is_valid:
+                logger.warning(f"⚠️ Prévision ignorée pour {product_id}: {error_msg}")
+                continue
+            pending[product_id] = data
+            cache_keys[product_id] = cache_key
+        
+        if not pending:
+            return
+        
+        logger.info(f"📈 Modèle vectorisé '{family}' sur {len(pending)} produits")
+        try:
+            predictions = self.vectorized_forecasters[family].forecast_batch(
+                pending, settings.max_forecast_horizon
+            )
+        except ForecastError as e:
+            # Chaque produit remontera l'erreur lors de sa propre prévision
+            logger.warning(f"⚠️ Prévisions '{family}' non préparées: {e}")
+            return
+        for product_id, prediction in predictions.items():
+            cache.set(cache_keys[product_id], prediction, ttl=settings.forecast_store_ttl_seconds)
+            self._track_cache_key(product_id, cache_keys[product_id])
+    
+    def _vectorized_cache_key(self, family: str, product_id: str, fingerprint: str) -> str:
+        """Clé de cache d'une prévision vectorisée, versionnée par le modèle s'il est entraîné"""
+        cache_key = f"prediction:{family}:{product_id}:{fingerprint}"
+        version = getattr(self.vectorized_forecasters[family], 'version', None)
+        return f"{cache_key}:{version}" if version else cache_key
+    
+    def global_model_in_use(self) -> bool:
+        """Vrai si le modèle global est la famille par défaut ou celle d'au moins un produit"""
+        return settings.forecast_model == 'global' or 'global' in settings.forecast_model_overrides.values()
+    
+    def fit_global_model(self, sales_data: pd.DataFrame) -> str:
+        """
+        Entraîne le modèle global sur le panel des ventes de tous les produits
+        
+        Rien n'est recalculé si le panel n'a pas changé; un modèle sauvegardé pour
+        le même panel (redémarrage) est rechargé plutôt que réentraîné.
+        
+        Args:
+            sales_data: Ventes brutes (product_id, date, quantity), typiquement DataManager.sales_data
+            
+        Returns:
+            Version (empreinte du panel) du modèle global
+        """
+        series = self._daily_series(sales_data)
+        forecaster = self.vectorized_forecasters['global']
+        version = forecaster.panel_version(series)
+        
+        with self._global_model_lock:
+            if forecaster.version == version:
+                return version
+            
+            model_path = self.models_dir / 'global_model.joblib'
+            if not self._load_global_model(model_path, version):
+                forecaster.fit(series)
+                self._save_global_model(model_path)
+            
+            # Les prévisions servies par l'ancien modèle global ne sont plus valides
+            with self._global_lock:
+                for product_id, keys in self._forecast_keys.items():
+                    stale = {key for key in keys if key.startswith(('forecast:', 'prediction:global:'))}
+                    for key in stale:
+                        cache.delete(key)
+                    keys -= stale
+        
+        logger.info(f"🌐 Modèle global prêt | version={version} produits={len(series)}")
+        return version
+    
+    @staticmethod
+    def _daily_series(sales_data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Séries journalières (ds, y) de tous les produits des ventes brutes"""
+        daily = (
+            sales_data.groupby(['product_id', 'date'])['quantity']
+            .sum()
+            .reset_index()
+            .rename(columns={'date': 'ds', 'quantity': 'y'})
+        )
+        return {
+            product_id: group[['ds', 'y']].reset_index(drop=True)
+            for product_id, group in daily.groupby('product_id', sort=False)
+        }
+    
+    def cluster_mode_in_use(self) -> bool:
+        """Vrai si les clusters sont la famille par défaut ou celle d'au moins un produit"""
+        return settings.forecast_model == 'cluster' or 'cluster' in settings.forecast_model_overrides.values()
+    
+    def update_clusters(self, sales_data: pd.DataFrame) -> str:
+        """
+        Met à jour l'affectation des produits aux clusters après un chargement
+        
+        L'affectation est mise en cache par version des données: les autres workers
+        et les redémarrages la relisent au lieu de refaire le regroupement. Seuls
+        les clusters dont la composition ou les données ont changé sont réentraînés.
+        
+        Args:
+            sales_data: Ventes brutes (product_id, date, quantity), typiquement DataManager.sales_data
+            
+        Returns:
+            Version (empreinte du panel) de l'affectation
+        """
+        series = self._daily_series(sales_data)
+        fingerprints = {product_id: series_fingerprint(data) for product_id, data in series.items()}
+        version = panel_fingerprint(fingerprints)
+        
+        with self._clusters_lock:
+            if version == self._clusters_version:
+                return version
+            
+            previous_assignments = dict(self.clusters.assignments)
+            previous = {
+                cluster_id: self.clusters.cluster_fingerprint(cluster_id)
+                for cluster_id in set(previous_assignments.values())
+            }
+            cache_key = f"clusters:{version}"
+            state = cache.get(cache_key)
+            if state is not None:
+                self.clusters.load(state)
+                logger.info(f"🧩 Affectation des clusters relue depuis le cache | version={version}")
+            else:
+                self.clusters.update(series, fingerprints)
+                cache.set(cache_key, self.clusters.to_dict(), ttl=settings.cache_ttl_seconds)
+            
+            current = {
+                cluster_id: self.clusters.cluster_fingerprint(cluster_id)
+                for cluster_id in set(self.clusters.assignments.values())
+            }
+            affected = {
+                cluster_id for cluster_id in set(current) | set(previous)
+                if current.get(cluster_id) != previous.get(cluster_id)
+            }
+            for cluster_id in affected | (set(current) - set(self._cluster_series)):
+                if cluster_id in current:
+                    self._cluster_series[cluster_id] = cluster_series(series, self.clusters.members(cluster_id))
+                else:
+                    self._cluster_series.pop(cluster_id, None)
+            self._clusters_version = version
+        
+        # Les prévisions des membres (anciens et nouveaux) des clusters touchés sont périmées
+        for product_id in set(previous_assignments) | set(self.clusters.assignments):
+            if (
+                previous_assignments.get(product_id) in affected
+                or self.clusters.assignments.get(product_id) in affected
+            ):
+                self._clear_cached_forecasts(product_id)
+        
+        logger.info(f"🧩 Clusters prêts | version={version} clusters={len(current)} touchés={len(affected)}")
+        return version
+    
+    def _get_cluster_model(self, cluster_id: int) -> Dict:
+        """
+        Modèle Prophet d'un cluster, entraîné sur sa série normalisée
+        
+        Le modèle est réentraîné (à chaud depuis le précédent) quand la composition
+        ou les données du cluster changent.
+        
+        Returns:
+            Dict avec 'model', 'fingerprint', 'yhat' (Series par date: historique et
+            max_forecast_horizon jours au-delà) et 'training'
+        """
+        fingerprint = self.clusters.cluster_fingerprint(cluster_id)
+        entry = self._cluster_models.get(cluster_id)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            return entry
+        
+        with self._get_lock(f"cluster:{cluster_id}"):
+            entry = self._cluster_models.get(cluster_id)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                return entry
+            
+            data = self._cluster_series.get(cluster_id)
+            if data is None or len(data) < settings.min_data_points:
+                raise InsufficientDataError(f"Cluster {cluster_id}: historique insuffisant")
+            
+            logger.info(
+                f"🧩 Entraînement du modèle du cluster {cluster_id} "
+                f"({len(self.clusters.members(cluster_id))} produits)"
+            )
+            previous = None
+            if entry is not None and settings.warm_start_enabled:
+                previous = {'stan_params': entry['stan_params'], 'quality_metrics': entry['quality_metrics']}
+            model, quality_metrics, training = fit_prophet(
+                data, self._prophet_params(f"cluster:{cluster_id}"), previous
+            )
+            
+            # yhat sur l'historique et l'horizon maximal, en un seul predict sans simulation
+            dates = pd.DatetimeIndex(data['ds']).append(pd.date_range(
+                data['ds'].max() + pd.Timedelta(days=1), periods=settings.max_forecast_horizon, freq='D'
+            ))
+            entry = {
+                'model': model,
+                'fingerprint': fingerprint,
+                'yhat': self._cluster_yhat(model, dates),
+                'quality_metrics': quality_metrics,
+                'training': training,
+                'stan_params': extract_stan_params(model)
+            }
+            self._cluster_models[cluster_id] = entry
+            return entry
+    
+    @staticmethod
+    def _cluster_yhat(model: Prophet, dates: pd.DatetimeIndex) -> pd.Series:
+        """yhat normalisé d'un modèle de cluster sur des dates"""
+        model.uncertainty_samples = 0
+        yhat = model.predict(pd.DataFrame({'ds': dates}))['yhat'].values
+        return pd.Series(yhat, index=dates)
+    
+    def _get_cluster_prediction(
+        self,
+        product_id: str,
+        historical_data: pd.DataFrame,
+        fingerprint: str
+    ) -> Dict:
+        """
+        Prévision d'un produit à partir du modèle de son cluster, mise à son niveau
+        
+        P50 = yhat normalisé du cluster × vente moyenne du produit; l'intervalle est
+        tiré des résidus du produit autour de cette courbe. Un produit absent de
+        l'affectation (pas encore chargé) est rattaché au cluster le plus proche.
+        
+        Returns:
+            Dict au format des autres prévisions, avec l'affectation sous 'cluster'
+        """
+        if self.clusters.centroids is None:
+            raise ForecastError("Clusters non calculés: chargez d'abord des données de ventes")
+        
+        cluster_id = self.clusters.assignments.get(product_id)
+        assignment = 'member'
+        if cluster_id is None:
+            cluster_id, assignment = self.clusters.nearest(weekly_profile(historical_data)), 'nearest'
+        
+        cluster_fp = self.clusters.cluster_fingerprint(cluster_id)
+        cache_key = f"prediction:cluster:{product_id}:{fingerprint}:{cluster_fp}"
+        prediction = cache.get(cache_key)
+        if prediction is not None:
+            return prediction
+        
+        entry = self._get_cluster_model(cluster_id)
+        history_dates = pd.DatetimeIndex(historical_data['ds'])
+        future = pd.date_range(
+            history_dates.max() + pd.Timedelta(days=1), periods=settings.max_forecast_horizon, freq='D'
+        )
+        # Dates hors de la courbe précalculée (produit rattaché au plus proche): predict direct
+        dates = history_dates.append(future)
+        yhat = entry['yhat'].reindex(dates)
+        missing = yhat.isna().to_numpy()
+        if missing.any():
+            yhat[missing] = self._cluster_yhat(entry['model'], dates[missing]).values
+        
+        member = scale_member_forecast(
+            historical_data['y'].values, yhat.values[:len(history_dates)], yhat.values[len(history_dates):]
+        )
+        
+        prediction = {
+            'ds': future.values,
+            'p10': member['p10'],
+            'p50': member['p50'],
+            'p90': member['p90'],
+            'quality_metrics': member['quality_metrics'],
+            'model_used': 'Prophet (cluster)',
+            'training': entry['training'],
+            'cluster': {
+                'cluster_id': cluster_id,
+                'assignment': assignment,
+                'members': len(self.clusters.members(cluster_id)),
+                'level': round(member['level'], 4),
+                'version': self._clusters_version
+            }
+        }
+        
+        cache.set(cache_key, prediction, ttl=settings.forecast_store_ttl_seconds)
+        self._track_cache_key(product_id, cache_key)
+        
+        return prediction
+    
+    def _load_global_model(self, model_path: Path, version: str) -> bool:
+        """Recharge le modèle global sauvegardé s'il correspond au panel"""
+        if not model_path.exists():
+            return False
+        try:
+            state = joblib.load(model_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Modèle global illisible, réentraînement: {e}")
+            return False
+        if state.get('version') != version:
+            return False
+        
+        forecaster = self.vectorized_forecasters['global']
+        forecaster.models = state['models']
+        forecaster.quality_metrics = state['quality_metrics']
+        forecaster.version = version
+        logger.info(f"📂 Modèle global chargé depuis {model_path}")
+        return True
+    
+    def _save_global_model(self, model_path: Path):
+        """Sauvegarde atomique du modèle global"""
+        forecaster = self.vectorized_forecasters['global']
+        tmp_path = model_path.with_name(f".{model_path.name}.{os.getpid()}.tmp")
+        try:
+            joblib.dump({
+                'version': forecaster.version,
+                'models': forecaster.models,
+                'quality_metrics': forecaster.quality_metrics
+            }, tmp_path)
+            os.replace(tmp_path, model_path)
+        except Exception as e:
+            logger.warning(f"Impossible de sauvegarder le modèle global: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _get_quality_metrics(self, product_id: str, model: Prophet, fingerprint: str) -> Dict:
+        """
+        Retourne les métriques in-sample calculées à l'entraînement
+        
+        Les modèles sans métriques (anciens fichiers, modèle venant de Redis sans
+        métadonnées sur disque) sont évalués une seule fois puis complétés.
+        """
+        info = self._model_info.get(product_id, {})
+        if info.get('fingerprint') == fingerprint and 'quality_metrics' in info:
+            return info['quality_metrics']
+        
+        meta = self._read_model_meta(product_id)
+        if meta.get('fingerprint') != fingerprint or 'quality_metrics' not in meta:
+            meta = {
+                'fingerprint': fingerprint,
+                'quality_metrics': compute_in_sample_metrics(model)
+            }
+            self._write_model_meta(product_id, meta)
+        
+        self._model_info[product_id] = meta
+        return meta['quality_metrics']
+    
+    def forecast_cache_stats(self) -> Dict:
+        """Statistiques du cache des prévisions"""
+        with self._forecast_stats_lock:
+            hits, misses = self._forecast_cache_hits, self._forecast_cache_misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else None
+        }
+    
+    def _track_cache_key(self, product_id: str, cache_key: str):
+        """Mémorise une clé de prévision pour pouvoir l'invalider"""
+        with self._global_lock:
+            self._forecast_keys.setdefault(product_id, set()).add(cache_key)
+    
+    def _clear_cached_forecasts(self, product_id: str):
+        """Supprime les prévisions en cache d'un produit"""
+        with self._global_lock:
+            keys = self._forecast_keys.pop(product_id, set())
+        for key in keys:
+            cache.delete(key)
+    
+    def _get_or_train_model(
+        self,
+        product_id: str,
+        data: pd.DataFrame,
+        fingerprint: Optional[str] = None
+    ) -> Prophet:
+        """
+        Récupère un modèle entraîné du cache ou en entraîne un nouveau
+        
+        Un modèle n'est réutilisé que s'il a été entraîné sur une série de même
+        empreinte que les données fournies. L'entraînement est unique par produit:
+        les threads attendent le lock du produit, les autres workers son verrou
+        fichier, puis tous reprennent le modèle produit par le premier.
+        
+        Args:
+            product_id: Identifiant du produit
+            data: Données d'entraînement
+            fingerprint: Empreinte de la série (calculée si absente)
+            
+        Returns:
+            Modèle Prophet entraîné
+        """
+        if fingerprint is None:
+            fingerprint = series_fingerprint(data)
+        
+        # Vérification rapide en mémoire, sans lock
+        model = self._get_cached_model(product_id, fingerprint, include_shared=False)
+        if model is not None:
+            return model
+        
+        # Obtenir le lock spécifique au produit
+        product_lock = self._get_lock(product_id)
+        
+        with product_lock:
+            # Double-check après avoir acquis le lock (Redis, puis disque)
+            model = self._find_existing_model(product_id, fingerprint)
+            if model is not None:
+                return model
+            
+            # Verrou inter-processus: un autre worker entraîne peut-être déjà ce produit
+            training_lock = self._training_lock(product_id)
+            try:
+                training_lock.acquire()
+            except LockTimeout as e:
+                logger.warning(f"⚠️ {e}: entraînement sans verrou pour {product_id}")
+            
+            try:
+                model = self._find_existing_model(product_id, fingerprint)
+                if model is not None:
+                    logger.info(f"🤝 Modèle entraîné par un autre worker pour {product_id}")
+                    return model
+                
+                # Entraîner un nouveau modèle
+                logger.info(f"🔄 Entraînement d'un nouveau modèle pour {product_id}")
+                model, meta = self._train_new_model(product_id, data, fingerprint)
+                self._register_model(product_id, model, meta)
+                
+                return model
+            finally:
+                training_lock.release()
+    
+    def _find_existing_model(self, product_id: str, fingerprint: str) -> Optional[Prophet]:
+        """Cherche un modèle à jour en mémoire, dans Redis puis dans models_dir"""
+        model = self._get_cached_model(product_id, fingerprint)
+        if model is not None:
+            return model
+        
+        saved = self._load_saved_model(product_id, fingerprint)
+        if saved is not None:
+            model, meta = saved
+            self._register_model(product_id, model, meta)
+            return model
+        
+        return None
+    
+    def _training_lock(self, product_id: str) -> FileLock:
+        """Verrou fichier partagé par les workers pour l'entraînement d'un produit"""
+        return FileLock(
+            self.models_dir / '.locks' / f"{product_id}.lock",
+            timeout=settings.training_lock_timeout_seconds
         )
+    
+    def _get_cached_model(
+        self,
+        product_id: str,
+        fingerprint: str,
+        include_shared: bool = True
+    ) -> Optional[Prophet]:
+        """Cherche un modèle à jour en mémoire puis (si include_shared) dans Redis"""
+        # Lecture atomique: le modèle peut être évincé par un autre thread de calcul
+        model = self.trained_models.get(product_id)
+        info = self._model_info.get(product_id, {})
+        params = self._prophet_params(product_id)
+        if (
+            model is not None
+            and info.get('fingerprint') == fingerprint
+            # Priors ajustés entre-temps par un autre worker: le modèle en mémoire est obsolète
+            and info.get('prophet_params', params) == params
+        ):
+            logger.info(f"✅ Modèle en cache pour {product_id}")
+            return model
+        
+        if not include_shared:
+            return None
+        
+        # Le modèle est partagé avec ses métadonnées (métriques de qualité, priors)
+        cached = cache.get(self._model_cache_key(product_id, fingerprint))
+        if isinstance(cached, dict) and cached['meta'].get('prophet_params', params) == params:
+            logger.info(f"🔴 Modèle depuis Redis pour {product_id}")
+            self._register_model(product_id, cached['model'], cached['meta'], share=False)
+            return cached['model']
+        
+        return None
+    
+    def _load_saved_model(
+        self,
+        product_id: str,
+        fingerprint: str
+    ) -> Optional[Tuple[Prophet, Dict]]:
+        """Charge le modèle sauvegardé (et ses métadonnées) s'il a été entraîné sur la même série"""
+        model_path = self.models_dir / f"{product_id}_model.json"
+        if not model_path.exists():
+            return None
         
-        # Entraînement
-        model.fit(data)
+        meta = self._read_model_meta(product_id)
+        if meta.get('fingerprint') != fingerprint:
+            logger.info(f"♻️ Modèle sauvegardé obsolète pour {product_id} (données modifiées)")
+            return None
+        if meta.get('prophet_params', self._prophet_params(product_id)) != self._prophet_params(product_id):
+            logger.info(f"♻️ Modèle sauvegardé obsolète pour {product_id} (priors modifiés)")
+            return None
         
-        # Sauvegarde du modèle
-        self._save_model(product_id, model)
+        try:
+            with open(model_path, 'r') as f:
+                model = model_from_json(f.read())
+            logger.info(f"📂 Modèle chargé depuis {model_path}")
+            return model, meta
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible de charger {model_path}: {e}")
+            return None
+    
+    def _register_model(self, product_id: str, model: Prophet, meta: Dict, share: bool = True):
+        """
+        Enregistre un modèle à jour (et ses métadonnées) dans le cache local et dans Redis
         
-        # Cache
+        share=False pour un modèle qui vient de Redis: il n'y est pas réécrit.
+        """
+        self._model_info[product_id] = meta
         self.trained_models[product_id] = model
         
+        # Le cache en mémoire garderait une référence au modèle malgré l'éviction LRU
+        if not share or isinstance(cache, DictCache):
+            return
+        
+        # Sauvegarder dans le cache Redis (TTL 1 heure)
+        cache.set(
+            self._model_cache_key(product_id, meta['fingerprint']),
+            {'model': model, 'meta': meta},
+            ttl=settings.cache_ttl_seconds
+        )
+        logger.info(f"🔴 Modèle sauvegardé dans Redis pour {product_id}")
+    
+    def _spill_model(self, product_id: str, model: Prophet):
+        """
+        Sauvegarde dans models_dir un modèle évincé du cache mémoire
+        
+        Les modèles entraînés ici sont déjà sur disque; seuls ceux venus de Redis
+        (ou dont le fichier est obsolète) sont réécrits.
+        """
+        info = self._model_info.get(product_id)
+        if not info:
+            return
+        
+        model_path = self.models_dir / f"{product_id}_model.json"
+        if model_path.exists() and self._read_model_meta(product_id).get('fingerprint') == info['fingerprint']:
+            return
+        
+        self._save_model(product_id, model, info)
+        logger.info(f"💾 Modèle évincé sauvegardé pour {product_id}")
+    
+    @staticmethod
+    def _model_cache_key(product_id: str, fingerprint: str) -> str:
+        """Clé Redis d'un modèle, versionnée par l'empreinte des données"""
+        return f"model:{product_id}:{fingerprint}"
+    
+    def invalidate_products(self, product_ids: List[str]):
+        """
+        Invalide les modèles des produits dont les données ont changé
+        
+        Les fichiers de models_dir sont conservés: leur empreinte ne correspond plus
+        aux données et ils seront remplacés au prochain entraînement.
+        
+        Args:
+            product_ids: Produits à invalider
+        """
+        for product_id in product_ids:
+            with self._get_lock(product_id):
+                self.trained_models.pop(product_id, None)
+                info = self._model_info.pop(product_id, None)
+                if info:
+                    cache.delete(self._model_cache_key(product_id, info['fingerprint']))
+            self._clear_cached_forecasts(product_id)
+        
+        if product_ids:
+            logger.info(f"♻️ {len(product_ids)} modèles invalidés après mise à jour des données")
+    
+    def clear_cache(self, product_id: Optional[str] = None):
+        """
+        Nettoie le cache des modèles de manière thread-safe
+        
+        Args:
+            product_id: Si spécifié, nettoie seulement ce produit, sinon tous
+        """
+        if product_id:
+            self.invalidate_products([product_id])
+            logger.info(f"🗑️ Cache nettoyé pour {product_id}")
+        else:
+            with self._global_lock:
+                self.trained_models.clear()
+                self._model_info.clear()
+                self._forecast_keys.clear()
+                # Nettoyer tout le cache Redis
+                cache.clear()
+                logger.info("🗑️ Cache complet nettoyé")
+    
+    def _train_new_model(
+        self,
+        product_id: str,
+        data: pd.DataFrame,
+        fingerprint: Optional[str] = None
+    ) -> Tuple[Prophet, Dict]:
+        """
+        Entraîne un nouveau modèle Prophet
+        
+        Les métriques in-sample sont calculées une fois ici et sauvegardées
+        avec le modèle, au lieu d'être recalculées à chaque prévision. Si un
+        modèle précédent du produit est sauvegardé, l'optimiseur repart de ses
+        paramètres (entraînement à chaud).
+        
+        Args:
+            product_id: Identifiant du produit
+            data: Données d'entraînement (colonnes ds, y)
+            fingerprint: Empreinte de la série d'entraînement
+            
+        Returns:
+            Tuple (modèle Prophet entraîné, métadonnées)
+        """
+        logger.info(f"Entraînement d'un nouveau modèle pour {product_id}")
+        
+        # Entraînement (à chaud depuis le modèle précédent si disponible)
+        prophet_params = self._prophet_params(product_id)
+        model, quality_metrics, training = fit_prophet(
+            data, prophet_params, self._warm_start_source(product_id)
+        )
+        
+        meta = {
+            'fingerprint': fingerprint or series_fingerprint(data),
+            'prophet_params': prophet_params,
+            'quality_metrics': quality_metrics,
+            'training': training,
+            'stan_params': extract_stan_params(model)
+        }
+        
+        # Sauvegarde du modèle et de ses métadonnées
+        self._save_model(product_id, model, meta)
+        
         logger.info(f"Modèle entraîné et sauvegardé pour {product_id}")
         
-        return model
+        return model, meta
+    
+    def tuned_config(self, product_id: str) -> Optional[Dict]:
+        """
+        Configuration de priors ajustée d'un produit ({product_id}_tuning.json), None sinon
+        
+        Le cache est indexé par la date de modification du fichier: un /tune servi
+        par un autre worker est vu dès sa sauvegarde, et un fichier absent n'est
+        jamais mémorisé.
+        """
+        tuning_path = self.models_dir / f"{product_id}_tuning.json"
+        try:
+            mtime = tuning_path.stat().st_mtime_ns
+        except OSError:
+            self._tuned_configs.pop(product_id, None)
+            return None
+        
+        cached = self._tuned_configs.get(product_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(tuning_path, 'r') as f:
+                tuned = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Configuration ajustée illisible pour {product_id}: {e}")
+            return None
+        self._tuned_configs[product_id] = (mtime, tuned)
+        return tuned
+    
+    def save_tuned_config(self, product_id: str, tuning: Dict):
+        """
+        Sauvegarde la configuration gagnante à côté du modèle et invalide le modèle actuel
+        
+        Le prochain entraînement du produit utilise ces priors.
+        """
+        self._atomic_write(self.models_dir / f"{product_id}_tuning.json", json.dumps(tuning))
+        self._tuned_configs.pop(product_id, None)  # Relu (avec sa date de modification) au prochain accès
+        self.invalidate_products([product_id])
+        logger.info(f"🎛️ Priors ajustés pour {product_id}: {tuning['params']}")
+    
+    def _warm_start_source(self, product_id: str) -> Optional[Dict]:
+        """Métadonnées du modèle sauvegardé servant à l'entraînement à chaud (None si désactivé)"""
+        if not settings.warm_start_enabled:
+            return None
+        meta = self._read_model_meta(product_id)
+        if 'stan_params' not in meta:
+            return None
+        return {'stan_params': meta['stan_params'], 'quality_metrics': meta.get('quality_metrics', {})}
+    
+    def _prophet_params(self, product_id: str) -> Dict:
+        """Paramètres du constructeur Prophet pour un produit (priors ajustés s'il y en a)"""
+        tuned = self.tuned_config(product_id)
+        if tuned is None:
+            return self._default_prophet_params()
+        return {**self._default_prophet_params(), **tuned['params']}
+    
+    @staticmethod
+    def _default_prophet_params() -> Dict:
+        """Paramètres Prophet des réglages globaux"""
+        return {
+            'interval_width': settings.prophet_interval_width,
+            'changepoint_prior_scale': settings.prophet_changepoint_prior_scale,
+            'seasonality_prior_scale': settings.prophet_seasonality_prior_scale,
+            'daily_seasonality': False,
+            'weekly_seasonality': True,
+            'yearly_seasonality': 'auto',
+            'seasonality_mode': 'multiplicative'  # Meilleur pour les ventes
+        }
+    
+    def train_models_parallel(self, series: Dict[str, pd.DataFrame]) -> Dict[str, Prophet]:
+        """
+        Entraîne en parallèle les modèles absents du cache dans le pool de processus
+        
+        Les modèles déjà en mémoire ou sur disque sont réutilisés; les autres sont
+        répartis sur les workers du pool puis rapatriés dans trained_models et models_dir.
+        
+        Args:
+            series: Dict {product_id: DataFrame (ds, y)}
+            
+        Returns:
+            Dict {product_id: modèle Prophet} pour les produits disponibles
+        """
+        models: Dict[str, Prophet] = {}
+        to_train: Dict[str, pd.DataFrame] = {}
+        fingerprints: Dict[str, str] = {}
+        
+        for product_id, data in series.items():
+            data = data.dropna(subset=['y'])
+            fingerprint = series_fingerprint(data)
+            fingerprints[product_id] = fingerprint
+            
+            # Modèle à jour en mémoire ou sur disque: pas de réentraînement
+            model = self._get_cached_model(product_id, fingerprint)
+            if model is None:
+                saved = self._load_saved_model(product_id, fingerprint)
+                if saved is not None:
+                    model, meta = saved
+                    self._register_model(product_id, model, meta)
+            if model is not None:
+                models[product_id] = model
+                continue
+            
+            is_valid, error_msg = DataValidator.validate_product_data(
+                data, product_id, settings.min_data_points
+            )
+            if not is_valid:
+                logger.warning(f"⚠️ Entraînement ignoré pour {product_id}: {error_msg}")
+                continue
+            to_train[product_id] = data
+        
+        # Peu de modèles à entraîner: le coût du pool ne vaut pas la peine
+        if len(to_train) < settings.parallel_training_min_products or settings.training_workers <= 1:
+            for product_id, data in to_train.items():
+                try:
+                    models[product_id] = self._get_or_train_model(
+                        product_id, data, fingerprints[product_id]
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Entraînement impossible pour {product_id}: {e}")
+            return models
+        
+        # Les produits en cours d'entraînement dans un autre worker sont repris après le pool
+        training_locks: Dict[str, FileLock] = {}
+        busy: Dict[str, pd.DataFrame] = {}
+        for product_id in list(to_train):
+            training_lock = self._training_lock(product_id)
+            if training_lock.acquire(blocking=False):
+                training_locks[product_id] = training_lock
+            else:
+                busy[product_id] = to_train.pop(product_id)
+        
+        try:
+            self._train_in_pool(to_train, fingerprints, models)
+        finally:
+            for training_lock in training_locks.values():
+                training_lock.release()
+        
+        for product_id, data in busy.items():
+            try:
+                models[product_id] = self._get_or_train_model(product_id, data, fingerprints[product_id])
+            except Exception as e:
+                logger.warning(f"⚠️ Entraînement impossible pour {product_id}: {e}")
+        
+        logger.info(f"✅ Entraînement parallèle terminé: {len(models)} modèles disponibles")
+        
+        return models
+    
+    def _train_in_pool(
+        self,
+        to_train: Dict[str, pd.DataFrame],
+        fingerprints: Dict[str, str],
+        models: Dict[str, Prophet]
+    ):
+        """Répartit les entraînements sur le pool et enregistre les modèles obtenus dans models"""
+        if not to_train:
+            return
+        
+        logger.info(f"🏭 Entraînement parallèle de {len(to_train)} modèles")
+        pool = get_training_pool()
+        futures = [
+            pool.submit(
+                fit_prophet_worker,
+                product_id,
+                data['ds'].values,
+                data['y'].values,
+                self._prophet_params(product_id),
+                self._warm_start_source(product_id),
+                settings.warm_start_max_rmse_increase
+            )
+            for product_id, data in to_train.items()
+        ]
+        
+        for future in as_completed(futures):
+            try:
+                product_id, model_json, quality_metrics, training = future.result()
+            except Exception as e:
+                logger.warning(f"⚠️ Échec d'un entraînement parallèle: {e}")
+                continue
+            
+            model = model_from_json(model_json)
+            meta = {
+                'fingerprint': fingerprints[product_id],
+                'prophet_params': self._prophet_params(product_id),
+                'quality_metrics': quality_metrics,
+                'stan_params': training.pop('stan_params'),
+                'training': training
+            }
+            self._write_model_json(product_id, model_json)
+            self._write_model_meta(product_id, meta)
+            self._register_model(product_id, model, meta)
+            models[product_id] = model
     
-    def _save_model(self, product_id: str, model: Prophet):
-        """Sauvegarde un modèle Prophet"""
+    def _write_model_json(self, product_id: str, model_json: str):
+        """Écrit un modèle déjà sérialisé dans models_dir"""
         try:
             model_path = self.models_dir / f"{product_id}_model.json"
-            with open(model_path, 'w') as f:
-                f.write(model_to_json(model))
+            self._atomic_write(model_path, model_json)
             logger.info(f"Modèle sauvegardé: {model_path}")
         except Exception as e:
             logger.warning(f"Impossible de sauvegarder le modèle: {str(e)}")
     
+    @staticmethod
+    def _atomic_write(path: Path, content: str):
+        """Écrit un fichier via un fichier temporaire: les autres workers ne lisent jamais un fichier partiel"""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    
+    def _save_model(self, product_id: str, model: Prophet, meta: Dict):
+        """Sauvegarde un modèle Prophet et ses métadonnées (empreinte, métriques)"""
+        self._write_model_json(product_id, model_to_json(model))
+        self._write_model_meta(product_id, meta)
+    
+    def _read_model_meta(self, product_id: str) -> Dict:
+        """Lit les métadonnées sauvegardées à côté d'un modèle"""
+        meta_path = self.models_dir / f"{product_id}_meta.json"
+        if not meta_path.exists():
+            return {}
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Métadonnées illisibles pour {product_id}: {e}")
+            return {}
+    
+    def _write_model_meta(self, product_id: str, meta: Dict):
+        """Sauvegarde les métadonnées d'un modèle (empreinte, date d'entraînement)"""
+        meta = {**meta, 'trained_at': datetime.now().isoformat()}
+        try:
+            self._atomic_write(self.models_dir / f"{product_id}_meta.json", json.dumps(meta))
+        except Exception as e:
+            logger.warning(f"Impossible de sauvegarder les métadonnées: {str(e)}")
+    
     def _calculate_forecast_metadata(
         self,
-        model: Prophet,
         historical_data: pd.DataFrame,
-        forecast: pd.DataFrame,
+        prediction: Dict,
         product_id: str
     ) -> Dict:
         """
-        Calcule les métadonnées et métriques de qualité de la prévision
+        Calcule les métadonnées de la prévision
         
         Args:
-            model: Modèle Prophet utilisé
             historical_data: Données historiques
-            forecast: Prévisions générées
+            prediction: Prévision (modèle utilisé et métriques de qualité)
             product_id: Identifiant du produit
             
         Returns:
             Dict contenant les métadonnées
         """
-        # Calcul du MAPE (Mean Absolute Percentage Error) sur l'historique
-        historical_forecast = forecast[forecast['ds'].isin(historical_data['ds'])]
-        
-        if len(historical_forecast) > 0:
-            actual = historical_data.set_index('ds')['y']
-            predicted = historical_forecast.set_index('ds')['yhat']
-            
-            # Alignement des données
-            common_dates = actual.index.intersection(predicted.index)
-            actual_aligned = actual[common_dates]
-            predicted_aligned = predicted[common_dates]
-            
-            # Calcul du MAPE (en évitant la division par zéro)
-            mask = actual_aligned != 0
-            if mask.sum() > 0:
-                mape = np.mean(
-                    np.abs((actual_aligned[mask] - predicted_aligned[mask]) / actual_aligned[mask])
-                ) * 100
-            else:
-                mape = None
-            
-            # Calcul du MAE (Mean Absolute Error)
-            mae = np.mean(np.abs(actual_aligned - predicted_aligned))
-            
-            # Calcul du RMSE (Root Mean Squared Error)
-            rmse = np.sqrt(np.mean((actual_aligned - predicted_aligned) ** 2))
-        else:
-            mape, mae, rmse = None, None, None
-        
         # Statistiques de base
         avg_demand = historical_data['y'].mean()
         std_demand = historical_data['y'].std()
         
         metadata = {
-            'model_used': 'Prophet',
+            'model_used': prediction['model_used'],
             'training_data_points': len(historical_data),
             'training_period': {
                 'start': historical_data['ds'].min().strftime('%Y-%m-%d'),
@@ -363,30 +2244,13 @@ class ForecastEngine:
             'demand_std_dev': round(std_demand, 2),
             'coefficient_of_variation': round(std_demand / avg_demand, 3) if avg_demand > 0 else None,
             'confidence_level': f"{int(settings.prophet_interval_width * 100)}%",
-            'quality_metrics': {
-                'mape': round(mape, 2) if mape is not None else 'N/A',
-                'mae': round(mae, 2) if mae is not None else 'N/A',
-                'rmse': round(rmse, 2) if rmse is not None else 'N/A'
-            },
+            'quality_metrics': prediction['quality_metrics'],
+            'training': prediction.get('training'),
+            'cluster': prediction.get('cluster'),
             'forecast_generated_at': datetime.now().isoformat()
         }
         
         return metadata
-    
-    def clear_cache(self, product_id: Optional[str] = None):
-        """
-        Nettoie le cache des modèles
-        
-        Args:
-            product_id: Si spécifié, nettoie seulement ce produit, sinon tous
-        """
-        if product_id:
-            if product_id in self.trained_models:
-                del self.trained_models[product_id]
-                logger.info(f"Cache nettoyé pour {product_id}")
-        else:
-            self.trained_models.clear()
-            logger.info("Cache complet nettoyé")
 
 
 # Instance globale du moteur de prévision
@@ -0,0 +1,184 @@
+"""
+Réentraînement des produits modifiés après un upload
+L'upload répond immédiatement avec un identifiant de job; les modèles des produits
+dont la série a changé sont entraînés en tâche de fond, les plus demandés d'abord
+"""
+
+import logging
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Event, Lock
+from typing import Dict, List, Optional, Set
+
+from .config import settings
+from .data_manager import data_manager
+from .forecasting import forecast_engine
+from .scheduler import precompute_forecasts
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrainJob:
+    """Réentraînement des produits modifiés par un upload"""
+    job_id: str
+    product_ids: List[str]  # Ordre de traitement: les plus demandés d'abord
+    status: str = 'pending'  # pending | running | completed | cancelled | failed
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    ready: Set[str] = field(default_factory=set)  # Prévision calculée et stockée
+    failed: Set[str] = field(default_factory=set)
+    in_flight: Set[str] = field(default_factory=set)  # Lot en cours: terminé même si le job est annulé
+    superseded_by: Optional[str] = None  # Job d'un upload plus récent qui a repris la suite
+    error: Optional[str] = None
+    cancel_event: Event = field(default_factory=Event, repr=False)
+
+    @property
+    def remaining(self) -> List[str]:
+        """Produits pas encore traités ni en cours, dans l'ordre de traitement"""
+        done = self.ready | self.failed | self.in_flight
+        return [p for p in self.product_ids if p not in done]
+
+    def to_dict(self) -> Dict:
+        """État sérialisable (réponse de GET /jobs/{job_id})"""
+        finished = len(self.ready) + len(self.failed)
+        end = self.finished_at or datetime.now()
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'products_total': len(self.product_ids),
+            'products_ready': len(self.ready),
+            'products_failed': len(self.failed),
+            'progress': round(finished / len(self.product_ids), 3) if self.product_ids else 1.0,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration_seconds': round((end - self.started_at).total_seconds(), 2) if self.started_at else None,
+            'superseded_by': self.superseded_by,
+            'error': self.error
+        }
+
+
+class RetrainJobManager:
+    """
+    File des jobs de réentraînement (un seul thread: les jobs s'exécutent l'un après l'autre)
+
+    Un nouvel upload annule le job en cours, qui s'arrête au lot suivant; le
+    nouveau job reprend ses produits restants en plus des produits modifiés par
+    l'upload. La priorité d'un produit est son nombre de demandes de prévision
+    et de recommandation depuis le démarrage.
+    """
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, RetrainJob]" = OrderedDict()
+        self._current: Optional[RetrainJob] = None
+        self._request_counts: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+
+    def record_request(self, product_id: str):
+        """Compte une demande de prévision pour un produit (priorité de réentraînement)"""
+        with self._lock:
+            self._request_counts[product_id] = self._request_counts.get(product_id, 0) + 1
+
+    def _prioritize(self, product_ids: List[str]) -> List[str]:
+        """Produits triés du plus au moins demandé (ordre d'origine à égalité; appelé sous le lock)"""
+        return sorted(product_ids, key=lambda product_id: -self._request_counts.get(product_id, 0))
+
+    def submit(self, product_ids: List[str]) -> RetrainJob:
+        """
+        Crée le job d'un upload et annule celui qu'il remplace
+
+        Args:
+            product_ids: Produits dont la série a changé
+
+        Returns:
+            Job créé (exécuté en tâche de fond)
+        """
+        with self._lock:
+            previous = self._current
+            carried: List[str] = []
+            if previous is not None and previous.status in ('pending', 'running'):
+                previous.cancel_event.set()
+                carried = previous.remaining
+
+            job_id = uuid.uuid4().hex[:12]
+            if previous is not None and carried:
+                previous.superseded_by = job_id
+            # Produits de l'upload puis reprise du job annulé, sans doublon
+            candidates = list(dict.fromkeys(list(product_ids) + carried))
+            job = RetrainJob(job_id=job_id, product_ids=self._prioritize(candidates))
+            self._jobs[job_id] = job
+            while len(self._jobs) > settings.retrain_jobs_history:
+                self._jobs.popitem(last=False)
+            self._current = job
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stokkel-retrain")
+
+            self._executor.submit(self._run, job)
+
+        logger.info(
+            f"🔁 Job de réentraînement {job_id} | produits={len(job.product_ids)} "
+            f"(dont {len(carried)} repris d'un job annulé)"
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[RetrainJob]:
+        return self._jobs.get(job_id)
+
+    def _run(self, job: RetrainJob):
+        """Exécute un job: modèles de panel puis lots de produits par ordre de priorité"""
+        if job.cancel_event.is_set():
+            job.status, job.finished_at = 'cancelled', datetime.now()
+            return
+
+        job.status, job.started_at = 'running', datetime.now()
+        try:
+            # Modèles partagés (sans effet si le panel n'a pas changé)
+            if forecast_engine.global_model_in_use():
+                forecast_engine.fit_global_model(data_manager.sales_data)
+            if forecast_engine.cluster_mode_in_use():
+                forecast_engine.update_clusters(data_manager.sales_data)
+
+            batch_size = max(1, settings.retrain_batch_size)
+            for start in range(0, len(job.product_ids), batch_size):
+                # Vérifié sous le lock: submit() lit les produits restants au même moment
+                with self._lock:
+                    if job.cancel_event.is_set():
+                        job.status = 'cancelled'
+                        break
+                    job.in_flight = set(job.product_ids[start:start + batch_size])
+                result = precompute_forecasts(job.product_ids[start:start + batch_size])
+                job.ready.update(result['computed'])
+                job.failed.update(result['failed'])
+                job.in_flight = set()
+            else:
+                job.status = 'completed'
+        except Exception as e:
+            job.status, job.error = 'failed', str(e)
+            logger.error(f"❌ Job de réentraînement {job.job_id} en échec: {e}", exc_info=True)
+        finally:
+            job.finished_at = datetime.now()
+
+        logger.info(
+            f"🔁 Job {job.job_id} {job.status} | {len(job.ready)}/{len(job.product_ids)} produits prêts "
+            f"en {(job.finished_at - job.started_at).total_seconds():.1f}s"
+        )
+
+    def shutdown(self):
+        """Annule le job en cours et arrête le thread (fin du lifespan)"""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel_event.set()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Instance globale
+retrain_jobs = RetrainJobManager()
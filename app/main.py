@@ -3,11 +3,11 @@ API FastAPI pour Stokkel MVP
 Exposé tous les endpoints pour la prévision et l'optimisation des stocks
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, Header
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from typing import Optional, Dict, List
-import pandas as pd
+from typing import Optional, Dict, List, Literal, BinaryIO
+from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
 import tempfile
@@ -19,14 +19,25 @@ from .schemas import (
     RecommendationResponse,
     BatchRecommendationRequest,
     BatchRecommendationResponse,
+    BacktestRequest,
+    BacktestResponse,
+    TuningRequest,
+    TuningResponse,
+    RetrainJobResponse,
     UploadResponse,
     HealthResponse,
-    ProductInfo,
+    ProductListResponse,
     ErrorResponse
 )
 from .data_manager import data_manager
 from .forecasting import forecast_engine
 from .optimization import stock_optimizer
+from .backtesting import run_backtest
+from .tuning import tune_products
+from .scheduler import forecast_scheduler
+from .jobs import retrain_jobs
+from .training_pool import warm_up_training_pool, shutdown_training_pool
+from .executors import run_compute, run_io, executor_stats, shutdown_executors
 
 # Configuration du logging
 logging.basicConfig(
@@ -35,13 +46,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt des ressources partagées"""
+    if settings.training_pool_warmup and settings.training_workers > 1:
+        warm_up_training_pool()
+    if forecast_engine.global_model_in_use() and data_manager.has_data():
+        forecast_engine.fit_global_model(data_manager.sales_data)
+    if forecast_engine.cluster_mode_in_use() and data_manager.has_data():
+        forecast_engine.update_clusters(data_manager.sales_data)
+    forecast_scheduler.start()
+    yield
+    await forecast_scheduler.stop()
+    retrain_jobs.shutdown()
+    shutdown_executors()
+    shutdown_training_pool()
+
+
 # Création de l'application FastAPI
 app = FastAPI(
     title=settings.api_title,
     description=settings.api_description,
     version=settings.api_version,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configuration CORS pour permettre les requêtes depuis le frontend
@@ -112,6 +142,7 @@ async def root():
         "endpoints": {
             "health": "/health",
             "upload": "/upload_sales",
+            "jobs": "/jobs/{job_id}",
             "forecast": "/forecast/{product_id}",
             "recommendation": "/recommendation/{product_id}",
             "products": "/products"
@@ -131,7 +162,10 @@ async def health_check():
     details = {
         "data_loaded": has_data,
         "products_count": len(data_manager.products_cache) if has_data else 0,
-        "models_cached": len(forecast_engine.trained_models)
+        "models_cached": len(forecast_engine.trained_models),
+        "model_cache": forecast_engine.trained_models.stats(),
+        "forecast_cache": forecast_engine.forecast_cache_stats(),
+        "executors": executor_stats()
     }
     
     return HealthResponse(
@@ -153,33 +187,39 @@ async def upload_sales_data(
     - product_id: Identifiant du produit
     - date: Date de la vente (format YYYY-MM-DD)
     - quantity: Quantité vendue (nombre positif)
+    
+    Formats acceptés: CSV, CSV compressé (.csv.gz, .zip contenant un seul CSV)
+    et XLSX, jusqu'à settings.upload_max_bytes octets (413 au-delà).
+    
+    Les produits dont la série a changé sont réentraînés en tâche de fond: la
+    réponse contient l'identifiant du job (GET /jobs/{job_id}).
     """
     logger.info(f"Réception d'un fichier: {file.filename}")
     
     # Vérification du type de fichier
-    if not file.filename.endswith(('.csv', '.xlsx')):
+    suffix = _upload_suffix(file.filename or "")
+    if suffix is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Format de fichier non supporté. Utilisez CSV ou XLSX"
+            detail="Format de fichier non supporté. Utilisez CSV (éventuellement .gz ou .zip) ou XLSX"
         )
+    if file.size is not None and file.size > settings.upload_max_bytes:
+        raise _upload_too_large()
     
     try:
-        # Sauvegarde temporaire du fichier
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        # Copie par blocs, parsing et invalidation hors de la boucle asyncio
+        stats = await run_io(_ingest_sales_file, file.file, suffix)
         
-        # Chargement des données
-        stats = data_manager.load_sales_data(temp_file_path)
-        
-        # Nettoyage du fichier temporaire
-        os.unlink(temp_file_path)
+        # Réentraînement des produits modifiés en tâche de fond: la réponse n'attend pas
+        changed = data_manager.changed_products if settings.retrain_on_upload else []
+        stats['job_id'] = retrain_jobs.submit(changed).job_id
         
         logger.info(f"Données chargées avec succès: {stats['products_count']} produits")
         
         return UploadResponse(**stats)
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -193,10 +233,118 @@ async def upload_sales_data(
         )
 
 
-@app.get("/products", response_model=Dict[str, List[ProductInfo]], tags=["Data"])
-async def get_products(token: str = Depends(verify_token)):
+UPLOAD_SUFFIXES = ('.csv', '.csv.gz', '.gz', '.zip', '.xlsx')
+
+
+def _upload_suffix(filename: str) -> Optional[str]:
+    """Extension du fichier uploadé conservée sur disque (compression et format lus par pandas)"""
+    name = filename.lower()
+    return next((suffix for suffix in UPLOAD_SUFFIXES if name.endswith(suffix)), None)
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Fichier trop volumineux (maximum {settings.upload_max_bytes // (1024 * 1024)} Mo)"
+    )
+
+
+def _spool_upload(source: BinaryIO, suffix: str) -> str:
+    """
+    Copie le fichier uploadé vers un fichier temporaire, par blocs de taille fixe (bloquant)
+
+    Le contenu n'est jamais chargé en entier en mémoire; la copie s'arrête
+    dès que settings.upload_max_bytes est dépassé.
+
+    Returns:
+        Chemin du fichier temporaire, avec l'extension d'origine
+    """
+    written = 0
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        with temp_file:
+            while block := source.read(settings.upload_chunk_bytes):
+                written += len(block)
+                if written > settings.upload_max_bytes:
+                    raise _upload_too_large()
+                temp_file.write(block)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+    return temp_file.name
+
+
+def _ingest_sales_file(source: BinaryIO, suffix: str) -> Dict:
+    """Charge un fichier de ventes uploadé et invalide les produits modifiés (bloquant)
+
+    Les modèles de panel (global, clusters) et les produits modifiés sont
+    réentraînés ensuite par le job de l'upload.
     """
-    Récupère la liste de tous les produits avec leurs métadonnées
+    # Sauvegarde temporaire du fichier
+    temp_file_path = _spool_upload(source, suffix)
+    
+    try:
+        # Chargement des données
+        stats = data_manager.load_sales_data(temp_file_path)
+        
+        # Seuls les produits dont la série a changé sont réentraînés
+        forecast_engine.invalidate_products(data_manager.changed_products)
+    finally:
+        # Nettoyage du fichier temporaire
+        os.unlink(temp_file_path)
+    
+    return stats
+
+
+@app.get("/jobs/{job_id}", response_model=RetrainJobResponse, tags=["Data"])
+async def get_retrain_job(
+    job_id: str,
+    product_id: Optional[str] = None,
+    token: str = Depends(verify_token)
+):
+    """
+    Avancement du réentraînement lancé par un upload
+    
+    Args:
+        job_id: Identifiant renvoyé par /upload_sales
+        product_id: Si spécifié, indique aussi si la prévision de ce produit est prête
+    """
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job introuvable: {job_id}"
+        )
+    
+    response = job.to_dict()
+    if product_id is not None:
+        # Un produit non modifié par l'upload garde son modèle: il est prêt
+        response['product_ready'] = product_id in job.ready or product_id not in job.product_ids
+    return RetrainJobResponse(**response)
+
+
+@app.get("/products", response_model=ProductListResponse, tags=["Data"])
+async def get_products(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    sort_by: str = "product_id",
+    order: Literal["asc", "desc"] = "asc",
+    filter: Optional[List[str]] = Query(None),
+    search: Optional[str] = None,
+    token: str = Depends(verify_token)
+):
+    """
+    Liste des produits et de leurs statistiques, calculées au chargement des données
+    
+    Args:
+        offset: Nombre de produits à sauter
+        limit: Taille de la page, plafonnée à products_max_page_size
+            (absente: tous les produits, sans pagination)
+        sort_by: Champ de tri (un champ de ProductInfo)
+        order: 'asc' ou 'desc'
+        filter: Conditions 'champ:opérateur:valeur' (eq, ne, gt, gte, lt, lte),
+            répétables, ex. ?filter=total_sales:gte:100&filter=date_range_end:gte:2024-06-01
+        search: Sous-chaîne recherchée dans product_id
     """
     if not data_manager.has_data():
         raise HTTPException(
@@ -204,9 +352,26 @@ async def get_products(token: str = Depends(verify_token)):
             detail="Aucune donnée disponible. Veuillez d'abord uploader des données."
         )
     
+    if limit is not None:
+        limit = min(limit, settings.products_max_page_size)
     try:
-        products = data_manager.get_all_products()
-        return {"products": products}
+        total, products = await run_compute(
+            data_manager.query_products,
+            offset=offset,
+            limit=limit,
+            sort_by=sort_by,
+            descending=order == "desc",
+            filters=filter,
+            search=search
+        )
+        return ProductListResponse(products=products, total=total, offset=offset, limit=limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des produits: {str(e)}")
         raise HTTPException(
@@ -219,6 +384,7 @@ async def get_products(token: str = Depends(verify_token)):
 async def get_forecast(
     product_id: str,
     horizon_days: int = 30,
+    format: Literal["points", "columnar"] = "points",
     token: str = Depends(verify_token)
 ):
     """
@@ -227,6 +393,8 @@ async def get_forecast(
     Args:
         product_id: Identifiant du produit
         horizon_days: Nombre de jours à prévoir (défaut: 30)
+        format: 'points' (un objet par jour, défaut) ou 'columnar'
+            (tableaux date/p10/p50/p90, voir ColumnarForecastResponse)
         
     Returns:
         Prévisions avec quantiles P10, P50, P90 pour chaque jour
@@ -241,13 +409,15 @@ async def get_forecast(
         )
     
     # Validation du produit
-    is_valid, message = data_manager.validate_product(product_id)
+    is_valid, message = await run_compute(data_manager.validate_product, product_id)
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Validation échouée pour {product_id}: {message}"
         )
     
+    retrain_jobs.record_request(product_id)
+    
     # Validation de l'horizon
     if horizon_days < 1 or horizon_days > 90:
         raise HTTPException(
@@ -256,27 +426,16 @@ async def get_forecast(
         )
     
     try:
-        # Préparation des données
-        historical_data = data_manager.prepare_forecast_data(product_id)
-        
-        # Génération de la prévision
-        forecast_points, metadata = forecast_engine.generate_forecast(
-            product_id=product_id,
-            historical_data=historical_data,
-            horizon_days=horizon_days
-        )
-        
-        # Construction de la réponse
-        response = ForecastResponse(
-            product_id=product_id,
-            forecasts=forecast_points,
-            metadata=metadata
-        )
+        # Génération de la prévision (ou lecture du cache des prévisions) hors de la boucle asyncio
+        response = await run_compute(_forecast_response, product_id, horizon_days, format)
         
         logger.info(f"Prévision générée avec succès pour {product_id}")
         
-        return response
+        # Réponse déjà sérialisée: pas de revalidation
+        return JSONResponse(content=response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la génération de prévision: {str(e)}")
         raise HTTPException(
@@ -285,6 +444,18 @@ async def get_forecast(
         )
 
 
+def _forecast_response(product_id: str, horizon_days: int, response_format: str) -> Dict:
+    """Prépare l'historique d'un produit et retourne sa prévision sérialisée (bloquant)"""
+    historical_data = data_manager.prepare_forecast_data(product_id)
+    return forecast_engine.get_forecast_response(
+        product_id=product_id,
+        historical_data=historical_data,
+        horizon_days=horizon_days,
+        demand_profile=data_manager.demand_profiles.get(product_id),
+        response_format=response_format
+    )
+
+
 @app.get("/recommendation/{product_id}", response_model=RecommendationResponse, tags=["Optimization"])
 async def get_recommendation(
     product_id: str,
@@ -306,6 +477,7 @@ async def get_recommendation(
         Recommandation avec quantité à commander, point de commande, stock de sécurité
     """
     logger.info(f"Demande de recommandation pour {product_id}")
+    retrain_jobs.record_request(product_id)
     
     # Validation des données
     if not data_manager.has_data():
@@ -334,30 +506,18 @@ async def get_recommendation(
         )
     
     try:
-        # Génération de la prévision (nécessaire pour la recommandation)
-        historical_data = data_manager.prepare_forecast_data(product_id)
-        forecast_points, _ = forecast_engine.generate_forecast(
-            product_id=product_id,
-            historical_data=historical_data,
-            horizon_days=lead_time_days * 2  # Horizon = 2x lead time
-        )
-        
-        # Conversion des forecast_points en DataFrame
-        forecast_df = pd.DataFrame([fp.dict() for fp in forecast_points])
-        
-        # Génération de la recommandation
-        recommendation = stock_optimizer.generate_recommendation(
-            product_id=product_id,
-            forecast_data=forecast_df,
-            current_stock=current_stock,
-            lead_time_days=lead_time_days,
-            service_level_percent=service_level_percent
+        # Prévision et optimisation hors de la boucle asyncio
+        recommendation = await run_compute(
+            _product_recommendation,
+            product_id, current_stock, lead_time_days, service_level_percent
         )
         
         logger.info(f"Recommandation générée pour {product_id}: {recommendation.recommendation_action}")
         
         return recommendation
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la génération de recommandation: {str(e)}")
         raise HTTPException(
@@ -366,6 +526,32 @@ async def get_recommendation(
         )
 
 
+def _product_recommendation(
+    product_id: str,
+    current_stock: float,
+    lead_time_days: int,
+    service_level_percent: int
+) -> RecommendationResponse:
+    """Génère la prévision puis la recommandation d'un produit (bloquant)"""
+    # Génération de la prévision en colonnes (nécessaire pour la recommandation)
+    historical_data = data_manager.prepare_forecast_data(product_id)
+    forecast_df, _ = forecast_engine.generate_forecast_frame(
+        product_id=product_id,
+        historical_data=historical_data,
+        horizon_days=lead_time_days * 2,  # Horizon = 2x lead time
+        demand_profile=data_manager.demand_profiles.get(product_id)
+    )
+    
+    # Génération de la recommandation
+    return stock_optimizer.generate_recommendation(
+        product_id=product_id,
+        forecast_data=forecast_df,
+        current_stock=current_stock,
+        lead_time_days=lead_time_days,
+        service_level_percent=service_level_percent
+    )
+
+
 @app.post("/batch_recommendations", response_model=BatchRecommendationResponse, tags=["Optimization"])
 async def get_batch_recommendations(
     request: BatchRecommendationRequest,
@@ -389,36 +575,8 @@ async def get_batch_recommendations(
         )
     
     try:
-        # Récupération de tous les produits
-        products = data_manager.get_all_products()
-        
-        # Génération des prévisions pour chaque produit
-        products_forecasts = {}
-        for product_info in products:
-            product_id = product_info['product_id']
-            
-            try:
-                historical_data = data_manager.prepare_forecast_data(product_id)
-                forecast_points, _ = forecast_engine.generate_forecast(
-                    product_id=product_id,
-                    historical_data=historical_data,
-                    horizon_days=request.lead_time_days * 2
-                )
-                
-                forecast_df = pd.DataFrame([fp.dict() for fp in forecast_points])
-                products_forecasts[product_id] = forecast_df
-                
-            except Exception as e:
-                logger.warning(f"Impossible de générer la prévision pour {product_id}: {str(e)}")
-                continue
-        
-        # Génération des recommandations
-        result = stock_optimizer.calculate_batch_recommendations(
-            products_forecasts=products_forecasts,
-            stock_levels=request.stock_levels,
-            lead_time_days=request.lead_time_days,
-            service_level_percent=request.service_level_percent
-        )
+        # Prévisions et optimisation de tout le catalogue hors de la boucle asyncio
+        result = await run_compute(_batch_recommendations, request)
         
         response = BatchRecommendationResponse(
             recommendations=result['recommendations'],
@@ -429,6 +587,8 @@ async def get_batch_recommendations(
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors des recommandations batch: {str(e)}")
         raise HTTPException(
@@ -437,6 +597,163 @@ async def get_batch_recommendations(
         )
 
 
+def _batch_recommendations(request: BatchRecommendationRequest) -> Dict:
+    """Prévoit tous les produits puis calcule les recommandations batch (bloquant)"""
+    # Préparation des historiques de tous les produits
+    products_series = {}
+    for product_id in data_manager.product_fingerprints:
+        try:
+            products_series[product_id] = data_manager.prepare_forecast_data(product_id)
+        except Exception as e:
+            logger.warning(f"Données indisponibles pour {product_id}: {str(e)}")
+    
+    # Entraînement parallèle (Prophet) ou ajustement vectorisé (ETS, Croston/TSB) des modèles manquants
+    forecast_engine.prepare_batch(products_series, data_manager.demand_profiles)
+    
+    # Génération des prévisions pour chaque produit
+    products_forecasts = {}
+    for product_id, historical_data in products_series.items():
+        try:
+            forecast_df, _ = forecast_engine.generate_forecast_frame(
+                product_id=product_id,
+                historical_data=historical_data,
+                horizon_days=request.lead_time_days * 2,
+                demand_profile=data_manager.demand_profiles.get(product_id)
+            )
+            products_forecasts[product_id] = forecast_df
+            
+        except Exception as e:
+            logger.warning(f"Impossible de générer la prévision pour {product_id}: {str(e)}")
+            continue
+    
+    # Génération des recommandations
+    return stock_optimizer.calculate_batch_recommendations(
+        products_forecasts=products_forecasts,
+        stock_levels=request.stock_levels,
+        lead_time_days=request.lead_time_days,
+        service_level_percent=request.service_level_percent
+    )
+
+
+@app.post("/backtest", response_model=BacktestResponse, tags=["Forecasting"])
+async def backtest(
+    request: BacktestRequest,
+    token: str = Depends(verify_token)
+):
+    """
+    Backtest par origine glissante: erreur hors échantillon de chaque famille de modèles
+    
+    Les résultats sont enregistrés dans le magasin de métriques (metrics_dir).
+    
+    Args:
+        request: Produits, familles, horizon et nombre de folds
+        
+    Returns:
+        Erreurs et temps de calcul par famille et par produit
+    """
+    logger.info(f"Demande de backtest | familles={request.model_families} folds={request.folds}")
+    
+    if not data_manager.has_data():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucune donnée disponible"
+        )
+    
+    unknown = [p for p in (request.product_ids or []) if p not in data_manager.product_fingerprints]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Produits introuvables: {', '.join(unknown)}"
+        )
+    
+    try:
+        result = await run_compute(_backtest, request)
+        return BacktestResponse(**result)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors du backtest: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+def _backtest(request: BacktestRequest) -> Dict:
+    """Prépare les historiques demandés et lance le backtest (bloquant)"""
+    product_ids = request.product_ids or list(data_manager.product_fingerprints)
+    series = {product_id: data_manager.prepare_forecast_data(product_id) for product_id in product_ids}
+    return run_backtest(
+        series,
+        model_families=request.model_families,
+        horizon=request.horizon_days,
+        folds=request.folds,
+        step=request.step_days
+    )
+
+
+@app.post("/tune", response_model=TuningResponse, tags=["Forecasting"])
+async def tune(
+    request: TuningRequest,
+    token: str = Depends(verify_token)
+):
+    """
+    Recherche des priors Prophet par produit sur des folds de backtest
+    
+    La configuration gagnante est sauvegardée à côté du modèle et réutilisée par
+    les entraînements suivants; les produits déjà ajustés ne sont recherchés à
+    nouveau qu'avec force=true.
+    
+    Args:
+        request: Produits à ajuster et option force
+        
+    Returns:
+        Configuration retenue (ou réutilisée) par produit
+    """
+    logger.info(f"Demande d'ajustement des priors | force={request.force}")
+    
+    if not data_manager.has_data():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucune donnée disponible"
+        )
+    
+    unknown = [p for p in (request.product_ids or []) if p not in data_manager.product_fingerprints]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Produits introuvables: {', '.join(unknown)}"
+        )
+    
+    try:
+        started = datetime.now()
+        products = await run_compute(_tune, request)
+        return TuningResponse(
+            products=products,
+            duration_seconds=round((datetime.now() - started).total_seconds(), 2)
+        )
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de l'ajustement des priors: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+def _tune(request: TuningRequest) -> Dict:
+    """Prépare les historiques demandés et lance la recherche des priors (bloquant)"""
+    product_ids = request.product_ids or list(data_manager.product_fingerprints)
+    series = {product_id: data_manager.prepare_forecast_data(product_id) for product_id in product_ids}
+    return tune_products(series, force=request.force)
+
+
 @app.delete("/cache/{product_id}", tags=["Admin"])
 async def clear_model_cache(
     product_id: Optional[str] = None,
@@ -448,7 +765,7 @@ async def clear_model_cache(
     Args:
         product_id: Si spécifié, nettoie uniquement ce produit, sinon tous
     """
-    forecast_engine.clear_cache(product_id)
+    await run_io(forecast_engine.clear_cache, product_id)
     
     message = f"Cache nettoyé pour {product_id}" if product_id else "Cache complet nettoyé"
     logger.info(message)
@@ -456,6 +773,27 @@ async def clear_model_cache(
     return {"message": message}
 
 
+@app.get("/admin/precompute", tags=["Admin"])
+async def get_precompute_status(token: str = Depends(verify_token)):
+    """
+    État du précalcul des prévisions: planification, dernière exécution (durée,
+    débit) et historique des exécutions récentes
+    """
+    return forecast_scheduler.status()
+
+
+@app.post("/admin/precompute", status_code=status.HTTP_202_ACCEPTED, tags=["Admin"])
+async def trigger_precompute(token: str = Depends(verify_token)):
+    """Demande un précalcul immédiat des prévisions de tout le catalogue"""
+    if not settings.precompute_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Précalcul des prévisions désactivé (precompute_enabled)"
+        )
+    forecast_scheduler.trigger('manual')
+    return {"message": "Précalcul demandé", "status": forecast_scheduler.status()}
+
+
 # Démarrage de l'application
 if __name__ == "__main__":
     import uvicorn
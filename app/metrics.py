@@ -32,6 +32,27 @@ class ForecastMetrics:
         return data
 
 
+@dataclass
+class BacktestMetrics:
+    """Erreur hors échantillon et temps de calcul d'une famille de modèles sur un produit"""
+    product_id: str
+    model_family: str
+    timestamp: datetime
+    horizon_days: int
+    folds: int
+    mape: Optional[float]
+    mae: float
+    rmse: float
+    coverage: float  # Part des ventes observées dans l'intervalle P10-P90
+    runtime_seconds: float  # Temps moyen d'entraînement + prévision par fold
+    
+    def to_dict(self) -> Dict:
+        """Convertit en dictionnaire sérialisable"""
+        data = asdict(self)
+        data['timestamp'] = self.timestamp.isoformat()
+        return data
+
+
 class MetricsCollector:
     """Collecteur et analyseur de métriques"""
     
@@ -64,6 +85,45 @@ class MetricsCollector:
         except Exception as e:
             logger.error(f"⚠️ Erreur enregistrement métriques: {e}")
     
+    def record_backtest(self, metrics: BacktestMetrics):
+        """
+        Enregistre le résultat d'un backtest
+        
+        Args:
+            metrics: Résultat d'une famille de modèles sur un produit
+        """
+        try:
+            backtest_file = self.metrics_dir / f"{metrics.product_id}_backtest.jsonl"
+            
+            with open(backtest_file, 'a') as f:
+                json.dump(metrics.to_dict(), f)
+                f.write('\n')
+        
+        except Exception as e:
+            logger.error(f"⚠️ Erreur enregistrement backtest: {e}")
+    
+    def get_backtest_results(self, product_id: str) -> Dict[str, Dict]:
+        """
+        Dernier résultat de backtest de chaque famille de modèles d'un produit
+        
+        Args:
+            product_id: Identifiant du produit
+            
+        Returns:
+            Dict {famille: résultat}
+        """
+        backtest_file = self.metrics_dir / f"{product_id}_backtest.jsonl"
+        
+        if not backtest_file.exists():
+            return {}
+        
+        results = {}
+        with open(backtest_file, 'r') as f:
+            for line in f:
+                result = json.loads(line)
+                results[result['model_family']] = result
+        return results
+    
     def get_metrics_history(
         self,
         product_id: str,
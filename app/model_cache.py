@@ -0,0 +1,164 @@
+"""
+Cache LRU borné des modèles Prophet entraînés
+Limite le nombre de modèles et la mémoire qu'ils occupent dans un worker
+"""
+
+import logging
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Coût fixe approximatif d'un objet Prophet (attributs, composantes, backend)
+MODEL_BASE_BYTES = 64 * 1024
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Estime la mémoire occupée par un modèle Prophet entraîné
+
+    Compte l'historique d'entraînement et les paramètres Stan, qui dominent la
+    taille d'un modèle; le reste est couvert par un coût fixe.
+
+    Args:
+        model: Modèle Prophet entraîné
+
+    Returns:
+        Taille approximative en octets
+    """
+    size = MODEL_BASE_BYTES
+
+    history = getattr(model, 'history', None)
+    if isinstance(history, pd.DataFrame):
+        size += int(history.memory_usage(deep=True).sum())
+
+    history_dates = getattr(model, 'history_dates', None)
+    if history_dates is not None:
+        size += int(np.asarray(history_dates).nbytes)
+
+    for value in (getattr(model, 'params', None) or {}).values():
+        size += int(np.asarray(value).nbytes)
+
+    return size
+
+
+class ModelLRUCache(MutableMapping):
+    """
+    Dictionnaire product_id -> modèle borné en nombre et en octets
+
+    L'accès par clé marque le modèle comme récemment utilisé. Au-delà des limites,
+    les modèles les moins récemment utilisés sont évincés et confiés au callback
+    on_evict (sauvegarde sur disque) pour pouvoir être rechargés plus tard.
+    Le modèle le plus récent est toujours conservé, même s'il dépasse max_bytes.
+    """
+
+    def __init__(
+        self,
+        max_models: int,
+        max_bytes: int,
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+        sizer: Callable[[Any], int] = estimate_model_bytes
+    ):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._sizer = sizer
+        self._models: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = RLock()
+        self.resident_bytes = 0
+        self.evictions = 0
+
+    def __getitem__(self, product_id: str) -> Any:
+        with self._lock:
+            model, _ = self._models[product_id]
+            self._models.move_to_end(product_id)
+            return model
+
+    def get(self, product_id: str, default: Any = None) -> Any:
+        """Lecture atomique: le modèle (marqué récemment utilisé) ou default s'il est absent ou évincé"""
+        with self._lock:
+            entry = self._models.get(product_id)
+            if entry is None:
+                return default
+            self._models.move_to_end(product_id)
+            return entry[0]
+
+    def __setitem__(self, product_id: str, model: Any):
+        size = self._sizer(model)
+        with self._lock:
+            if product_id in self._models:
+                self.resident_bytes -= self._models.pop(product_id)[1]
+            self._models[product_id] = (model, size)
+            self.resident_bytes += size
+            evicted = self._evict_over_limits()
+
+        # Sauvegarde hors du lock: l'écriture disque peut être lente
+        for evicted_id, evicted_model in evicted:
+            self._spill(evicted_id, evicted_model)
+        self._report()
+
+    def __delitem__(self, product_id: str):
+        with self._lock:
+            self.resident_bytes -= self._models.pop(product_id)[1]
+        self._report()
+
+    def __contains__(self, product_id: object) -> bool:
+        # Un test d'appartenance ne compte pas comme une utilisation
+        return product_id in self._models
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._models))
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.resident_bytes = 0
+        self._report()
+
+    def _evict_over_limits(self) -> List[Tuple[str, Any]]:
+        """Retire les modèles les moins récemment utilisés au-delà des limites (lock tenu)"""
+        evicted = []
+        while len(self._models) > 1 and (
+            len(self._models) > self.max_models or self.resident_bytes > self.max_bytes
+        ):
+            product_id, (model, size) = self._models.popitem(last=False)
+            self.resident_bytes -= size
+            self.evictions += 1
+            evicted.append((product_id, model))
+        return evicted
+
+    def _spill(self, product_id: str, model: Any):
+        """Confie un modèle évincé au callback de sauvegarde"""
+        logger.info(f"📤 Modèle évincé du cache mémoire: {product_id}")
+        if self.on_evict is None:
+            return
+        try:
+            self.on_evict(product_id, model)
+        except Exception as e:
+            logger.warning(f"⚠️ Sauvegarde du modèle évincé impossible pour {product_id}: {e}")
+
+    def _report(self):
+        """Publie l'état du cache sur la jauge MODEL_CACHE_SIZE"""
+        metrics_collector.update_model_cache_size(
+            len(self._models), resident_bytes=self.resident_bytes, evictions=self.evictions
+        )
+
+    def stats(self) -> Dict:
+        """Statistiques du cache (pour /health)"""
+        return {
+            'models': len(self._models),
+            'max_models': self.max_models,
+            'resident_bytes': self.resident_bytes,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions
+        }
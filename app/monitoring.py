@@ -72,7 +72,8 @@ DATA_ROWS_PROCESSED = Counter(
 # Métriques système
 MODEL_CACHE_SIZE = Gauge(
     'stokkel_model_cache_size',
-    'Number of cached models'
+    'Model cache state: cached models, resident bytes and evictions',
+    ['measure']
 )
 
 MODEL_TRAINING_TIME = Histogram(
@@ -162,9 +163,14 @@ class MetricsCollector:
             endpoint=endpoint
         ).inc()
     
-    def update_model_cache_size(self, size: int):
-        """Met à jour la taille du cache des modèles"""
-        MODEL_CACHE_SIZE.set(size)
+    def update_model_cache_size(self, size: int, resident_bytes: Optional[int] = None,
+                                evictions: Optional[int] = None):
+        """Met à jour la taille du cache des modèles (nombre, octets résidents, évictions)"""
+        MODEL_CACHE_SIZE.labels(measure="models").set(size)
+        if resident_bytes is not None:
+            MODEL_CACHE_SIZE.labels(measure="bytes").set(resident_bytes)
+        if evictions is not None:
+            MODEL_CACHE_SIZE.labels(measure="evictions").set(evictions)
     
     def record_model_training(self, product_id: str, duration: float):
         """Enregistre l'entraînement d'un modèle"""
@@ -0,0 +1,202 @@
+"""
+Précalcul des prévisions en tâche de fond
+Au démarrage et chaque nuit, les prévisions de tout le catalogue sont
+calculées jusqu'à l'horizon maximal et écrites dans le magasin de prévisions
+(cache des prédictions) que lisent /forecast et /recommendation
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from .config import settings
+from .data_manager import data_manager
+from .executors import get_executor
+from .forecasting import forecast_engine
+
+logger = logging.getLogger(__name__)
+
+
+def precompute_forecasts(product_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Calcule et stocke les prévisions d'un lot de produits (bloquant)
+
+    Les modèles manquants sont préparés en une passe (entraînement parallèle,
+    familles vectorisées, tournoi), puis la prévision de chaque produit est
+    écrite dans le magasin de prévisions.
+
+    Returns:
+        Dict avec les produits 'computed' et 'failed'
+    """
+    series = {}
+    for product_id in product_ids:
+        try:
+            series[product_id] = data_manager.prepare_forecast_data(product_id)
+        except Exception as e:
+            logger.warning(f"Données indisponibles pour {product_id}: {str(e)}")
+
+    forecast_engine.prepare_batch(series, data_manager.demand_profiles)
+
+    computed = []
+    for product_id, historical_data in series.items():
+        try:
+            forecast_engine.generate_forecast_frame(
+                product_id=product_id,
+                historical_data=historical_data,
+                horizon_days=settings.default_forecast_horizon,
+                demand_profile=data_manager.demand_profiles.get(product_id)
+            )
+            computed.append(product_id)
+        except HTTPException as e:
+            logger.warning(f"⚠️ Précalcul impossible pour {product_id}: {e.detail}")
+        except Exception as e:
+            logger.warning(f"⚠️ Précalcul impossible pour {product_id}: {e}")
+    done = set(computed)
+    return {'computed': computed, 'failed': [p for p in product_ids if p not in done]}
+
+
+def next_daily_run(daily_at: str, now: datetime) -> datetime:
+    """Prochaine occurrence de l'heure HH:MM après `now`"""
+    hour, minute = (int(part) for part in daily_at.split(':'))
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+class ForecastScheduler:
+    """
+    Planificateur du précalcul des prévisions, dans la boucle asyncio de l'application
+
+    Une seule exécution à la fois: une demande reçue pendant un calcul est
+    regroupée en une exécution suivante. Les lots de produits passent
+    par l'exécuteur borné 'precompute', séparé de celui des requêtes interactives.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._reason: Optional[str] = None
+        self.running = False
+        self.next_run_at: Optional[datetime] = None
+        self.runs_total = 0
+        self.last_run: Optional[Dict] = None
+        self.history: deque = deque(maxlen=10)
+
+    def start(self):
+        """Démarre la boucle du planificateur (lifespan); premier calcul si des données sont chargées"""
+        if not settings.precompute_enabled or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"🗓️ Précalcul des prévisions activé | quotidien={settings.precompute_daily_at}")
+        if data_manager.has_data():
+            self.trigger('startup')
+
+    async def stop(self):
+        """Arrête la boucle (fin du lifespan); un calcul en cours est abandonné"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task, self._wakeup = None, None
+
+    def trigger(self, reason: str = 'manual'):
+        """Demande un précalcul dès que possible (sans effet si le planificateur est arrêté)"""
+        if self._wakeup is None:
+            return
+        self._reason = reason
+        self._wakeup.set()
+
+    async def _loop(self):
+        while True:
+            self.next_run_at = (
+                next_daily_run(settings.precompute_daily_at, datetime.now())
+                if settings.precompute_daily_at else None
+            )
+            timeout = (
+                (self.next_run_at - datetime.now()).total_seconds()
+                if self.next_run_at else None
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                reason = self._reason or 'manual'
+            except asyncio.TimeoutError:
+                reason = 'schedule'
+            self._wakeup.clear()
+            self._reason = None
+
+            try:
+                await self.run_once(reason)
+            except Exception as e:
+                logger.error(f"❌ Précalcul des prévisions en échec: {e}", exc_info=True)
+
+    async def run_once(self, reason: str) -> Dict:
+        """
+        Précalcule les prévisions de tout le catalogue
+
+        Returns:
+            Bilan de l'exécution (durée, produits calculés, débit)
+        """
+        started_at = datetime.now()
+        started = time.perf_counter()
+        product_ids = list(data_manager.product_fingerprints) if data_manager.has_data() else []
+        batch_size = max(1, settings.precompute_batch_size)
+        batches = [product_ids[i:i + batch_size] for i in range(0, len(product_ids), batch_size)]
+
+        logger.info(f"🗓️ Précalcul des prévisions | raison={reason} produits={len(product_ids)}")
+        self.running = True
+        try:
+            # Pas plus de lots en vol que de workers: l'exécuteur ne refuse jamais de lot
+            slots = asyncio.Semaphore(settings.precompute_executor_workers)
+
+            async def run_batch(batch: List[str]) -> Dict[str, List[str]]:
+                async with slots:
+                    return await get_executor('precompute').run(precompute_forecasts, batch)
+
+            results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        finally:
+            self.running = False
+
+        duration = time.perf_counter() - started
+        computed = sum(len(result['computed']) for result in results)
+        run = {
+            'reason': reason,
+            'started_at': started_at.isoformat(),
+            'duration_seconds': round(duration, 2),
+            'products': len(product_ids),
+            'computed': computed,
+            'failed': sum(len(result['failed']) for result in results),
+            'products_per_second': round(computed / duration, 2) if duration > 0 else None
+        }
+        self.runs_total += 1
+        self.last_run = run
+        self.history.append(run)
+        logger.info(
+            f"🗓️ Précalcul terminé | {computed}/{len(product_ids)} produits "
+            f"en {duration:.1f}s ({run['products_per_second']} produits/s)"
+        )
+        return run
+
+    def status(self) -> Dict:
+        """État du planificateur (endpoint d'administration)"""
+        return {
+            'enabled': settings.precompute_enabled,
+            'active': self._task is not None,
+            'running': self.running,
+            'daily_at': settings.precompute_daily_at,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'runs_total': self.runs_total,
+            'last_run': self.last_run,
+            'history': list(self.history)
+        }
+
+
+# Instance globale
+forecast_scheduler = ForecastScheduler()
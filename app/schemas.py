@@ -53,6 +53,23 @@ class ForecastResponse(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now)
 
 
+class ForecastColumns(BaseModel):
+    """Prévision en colonnes: un tableau par quantile, alignés sur les dates"""
+    date: List[Date]
+    p10: List[float]
+    p50: List[float]
+    p90: List[float]
+
+
+class ColumnarForecastResponse(BaseModel):
+    """Réponse de prévision au format colonnes (/forecast?format=columnar)"""
+    product_id: str
+    format: Literal["columnar"] = "columnar"
+    forecasts: ForecastColumns
+    metadata: Dict = Field(default_factory=dict)
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+
 class RecommendationRequest(BaseModel):
     """Paramètres pour la recommandation d'approvisionnement"""
     product_id: str
@@ -91,6 +108,50 @@ class BatchRecommendationResponse(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now)
 
 
+class BacktestRequest(BaseModel):
+    """Paramètres d'un backtest par origine glissante"""
+    product_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Produits à évaluer (tout le catalogue si absent)"
+    )
+    model_families: List[str] = Field(
+        default_factory=lambda: ["prophet", "ets", "intermittent"],
+        min_length=1,
+        description="Familles de modèles à comparer"
+    )
+    horizon_days: int = Field(default=30, gt=0, le=365)
+    folds: int = Field(default=3, ge=1, le=12)
+    step_days: Optional[int] = Field(default=None, gt=0, description="Jours entre deux origines (défaut: horizon)")
+
+
+class BacktestResponse(BaseModel):
+    """Erreurs hors échantillon et temps de calcul par famille et par produit"""
+    horizon_days: int
+    folds: int
+    step_days: int
+    cutoffs: List[str]
+    families: Dict[str, Dict]
+    products: Dict[str, Dict]
+    duration_seconds: float
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+
+class TuningRequest(BaseModel):
+    """Paramètres d'une recherche des priors Prophet"""
+    product_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Produits à ajuster (tout le catalogue si absent)"
+    )
+    force: bool = Field(default=False, description="Rechercher à nouveau même si une configuration est sauvegardée")
+
+
+class TuningResponse(BaseModel):
+    """Configuration retenue par produit"""
+    products: Dict[str, Dict]
+    duration_seconds: float
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+
 class ProductInfo(BaseModel):
     """Informations sur un produit"""
     product_id: str
@@ -99,6 +160,21 @@ class ProductInfo(BaseModel):
     date_range_end: Optional[Date] = None
     average_daily_sales: Optional[float] = None
     total_sales: Optional[float] = None
+    days: Optional[int] = None
+    median_sales: Optional[float] = None
+    std_dev: Optional[float] = None
+    min_sales: Optional[float] = None
+    max_sales: Optional[float] = None
+    coefficient_of_variation: Optional[float] = None
+    iqr: Optional[float] = None
+
+
+class ProductListResponse(BaseModel):
+    """Page de la liste des produits"""
+    products: List[ProductInfo]
+    total: int = Field(..., description="Produits retenus par les filtres, avant pagination")
+    offset: int
+    limit: Optional[int] = Field(default=None, description="Taille de page demandée (None: tous les produits)")
 
 
 class UploadResponse(BaseModel):
@@ -106,7 +182,32 @@ class UploadResponse(BaseModel):
     message: str
     products_count: int
     total_records: int
+    products_changed: Optional[int] = None
     date_range: Dict[str, str]
+    job_id: Optional[str] = Field(
+        default=None,
+        description="Job de réentraînement des produits modifiés (suivi via GET /jobs/{job_id})"
+    )
+
+
+class RetrainJobResponse(BaseModel):
+    """Avancement d'un job de réentraînement après upload"""
+    job_id: str
+    status: Literal["pending", "running", "completed", "cancelled", "failed"]
+    products_total: int
+    products_ready: int
+    products_failed: int
+    progress: float
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    superseded_by: Optional[str] = None
+    error: Optional[str] = None
+    product_ready: Optional[bool] = Field(
+        default=None,
+        description="Prévision du produit demandé (paramètre product_id) prête ou non concernée par le job"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,131 @@
+"""
+Stockage en colonnes de l'historique des ventes
+Les ventes sont partitionnées par seau de hachage du produit en fichiers Parquet
+(colonnes typées); un upload ne réécrit que les seaux dont le contenu a changé
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Stockage CSV historique (voir DataManager._save_data)
+    pa = pq = None
+
+MANIFEST_VERSION = 1
+
+
+def parquet_available() -> bool:
+    """pyarrow est-il installé (pip install pyarrow)"""
+    return pq is not None
+
+
+def product_buckets(product_ids: pd.Series, buckets: int) -> np.ndarray:
+    """
+    Seau de chaque ligne: crc32 du product_id modulo le nombre de seaux
+
+    Stable d'un processus à l'autre (contrairement à hash()), calculé une fois par produit.
+    """
+    codes, uniques = pd.factorize(product_ids)
+    bucket_of = np.array([zlib.crc32(str(p).encode()) % buckets for p in uniques], dtype=np.int64)
+    return bucket_of[codes]
+
+
+class PartitionedSalesStore:
+    """
+    Ventes en fichiers Parquet par seau de produits, sous un répertoire
+
+    Le manifeste garde l'empreinte du contenu de chaque seau: seuls les seaux
+    dont l'empreinte change sont réécrits. Les fichiers sont écrits avant le
+    manifeste, chacun de façon atomique.
+    """
+
+    def __init__(self, root: Path, buckets: int):
+        if not parquet_available():
+            raise ImportError("pyarrow non installé. Installez avec: pip install pyarrow")
+        self.root = Path(root)
+        self.buckets = buckets
+        self.manifest_path = self.root / "manifest.json"
+        self.schema = pa.schema([
+            ('product_id', pa.string()),
+            ('date', pa.timestamp('ns')),
+            ('quantity', pa.float64())
+        ])
+
+    def _bucket_path(self, bucket: int) -> Path:
+        return self.root / f"bucket={bucket:04d}.parquet"
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+    def exists(self) -> bool:
+        return self._read_manifest() is not None
+
+    def save(self, sales: pd.DataFrame) -> List[int]:
+        """
+        Écrit les seaux dont le contenu a changé et supprime les seaux vidés
+
+        Args:
+            sales: Ventes (product_id, date, quantity)
+
+        Returns:
+            Seaux réécrits
+        """
+        manifest = self._read_manifest()
+        previous = manifest['hashes'] if manifest and manifest['buckets'] == self.buckets else {}
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        frame = sales[['product_id', 'date', 'quantity']].astype({'product_id': str, 'quantity': 'float64'})
+        hashes: Dict[str, str] = {}
+        written = []
+        for bucket, part in frame.groupby(product_buckets(frame['product_id'], self.buckets), sort=True):
+            digest = hashlib.sha1(
+                pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes()
+            ).hexdigest()
+            hashes[str(bucket)] = digest
+            path = self._bucket_path(bucket)
+            if previous.get(str(bucket)) == digest and path.exists():
+                continue
+            tmp_path = path.with_suffix('.tmp')
+            pq.write_table(pa.Table.from_pandas(part, schema=self.schema, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+            written.append(int(bucket))
+
+        # Seaux vidés (produits supprimés, ou nombre de seaux modifié)
+        for path in self.root.glob("bucket=*.parquet"):
+            if str(int(path.stem.split('=')[1])) not in hashes:
+                path.unlink()
+
+        tmp_manifest = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_manifest, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'buckets': self.buckets,
+                'rows': len(frame),
+                'hashes': hashes
+            }, f)
+        os.replace(tmp_manifest, self.manifest_path)
+        return written
+
+    def load(self) -> pd.DataFrame:
+        """Lit tous les seaux (fichiers projetés en mémoire) en un DataFrame typé"""
+        tables = [
+            pq.read_table(path, memory_map=True)
+            for path in sorted(self.root.glob("bucket=*.parquet"))
+        ]
+        if not tables:
+            return self.schema.empty_table().to_pandas()
+        return pa.concat_tables(tables).to_pandas()
@@ -0,0 +1,122 @@
+"""
+Tournoi de modèles par produit (politique 'auto')
+Évalue les candidats sur une fenêtre de validation et retient le moins cher
+dont l'erreur est proche de la meilleure
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from .backtesting import run_backtest
+from .config import settings
+from .data_utils import classify_demand
+from .forecasting import INTERMITTENT_DEMAND_CLASSES
+
+logger = logging.getLogger(__name__)
+
+# Candidats du moins cher au plus cher
+TOURNAMENT_CANDIDATES = ('naive', 'ets', 'intermittent', 'prophet')
+
+# Candidats vectorisés: tous les produits en un seul calcul par famille
+BATCH_CANDIDATES = ['naive', 'ets', 'intermittent']
+
+
+def select_winner(scores: Dict[str, float], tolerance: float) -> str:
+    """
+    Candidat le moins cher dont le MAE ne dépasse pas le meilleur de plus de `tolerance`
+
+    Args:
+        scores: Dict {famille: MAE de validation}
+        tolerance: Écart relatif toléré (0.05 = 5%)
+    """
+    best = min(scores.values())
+    return next(
+        family for family in TOURNAMENT_CANDIDATES
+        if family in scores and scores[family] <= best * (1 + tolerance)
+    )
+
+
+def run_tournament(
+    series: Dict[str, pd.DataFrame],
+    demand_profiles: Optional[Dict[str, Dict]] = None,
+    prophet_params: Optional[Callable[[str], Dict]] = None
+) -> Dict[str, Dict]:
+    """
+    Tournoi de modèles de chaque produit sur ses tournament_holdout_days derniers jours
+
+    Les candidats vectorisés sont évalués sur tout le lot, puis Prophet dans le
+    pool d'entraînement, sauf pour la demande intermittente ou lumpy où Croston/TSB
+    est la référence. Prophet ne gagne que s'il bat les références de plus de
+    tournament_tolerance: les entraînements complets ne sont faits que pour ces
+    produits. Les produits sont regroupés par date de dernière vente pour partager
+    la même coupure.
+
+    Args:
+        series: Dict {product_id: DataFrame (ds, y)}
+        demand_profiles: Profils de demande par produit (recalculés si absents)
+        prophet_params: Paramètres Prophet d'un produit (défaut: ceux du moteur de prévision)
+
+    Returns:
+        Dict {product_id: {'winner', 'scores', 'reason', 'holdout_days', 'evaluated_at'}}
+    """
+    started = time.perf_counter()
+    horizon = settings.tournament_holdout_days
+    demand_profiles = demand_profiles or {}
+    demand_classes = {
+        product_id: (
+            demand_profiles.get(product_id)
+            or classify_demand(data, settings.demand_adi_threshold, settings.demand_cv2_threshold)
+        )['demand_class']
+        for product_id, data in series.items()
+    }
+
+    groups: Dict[pd.Timestamp, Dict[str, pd.DataFrame]] = {}
+    for product_id, data in series.items():
+        groups.setdefault(data['ds'].max(), {})[product_id] = data
+
+    scores: Dict[str, Dict[str, float]] = {}
+    for group in groups.values():
+        runs = [run_backtest(group, BATCH_CANDIDATES, horizon, folds=1, record=False)]
+        smooth = {
+            product_id: data for product_id, data in group.items()
+            if demand_classes[product_id] not in INTERMITTENT_DEMAND_CLASSES
+        }
+        if smooth:
+            runs.append(run_backtest(
+                smooth, ['prophet'], horizon, folds=1, prophet_params=prophet_params, record=False
+            ))
+        for run in runs:
+            for product_id, families in run['products'].items():
+                for family, result in families.items():
+                    if family in TOURNAMENT_CANDIDATES:
+                        scores.setdefault(product_id, {})[family] = result['mae']
+
+    results = {}
+    evaluated_at = datetime.now().isoformat()
+    for product_id in series:
+        product_scores = scores.get(product_id)
+        if not product_scores:
+            # Historique trop court pour la fenêtre de validation: référence selon la classe de demande
+            fallback = 'intermittent' if demand_classes[product_id] in INTERMITTENT_DEMAND_CLASSES else 'ets'
+            results[product_id] = {'winner': fallback, 'scores': {}, 'reason': 'historique insuffisant'}
+            continue
+        results[product_id] = {
+            'winner': select_winner(product_scores, settings.tournament_tolerance),
+            'scores': product_scores,
+            'reason': 'validation',
+            'holdout_days': horizon,
+            'evaluated_at': evaluated_at
+        }
+
+    winners: Dict[str, int] = {}
+    for result in results.values():
+        winners[result['winner']] = winners.get(result['winner'], 0) + 1
+    logger.info(
+        f"🏆 Tournoi de modèles | produits={len(series)} vainqueurs={winners} "
+        f"durée={time.perf_counter() - started:.1f}s"
+    )
+    return results
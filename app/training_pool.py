@@ -0,0 +1,263 @@
+"""
+Pool de processus pour l'entraînement parallèle des modèles Prophet
+Les workers sont longue durée et préchauffés (backend Stan chargé au démarrage)
+"""
+
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor, Future, wait
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _init_fit_worker():
+    """Initialise un worker: import de Prophet et chargement du backend Stan"""
+    import warnings
+    warnings.filterwarnings('ignore')
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    logging.getLogger('prophet').setLevel(logging.WARNING)
+
+    from prophet import Prophet
+    # L'instanciation charge le backend cmdstan une fois pour toute la vie du worker
+    Prophet()
+
+
+def _ping_worker() -> bool:
+    """Tâche vide utilisée pour démarrer les workers à l'avance"""
+    return True
+
+
+def compute_in_sample_metrics(model) -> Dict:
+    """
+    Calcule MAPE, MAE et RMSE d'un modèle Prophet entraîné sur son propre historique
+    
+    Appelée une fois à l'entraînement; l'incertitude n'est pas simulée car seul
+    yhat est nécessaire.
+    
+    Args:
+        model: Modèle Prophet entraîné
+        
+    Returns:
+        Dict avec les métriques arrondies ('N/A' si non calculable)
+    """
+    uncertainty_samples = model.uncertainty_samples
+    model.uncertainty_samples = 0
+    try:
+        predicted = model.predict(model.history[['ds']])['yhat'].values
+    finally:
+        model.uncertainty_samples = uncertainty_samples
+    
+    return error_metrics(model.history['y'].values, predicted)
+
+
+def error_metrics(actual: np.ndarray, predicted: np.ndarray) -> Dict:
+    """
+    MAPE, MAE et RMSE d'une prévision sur des valeurs observées
+    
+    Returns:
+        Dict avec les métriques arrondies ('N/A' si non calculable)
+    """
+    actual = np.asarray(actual, dtype=float)
+    errors = actual - predicted
+    
+    # Calcul du MAPE (en évitant la division par zéro)
+    mask = actual != 0
+    mape = np.mean(np.abs(errors[mask] / actual[mask])) * 100 if mask.any() else None
+    mae = np.mean(np.abs(errors)) if len(errors) else None
+    rmse = np.sqrt(np.mean(errors ** 2)) if len(errors) else None
+    
+    return {
+        'mape': round(float(mape), 2) if mape is not None else 'N/A',
+        'mae': round(float(mae), 2) if mae is not None else 'N/A',
+        'rmse': round(float(rmse), 2) if rmse is not None else 'N/A'
+    }
+
+
+# Paramètres Stan réutilisables pour initialiser un nouvel entraînement
+STAN_SCALAR_PARAMS = ('k', 'm', 'sigma_obs')
+STAN_VECTOR_PARAMS = ('delta', 'beta')
+
+# Lignes d'itération de CmdStan: 'Iteration 12. ...' (Newton) ou '   99   1578.93 ...' (LBFGS)
+_ITERATION_LINE = re.compile(r'^\s*(?:Iteration\s+(\d+)\.|(\d+)\s+-?\d)')
+
+
+def extract_stan_params(model) -> Dict:
+    """Paramètres MAP d'un modèle entraîné, au format JSON (sauvegardés dans les métadonnées)"""
+    params = {name: float(np.ravel(model.params[name])[0]) for name in STAN_SCALAR_PARAMS}
+    params.update({name: np.ravel(model.params[name]).tolist() for name in STAN_VECTOR_PARAMS})
+    return params
+
+
+def warm_start_init(stan_params: Dict) -> Dict:
+    """
+    Valeurs initiales de l'optimiseur Stan à partir des paramètres d'un modèle précédent
+
+    Prophet remplace par ses valeurs par défaut les paramètres dont la taille ne
+    correspond plus (autre nombre de changepoints ou de termes saisonniers).
+    """
+    init = {name: float(stan_params[name]) for name in STAN_SCALAR_PARAMS}
+    init.update({name: np.asarray(stan_params[name], dtype=float) for name in STAN_VECTOR_PARAMS})
+    return init
+
+
+def optimizer_report(model) -> Dict:
+    """
+    Nombre d'itérations et convergence de l'optimiseur, lus dans la sortie de CmdStan
+
+    Returns:
+        Dict {'iterations': int ou None, 'converged': bool ou None}
+    """
+    report = {'iterations': None, 'converged': None}
+    try:
+        with open(model.stan_fit.runset.stdout_files[0], 'r') as f:
+            lines = f.read().splitlines()
+    except Exception:
+        return report
+
+    for line in lines:
+        match = _ITERATION_LINE.match(line)
+        if match:
+            report['iterations'] = int(match.group(1) or match.group(2))
+        elif line.startswith('Optimization terminated'):
+            report['converged'] = 'normally' in line
+    return report
+
+
+def fit_prophet(
+    data: pd.DataFrame,
+    prophet_params: Dict,
+    previous: Optional[Dict] = None,
+    max_rmse_increase: Optional[float] = None
+) -> Tuple[object, Dict, Dict]:
+    """
+    Entraîne un modèle Prophet, à chaud si un modèle précédent est disponible
+
+    L'entraînement à chaud initialise l'optimiseur avec les paramètres du modèle
+    précédent. Il est abandonné au profit d'un entraînement à froid s'il échoue,
+    ne converge pas, ou si son RMSE in-sample dépasse celui du modèle précédent
+    de plus de max_rmse_increase.
+
+    Args:
+        data: Données d'entraînement (colonnes ds, y)
+        prophet_params: Paramètres du constructeur Prophet
+        previous: Métadonnées du modèle précédent ('stan_params', 'quality_metrics')
+        max_rmse_increase: Dégradation relative du RMSE tolérée (défaut: réglage global)
+
+    Returns:
+        Tuple (modèle, métriques in-sample, informations d'entraînement)
+    """
+    from prophet import Prophet
+
+    if max_rmse_increase is None:
+        max_rmse_increase = settings.warm_start_max_rmse_increase
+
+    fallback_reason = None
+    if previous and previous.get('stan_params'):
+        try:
+            model = Prophet(**prophet_params)
+            model.fit(data, init=warm_start_init(previous['stan_params']))
+            metrics = compute_in_sample_metrics(model)
+            report = optimizer_report(model)
+
+            previous_rmse = previous.get('quality_metrics', {}).get('rmse')
+            if report['converged'] is False:
+                fallback_reason = 'not_converged'
+            elif (
+                isinstance(previous_rmse, (int, float)) and isinstance(metrics['rmse'], (int, float))
+                and metrics['rmse'] > previous_rmse * (1 + max_rmse_increase)
+            ):
+                fallback_reason = 'rmse_degraded'
+            else:
+                info = {'path': 'warm_start', **report}
+                return model, metrics, info
+        except Exception as e:
+            logger.warning(f"⚠️ Entraînement à chaud impossible: {e}")
+            fallback_reason = 'error'
+
+    model = Prophet(**prophet_params)
+    model.fit(data)
+    info = {'path': 'cold_fallback' if fallback_reason else 'cold', **optimizer_report(model)}
+    if fallback_reason:
+        info['fallback_reason'] = fallback_reason
+
+    return model, compute_in_sample_metrics(model), info
+
+
+def fit_prophet_worker(
+    product_id: str,
+    ds_values: np.ndarray,
+    y_values: np.ndarray,
+    prophet_params: Dict,
+    previous: Optional[Dict] = None,
+    max_rmse_increase: Optional[float] = None
+) -> Tuple[str, str, Dict, Dict]:
+    """
+    Entraîne un modèle Prophet dans un worker du pool
+
+    Args:
+        product_id: Identifiant du produit
+        ds_values: Dates de l'historique (datetime64)
+        y_values: Quantités journalières
+        prophet_params: Paramètres du constructeur Prophet
+        previous: Métadonnées du modèle précédent, pour l'entraînement à chaud
+        max_rmse_increase: Dégradation du RMSE tolérée à chaud (réglage du processus parent)
+
+    Returns:
+        Tuple (product_id, modèle sérialisé en JSON, métriques in-sample,
+        informations d'entraînement)
+    """
+    from prophet.serialize import model_to_json
+
+    data = pd.DataFrame({'ds': pd.to_datetime(ds_values), 'y': y_values})
+    model, metrics, info = fit_prophet(data, prophet_params, previous, max_rmse_increase)
+    info['stan_params'] = extract_stan_params(model)
+
+    return product_id, model_to_json(model), metrics, info
+
+
+def get_training_pool() -> ProcessPoolExecutor:
+    """Retourne le pool d'entraînement partagé (créé à la première utilisation)"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn' évite de forker un process qui contient déjà des threads (uvicorn)
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.training_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_fit_worker
+            )
+            logger.info(f"🏭 Pool d'entraînement créé | workers={settings.training_workers}")
+        return _pool
+
+
+def warm_up_training_pool():
+    """Démarre tous les workers pour que le premier batch ne paie pas leur initialisation"""
+    pool = get_training_pool()
+    futures: List[Future] = [
+        pool.submit(_ping_worker) for _ in range(settings.training_workers)
+    ]
+    wait(futures)
+    logger.info("🔥 Workers d'entraînement préchauffés")
+
+
+def shutdown_training_pool():
+    """Arrête le pool d'entraînement"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            logger.info("🛑 Pool d'entraînement arrêté")
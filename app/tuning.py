@@ -0,0 +1,186 @@
+"""
+Recherche des priors Prophet par produit
+Évalue une grille de configurations sur des folds de backtest dans le pool
+d'entraînement, en abandonnant tôt les configurations nettement perdantes
+"""
+
+import itertools
+import logging
+import time
+from concurrent.futures import as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtesting import rolling_cutoffs, split_fold
+from .config import settings
+from .forecasting import ForecastEngine, forecast_engine
+from .training_pool import fit_prophet, get_training_pool
+
+logger = logging.getLogger(__name__)
+
+# Grille de recherche
+CHANGEPOINT_PRIOR_SCALES = (0.001, 0.01, 0.05, 0.5)
+SEASONALITY_PRIOR_SCALES = (0.1, 1.0, 10.0)
+SEASONALITY_MODES = ('additive', 'multiplicative')
+
+
+def search_space() -> List[Dict]:
+    """Toutes les configurations de priors évaluées"""
+    return [
+        {
+            'changepoint_prior_scale': changepoint,
+            'seasonality_prior_scale': seasonality,
+            'seasonality_mode': mode
+        }
+        for changepoint, seasonality, mode in itertools.product(
+            CHANGEPOINT_PRIOR_SCALES, SEASONALITY_PRIOR_SCALES, SEASONALITY_MODES
+        )
+    ]
+
+
+def _score_config(
+    product_id: str,
+    config_index: int,
+    train: pd.DataFrame,
+    actual: pd.Series,
+    prophet_params: Dict
+) -> Tuple[str, int, float]:
+    """
+    Entraîne une configuration sur un fold et mesure son MAE sur la fenêtre de test
+
+    Returns:
+        Tuple (product_id, indice de la configuration, MAE)
+    """
+    model, _, _ = fit_prophet(train, prophet_params)
+    model.uncertainty_samples = 0
+    yhat = model.predict(pd.DataFrame({'ds': actual.index}))['yhat'].values
+    return product_id, config_index, float(np.mean(np.abs(np.maximum(0, yhat) - actual.values)))
+
+
+def _run_round(tasks: List[Tuple]) -> List[Tuple[str, int, float]]:
+    """Évalue un lot de (produit, configuration, fold) dans le pool (ou localement s'il est petit)"""
+    if settings.training_workers <= 1 or len(tasks) < settings.parallel_training_min_products:
+        return [_score_config(*task) for task in tasks]
+
+    pool = get_training_pool()
+    futures = [pool.submit(_score_config, *task) for task in tasks]
+    scores = []
+    for future in as_completed(futures):
+        try:
+            scores.append(future.result())
+        except Exception as e:
+            logger.warning(f"⚠️ Configuration en échec: {e}")
+    return scores
+
+
+def tune_products(
+    series: Dict[str, pd.DataFrame],
+    force: bool = False,
+    engine: Optional[ForecastEngine] = None
+) -> Dict[str, Dict]:
+    """
+    Cherche la meilleure configuration de priors de chaque produit
+
+    Les folds sont évalués du plus récent au plus ancien. Après chaque fold, seule
+    la meilleure moitié des configurations est conservée, et parmi elle celles dont
+    le MAE moyen ne dépasse pas celui de la meilleure de plus de tuning_prune_ratio. Chaque tour (un fold, toutes les
+    configurations restantes de tous les produits) tourne en parallèle dans le
+    pool d'entraînement. La configuration gagnante est sauvegardée à côté du
+    modèle et réutilisée par les entraînements suivants.
+
+    Args:
+        series: Dict {product_id: DataFrame (ds, y)}
+        force: Rechercher à nouveau même si une configuration est déjà sauvegardée
+        engine: Moteur de prévision qui sauvegarde et utilise les configurations
+
+    Returns:
+        Dict {product_id: résultat de la recherche (ou raison de l'absence de recherche)}
+    """
+    engine = engine or forecast_engine
+    started = time.perf_counter()
+    horizon = settings.tuning_horizon_days
+    configs = search_space()
+    base_params = engine._default_prophet_params()
+
+    results: Dict[str, Dict] = {}
+    folds: Dict[str, List[Tuple[pd.DataFrame, pd.Series]]] = {}
+    for product_id, data in series.items():
+        tuned = engine.tuned_config(product_id)
+        if tuned is not None and not force:
+            results[product_id] = {**tuned, 'status': 'reused'}
+            continue
+
+        cutoffs = rolling_cutoffs(data['ds'].max(), horizon, settings.tuning_folds, horizon)
+        product_folds = []
+        for cutoff in reversed(cutoffs):
+            train, test = split_fold({product_id: data}, cutoff, horizon)
+            if product_id in train:
+                product_folds.append((train[product_id], test[product_id]))
+        if not product_folds:
+            results[product_id] = {'status': 'skipped', 'reason': 'historique insuffisant'}
+            continue
+        folds[product_id] = product_folds
+
+    # MAE par fold de chaque configuration encore en lice
+    errors = {product_id: {i: [] for i in range(len(configs))} for product_id in folds}
+    evaluated = {product_id: 0 for product_id in folds}
+
+    for fold in range(settings.tuning_folds):
+        tasks = [
+            (product_id, i, *folds[product_id][fold], {**base_params, **configs[i]})
+            for product_id, alive in errors.items() if fold < len(folds[product_id])
+            for i in alive
+        ]
+        if not tasks:
+            break
+        logger.info(f"🎛️ Recherche des priors | fold={fold + 1} évaluations={len(tasks)}")
+
+        for product_id, i, mae in _run_round(tasks):
+            errors[product_id][i].append(mae)
+            evaluated[product_id] += 1
+
+        # Abandon des configurations nettement perdantes (ou en échec sur ce fold)
+        for product_id, alive in errors.items():
+            if fold >= len(folds[product_id]):
+                continue
+            means = {i: np.mean(maes) for i, maes in alive.items() if len(maes) == fold + 1}
+            if not means:
+                continue
+            best = min(means.values())
+            ranked = sorted(means, key=means.get)[:max(1, (len(means) + 1) // 2)]
+            errors[product_id] = {
+                i: alive[i] for i in ranked if means[i] <= best * settings.tuning_prune_ratio
+            }
+
+    default_config = {key: base_params[key] for key in configs[0]}
+    default_index = configs.index(default_config) if default_config in configs else None
+
+    for product_id, alive in errors.items():
+        if not alive:
+            results[product_id] = {'status': 'skipped', 'reason': 'toutes les configurations ont échoué'}
+            continue
+        winner = min(alive, key=lambda i: np.mean(alive[i]))
+        tuning = {
+            'params': configs[winner],
+            'mae': round(float(np.mean(alive[winner])), 4),
+            'default_mae': (
+                round(float(np.mean(alive[default_index])), 4) if default_index in alive else None
+            ),
+            'folds': len(folds[product_id]),
+            'configs': len(configs),
+            'evaluations': evaluated[product_id],
+            'pruned': len(configs) - len(alive),
+            'tuned_at': datetime.now().isoformat()
+        }
+        engine.save_tuned_config(product_id, tuning)
+        results[product_id] = {**tuning, 'status': 'tuned'}
+
+    tuned = sum(1 for result in results.values() if result['status'] == 'tuned')
+    logger.info(
+        f"🎛️ Recherche terminée | produits={len(series)} ajustés={tuned} "
+        f"durée={time.perf_counter() - started:.1f}s"
+    )
+    return results
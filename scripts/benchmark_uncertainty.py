@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Stokkel - Benchmark des modes d'incertitude Prophet
+Compare la latence de prédiction et la qualité des intervalles P10-P90
+(couverture, largeur, pinball loss) entre le mode sampling et le mode analytic
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.forecasting import ForecastEngine  # noqa: E402
+
+
+def make_series(days: int, seed: int) -> pd.DataFrame:
+    """Série journalière synthétique: tendance, saisonnalité hebdomadaire et bruit de Poisson"""
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range('2023-01-01', periods=days, freq='D')
+    level = rng.uniform(5, 60)
+    trend = 1 + rng.uniform(-0.2, 0.4) * np.arange(days) / days
+    weekly = 1 + rng.uniform(0.1, 0.5) * np.sin(2 * np.pi * ds.dayofweek / 7)
+    y = rng.poisson(level * trend * weekly).astype(float)
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+def pinball_loss(actual: np.ndarray, predicted: np.ndarray, quantile: float) -> float:
+    """Perte quantile moyenne"""
+    diff = actual - predicted
+    return float(np.mean(np.maximum(quantile * diff, (quantile - 1) * diff)))
+
+
+def run_mode(engine: ForecastEngine, models: dict, holdouts: dict, mode: str, samples: int) -> dict:
+    """Prédit tous les produits dans un mode et agrège latence et qualité des quantiles"""
+    settings.prophet_uncertainty_mode = mode
+    settings.prophet_uncertainty_samples = samples
+    lower = (1 - settings.prophet_interval_width) / 2
+
+    latencies, covered, widths, losses = [], [], [], []
+    for product_id, (model, quality_metrics) in models.items():
+        actual = holdouts[product_id]['y'].to_numpy()
+        future = holdouts[product_id][['ds']]
+
+        start = time.perf_counter()
+        p10, p50, p90 = engine._predict_quantiles(model, future, quality_metrics)
+        latencies.append(time.perf_counter() - start)
+
+        p10, p50, p90 = (np.maximum(0, q) for q in (p10, p50, p90))
+        covered.append(np.mean((actual >= p10) & (actual <= p90)))
+        widths.append(np.mean(p90 - p10))
+        losses.append(np.mean([
+            pinball_loss(actual, p10, lower),
+            pinball_loss(actual, p50, 0.5),
+            pinball_loss(actual, p90, 1 - lower)
+        ]))
+
+    return {
+        'mode': mode if mode == 'analytic' else f"sampling ({samples})",
+        'latency_ms': 1000 * float(np.median(latencies)),
+        'coverage': float(np.mean(covered)),
+        'width': float(np.mean(widths)),
+        'pinball': float(np.mean(losses))
+    }
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark des modes d\'incertitude des prévisions Prophet'
+    )
+    parser.add_argument('--products', type=int, default=10, help='Nombre de séries synthétiques')
+    parser.add_argument('--days', type=int, default=365, help='Jours d\'historique par série')
+    parser.add_argument('--horizon', type=int, default=30, help='Jours de test après l\'historique')
+    parser.add_argument(
+        '--samples', type=int, nargs='+', default=[1000, 300, 100],
+        help='Nombres de trajectoires à comparer en mode sampling'
+    )
+    args = parser.parse_args()
+
+    engine = ForecastEngine()
+    models, holdouts = {}, {}
+
+    print(f"\nEntraînement de {args.products} modèles ({args.days} jours)...")
+    for i in range(args.products):
+        series = make_series(args.days + args.horizon, seed=i)
+        train, holdouts[f"B{i:03d}"] = series.iloc[:args.days], series.iloc[args.days:]
+        model, meta = engine._train_new_model(f"B{i:03d}", train)
+        models[f"B{i:03d}"] = (model, meta['quality_metrics'])
+
+    results = [run_mode(engine, models, holdouts, 'sampling', samples) for samples in args.samples]
+    results.append(run_mode(engine, models, holdouts, 'analytic', 0))
+
+    target = settings.prophet_interval_width
+    print(f"\n{'Mode':<18}{'Latence (ms)':>14}{'Couverture':>12}{'Largeur':>10}{'Pinball':>10}")
+    print("-" * 64)
+    for result in results:
+        print(
+            f"{result['mode']:<18}{result['latency_ms']:>14.1f}{result['coverage']:>12.1%}"
+            f"{result['width']:>10.2f}{result['pinball']:>10.3f}"
+        )
+    print(f"\nCouverture cible de l'intervalle P10-P90: {target:.0%}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Fixtures partagées des tests
+"""
+
+import pytest
+
+from app.cache import cache
+from app.config import settings
+from app.forecasting import ForecastEngine
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Moteur de prévision isolé dans un répertoire temporaire"""
+    monkeypatch.setattr(settings, 'models_dir', str(tmp_path / 'models'))
+    cache.clear()
+    return ForecastEngine()
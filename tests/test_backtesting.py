@@ -0,0 +1,133 @@
+"""
+Tests pour le backtesting par origine glissante
+"""
+
+import pytest
+import pandas as pd
+
+import app.backtesting as backtesting
+from app.backtesting import rolling_cutoffs, run_backtest, split_fold
+from app.config import settings
+from app.metrics import metrics_collector
+from app.training_pool import shutdown_training_pool
+from tests.test_forecaster import make_intermittent_series, make_series
+
+
+def fold_task(product_id):
+    """Tâche de backtest factice (module-level: sérialisable vers le pool)"""
+    if product_id == 'BAD':
+        raise ValueError("série corrompue")
+    return [{'product_id': product_id}]
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    """Magasin de métriques isolé dans un répertoire temporaire"""
+    monkeypatch.setattr(metrics_collector, 'metrics_dir', tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def catalogue():
+    return {
+        'P001': make_series(days=120, seed=1),
+        'P002': make_series(days=120, level=30, seed=2),
+        'P003': make_intermittent_series(days=120, seed=3)
+    }
+
+
+class TestFolds:
+    """Tests du découpage en folds"""
+
+    def test_cutoffs_end_with_last_horizon(self):
+        """Le dernier fold teste les derniers jours; les précédents reculent d'un pas"""
+        cutoffs = rolling_cutoffs(pd.Timestamp('2024-04-30'), horizon=14, folds=3, step=7)
+
+        assert cutoffs == [pd.Timestamp('2024-04-02'), pd.Timestamp('2024-04-09'), pd.Timestamp('2024-04-16')]
+
+    def test_split_has_no_leakage_and_fills_missing_days(self):
+        """L'entraînement s'arrête à la coupure; les jours de test sans vente valent zéro"""
+        data = make_series(days=60)
+        data = data[data['ds'] != pd.Timestamp('2024-02-25')]
+        cutoff = pd.Timestamp('2024-02-19')
+
+        train, test = split_fold({'P001': data}, cutoff, horizon=10)
+
+        assert train['P001']['ds'].max() == cutoff
+        assert len(test['P001']) == 10
+        assert test['P001'][pd.Timestamp('2024-02-25')] == 0
+
+
+class TestRunBacktest:
+    """Tests du backtest multi-familles"""
+
+    def test_compares_families_and_records_results(self, catalogue, metrics_dir, monkeypatch):
+        """Chaque produit reçoit l'erreur et le temps de calcul de chaque famille"""
+        monkeypatch.setattr(settings, 'training_workers', 1)
+
+        result = run_backtest(catalogue, ['prophet', 'ets', 'intermittent'], horizon=14, folds=2)
+
+        assert len(result['cutoffs']) == 2
+        for family in ('prophet', 'ets', 'intermittent'):
+            assert result['families'][family]['products'] == 3
+        for product_id in catalogue:
+            product = result['products'][product_id]
+            assert product['best_family'] in ('prophet', 'ets', 'intermittent')
+            assert product['ets']['folds'] == 2
+            assert product['ets']['runtime_seconds'] >= 0
+            assert 0 <= product['prophet']['coverage'] <= 1
+
+        stored = metrics_collector.get_backtest_results('P001')
+        assert set(stored) == {'prophet', 'ets', 'intermittent'}
+        assert stored['ets']['mae'] == result['products']['P001']['ets']['mae']
+
+    def test_prophet_folds_warm_started(self, catalogue, metrics_dir, monkeypatch):
+        """Les folds Prophet d'un produit repartent des paramètres du fold précédent"""
+        monkeypatch.setattr(settings, 'training_workers', 1)
+        previous_args = []
+        original_fit = backtesting.fit_prophet
+
+        def recording_fit(data, params, previous=None):
+            previous_args.append(previous)
+            return original_fit(data, params, previous)
+
+        monkeypatch.setattr(backtesting, 'fit_prophet', recording_fit)
+        run_backtest({'P001': catalogue['P001']}, ['prophet'], horizon=7, folds=3, record=False)
+
+        assert previous_args[0] is None
+        assert all(previous is not None for previous in previous_args[1:])
+
+    def test_parallel_matches_sequential(self, catalogue, metrics_dir, monkeypatch):
+        """Les folds exécutés dans le pool donnent les mêmes erreurs qu'en local"""
+        monkeypatch.setattr(settings, 'training_workers', 1)
+        sequential = run_backtest(catalogue, ['ets'], horizon=14, folds=3, record=False)
+
+        monkeypatch.setattr(settings, 'training_workers', 2)
+        monkeypatch.setattr(settings, 'parallel_training_min_products', 2)
+        try:
+            parallel = run_backtest(catalogue, ['ets'], horizon=14, folds=3, record=False)
+        finally:
+            shutdown_training_pool()
+
+        for product_id in catalogue:
+            assert parallel['products'][product_id]['ets']['mae'] == pytest.approx(
+                sequential['products'][product_id]['ets']['mae']
+            )
+
+    def test_unknown_family_rejected(self, catalogue):
+        """Une famille inconnue est refusée avant tout calcul"""
+        with pytest.raises(ValueError):
+            run_backtest(catalogue, ['arima'], horizon=7, folds=2)
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_failed_task_skipped_locally_and_in_pool(self, workers, monkeypatch):
+        """Une tâche en échec ne produit aucun fold sans interrompre les autres produits"""
+        monkeypatch.setattr(settings, 'training_workers', workers)
+        monkeypatch.setattr(settings, 'parallel_training_min_products', 2)
+        tasks = [(fold_task, ('P001',)), (fold_task, ('BAD',)), (fold_task, ('P002',))]
+        try:
+            results = backtesting._run_tasks(tasks)
+        finally:
+            shutdown_training_pool()
+
+        assert results == [[{'product_id': 'P001'}], [], [{'product_id': 'P002'}]]
@@ -0,0 +1,275 @@
+"""
+Tests pour le gestionnaire de données
+"""
+
+import threading
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.data_manager import DataManager
+from app.validators import ValidationError
+
+
+def make_sales(products=('P001', 'P002'), days: int = 30) -> pd.DataFrame:
+    """Historique de ventes synthétique au format CSV d'upload"""
+    dates = pd.date_range('2024-01-01', periods=days, freq='D')
+    frames = [
+        pd.DataFrame({
+            'product_id': product_id,
+            'date': dates.strftime('%Y-%m-%d'),
+            'quantity': (np.arange(days) % 7) + i + 1
+        })
+        for i, product_id in enumerate(products)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Gestionnaire de données isolé dans un répertoire temporaire"""
+    monkeypatch.setattr(settings, 'data_dir', str(tmp_path / 'data'))
+    return DataManager()
+
+
+def upload(manager, df: pd.DataFrame, tmp_path, name: str = 'sales.csv'):
+    """Écrit le DataFrame en CSV puis le charge"""
+    filepath = tmp_path / name
+    df.to_csv(filepath, index=False)
+    return manager.load_sales_data(str(filepath))
+
+
+class TestChangeDetection:
+    """Tests de la détection des produits modifiés"""
+
+    def test_first_upload_marks_all_changed(self, manager, tmp_path):
+        """Au premier chargement tous les produits sont nouveaux"""
+        stats = upload(manager, make_sales(), tmp_path)
+
+        assert sorted(manager.changed_products) == ['P001', 'P002']
+        assert stats['products_changed'] == 2
+
+    def test_reupload_only_marks_modified_products(self, manager, tmp_path):
+        """Un re-upload ne signale que les produits dont la série a changé"""
+        sales = make_sales()
+        upload(manager, sales, tmp_path)
+
+        modified = sales.copy()
+        modified.loc[modified['product_id'] == 'P002', 'quantity'] += 1
+        upload(manager, modified, tmp_path, 'sales_v2.csv')
+
+        assert manager.changed_products == ['P002']
+
+    def test_removed_product_is_changed(self, manager, tmp_path):
+        """Un produit absent du nouvel upload est signalé"""
+        upload(manager, make_sales(), tmp_path)
+        upload(manager, make_sales(products=('P001',)), tmp_path, 'sales_v2.csv')
+
+        assert manager.changed_products == ['P002']
+
+
+class TestDemandProfiles:
+    """Tests de la classification de la demande à l'ingestion"""
+
+    def test_profiles_computed_at_ingest(self, manager, tmp_path):
+        """Chaque produit reçoit ADI, CV² et une classe de demande"""
+        sales = make_sales(days=60)
+        sparse = sales['product_id'] == 'P002'
+        # P002 ne vend qu'un jour sur cinq
+        sales.loc[sparse, 'quantity'] = np.where(np.arange(sparse.sum()) % 5 == 0, 4, 0)
+        upload(manager, sales, tmp_path)
+
+        assert manager.demand_profiles['P001']['demand_class'] == 'smooth'
+        assert manager.demand_profiles['P002']['demand_class'] == 'intermittent'
+        assert manager.demand_profiles['P002']['adi'] == pytest.approx(60 / 12, rel=0.05)
+
+    def test_missing_days_count_as_zero_demand(self, manager, tmp_path):
+        """Les jours absents du CSV comptent comme des jours sans vente"""
+        sales = make_sales(products=('P001',), days=60)
+        upload(manager, sales.iloc[::4], tmp_path)
+
+        assert manager.demand_profiles['P001']['adi'] == pytest.approx(57 / 15, rel=0.01)
+        assert manager.demand_profiles['P001']['zero_ratio'] > 0.7
+
+
+class TestChunkedIngestion:
+    """Tests de l'ingestion par blocs avec pré-agrégation journalière"""
+
+    def test_chunks_match_single_read(self, manager, tmp_path, monkeypatch):
+        """Colonnes renommées et superflues ignorées; totaux du jour fusionnés entre blocs"""
+        sales = make_sales(products=('P001', 'P002'), days=10)
+        export = pd.concat([sales, sales.iloc[::3]]).sample(frac=1, random_state=0)
+        export = export.rename(columns={
+            'product_id': 'reference_article', 'date': 'date_vente', 'quantity': 'quantite_vendue'
+        }).assign(store='S1')
+        monkeypatch.setattr(settings, 'ingest_chunk_rows', 4)
+
+        stats = upload(manager, export, tmp_path)
+
+        expected = pd.concat([sales, sales.iloc[::3]]).groupby(['product_id', 'date'])['quantity'].sum()
+        assert stats['total_records'] == len(export)
+        assert stats['products_count'] == 2
+        assert list(manager.sales_data.columns) == ['product_id', 'date', 'quantity']
+        assert manager.sales_data['quantity'].tolist() == expected.tolist()
+
+    def test_partial_totals_merge_logarithmically(self, manager, tmp_path, monkeypatch):
+        """L'agrégat fusionné n'est pas refusionné à chaque bloc: nombre de fusions logarithmique"""
+        monkeypatch.setattr(settings, 'ingest_chunk_rows', 4)
+        merges = []
+        merge = DataManager._merge_daily_totals
+        monkeypatch.setattr(DataManager, '_merge_daily_totals', staticmethod(
+            lambda partials: merges.append(len(partials)) or merge(partials)
+        ))
+
+        sales = make_sales(products=('P001', 'P002'), days=200)  # 100 blocs, aucun doublon
+        upload(manager, sales, tmp_path)
+
+        assert len(manager.sales_data) == len(sales)
+        assert len(merges) <= 10
+
+    def test_invalid_chunk_rejects_upload(self, manager, tmp_path, monkeypatch):
+        """Une quantité négative dans un bloc rejette tout le fichier"""
+        sales = make_sales(days=10)
+        sales.loc[15, 'quantity'] = -1
+        monkeypatch.setattr(settings, 'ingest_chunk_rows', 4)
+
+        with pytest.raises(ValidationError, match="négatives"):
+            upload(manager, sales, tmp_path)
+        assert manager.sales_data is None
+
+
+class TestProductIndex:
+    """Tests de l'index des plages de lignes par produit"""
+
+    def test_lookups_are_sorted_daily_slices(self, manager, tmp_path):
+        """Lignes mélangées et doublons du jour: séries triées, agrégées, sans copie"""
+        sales = make_sales(products=('P001', 'P002', 'P003'), days=10)
+        duplicate = sales[sales['product_id'] == 'P002'].head(1)
+        upload(manager, pd.concat([sales, duplicate]).sample(frac=1, random_state=0), tmp_path)
+
+        series = manager.prepare_forecast_data('P002')
+
+        assert series['ds'].is_monotonic_increasing
+        assert len(series) == 10
+        assert series['y'].iloc[0] == 2 * sales.loc[sales['product_id'] == 'P002', 'quantity'].iloc[0]
+        assert np.shares_memory(series['y'].to_numpy(), manager.daily_data['y'].to_numpy())
+        assert set(manager.get_product_data('P003')['product_id']) == {'P003'}
+        with pytest.raises(ValueError, match="non trouvé"):
+            manager.prepare_forecast_data('P999')
+
+
+    def test_readers_never_mix_snapshots(self, manager, tmp_path):
+        """Pendant des re-uploads, une série lue appartient toujours au produit demandé"""
+        # P002 change de position selon l'upload: P001 présent ou non
+        with_p001 = make_sales(products=('P001', 'P002'), days=30)
+        without_p001 = make_sales(products=('P002',), days=30).assign(quantity=lambda df: df['quantity'] + 1)
+        upload(manager, with_p001, tmp_path)
+        expected = {
+            tuple(with_p001.loc[with_p001['product_id'] == 'P002', 'quantity'].astype(float)),
+            tuple(without_p001['quantity'].astype(float))
+        }
+        stop, seen = threading.Event(), []
+
+        def read():
+            while not stop.is_set():
+                seen.append(tuple(manager.prepare_forecast_data('P002')['y']))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for i in range(10):
+            manager._index_sales_data(without_p001 if i % 2 == 0 else with_p001)
+        stop.set()
+        reader.join()
+
+        assert seen and set(seen) <= expected
+
+
+class TestProductListing:
+    """Tests de la table des statistiques produits et de la liste paginée"""
+
+    def test_stats_table_matches_per_product_statistics(self, manager, tmp_path):
+        """Une agrégation groupée donne les mêmes statistiques qu'un calcul par produit"""
+        sales = make_sales(products=('P001', 'P002'), days=30)
+        upload(manager, sales, tmp_path)
+
+        quantity = sales.loc[sales['product_id'] == 'P002', 'quantity']
+        stats = manager.get_product_statistics('P002')
+
+        assert stats['total_observations'] == 30
+        assert stats['sales']['median'] == quantity.median()
+        assert stats['sales']['std'] == pytest.approx(quantity.std())
+        assert stats['variability']['iqr'] == quantity.quantile(0.75) - quantity.quantile(0.25)
+        assert manager.products_cache['P002'] == stats
+
+    def test_query_sorts_filters_and_paginates(self, manager, tmp_path):
+        """Filtres combinés, tri décroissant puis page demandée; total avant pagination"""
+        upload(manager, make_sales(products=('P001', 'P002', 'P003', 'X004'), days=20), tmp_path)
+
+        total, page = manager.query_products(
+            offset=1, limit=1, sort_by='total_sales', descending=True,
+            filters=['total_sales:gt:80'], search='p'
+        )
+
+        assert total == 2  # P002 et P003 (P001 sous le seuil, X004 hors recherche)
+        assert [product['product_id'] for product in page] == ['P002']
+        assert page[0]['date_range_end'] == '2024-01-20'
+
+    def test_query_rejects_unknown_field(self, manager, tmp_path):
+        """Un champ ou un opérateur inconnu est une erreur de requête"""
+        upload(manager, make_sales(), tmp_path)
+
+        with pytest.raises(ValueError, match="Champ de tri inconnu"):
+            manager.query_products(sort_by='colour')
+        with pytest.raises(ValueError, match="Opérateur inconnu"):
+            manager.query_products(filters=['total_sales:about:10'])
+
+
+class TestSalesStorage:
+    """Tests du stockage Parquet partitionné par seau de produits"""
+
+    def test_restart_reloads_typed_data(self, manager, tmp_path):
+        """Un nouveau gestionnaire relit les mêmes ventes, colonnes typées, sans produit modifié"""
+        upload(manager, make_sales(products=('1001', 'P002')), tmp_path)
+
+        restarted = DataManager()
+        assert restarted.load_saved_data()
+
+        assert restarted.product_fingerprints == manager.product_fingerprints
+        assert restarted.changed_products == []
+        assert restarted.sales_data['quantity'].dtype == np.float64
+        assert set(restarted.sales_data['product_id']) == {'1001', 'P002'}
+        assert not (manager.data_dir / 'sales_data.csv').exists()
+
+    def test_upload_rewrites_only_touched_buckets(self, manager, tmp_path, monkeypatch):
+        """Un re-upload ne réécrit que le seau du produit modifié"""
+        monkeypatch.setattr(settings, 'storage_buckets', 8)
+        sales = make_sales(products=tuple(f"P{i:03d}" for i in range(20)))
+        upload(manager, sales, tmp_path)
+        store_dir = manager.data_dir / 'sales'
+        written_at = {path.name: path.stat().st_mtime_ns for path in store_dir.glob('*.parquet')}
+
+        sales.loc[sales['product_id'] == 'P007', 'quantity'] += 1
+        upload(manager, sales, tmp_path, 'sales_v2.csv')
+
+        rewritten = [
+            path.name for path in store_dir.glob('*.parquet')
+            if path.stat().st_mtime_ns != written_at[path.name]
+        ]
+        assert len(written_at) > 1
+        assert len(rewritten) == 1
+        assert len(manager._sales_store().load()) == len(sales)
+
+    def test_legacy_csv_is_migrated(self, manager, tmp_path, monkeypatch):
+        """Des données sauvegardées en CSV sont relues puis migrées en Parquet"""
+        monkeypatch.setattr(settings, 'storage_format', 'csv')
+        upload(manager, make_sales(), tmp_path)
+        assert (manager.data_dir / 'sales_data.csv').exists()
+
+        monkeypatch.setattr(settings, 'storage_format', 'parquet')
+        restarted = DataManager()
+        assert restarted.load_saved_data()
+
+        assert restarted._sales_store().exists()
+        assert restarted.product_fingerprints == manager.product_fingerprints
@@ -0,0 +1,70 @@
+"""
+Tests pour les exécuteurs bornés des endpoints
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.executors import BoundedExecutor
+
+
+class TestBoundedExecutor:
+    """Tests du déport du travail bloquant hors de la boucle asyncio"""
+
+    def test_event_loop_not_blocked(self):
+        """Une tâche bloquante laisse la boucle servir les coroutines rapides"""
+        executor = BoundedExecutor('test', max_workers=1, max_pending=4)
+
+        async def scenario():
+            slow = asyncio.ensure_future(executor.run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            cheap_latency = time.perf_counter() - start
+            await slow
+            return cheap_latency
+
+        try:
+            assert asyncio.run(scenario()) < 0.2
+        finally:
+            executor.shutdown()
+
+    def test_rejects_when_saturated(self):
+        """Au-delà de max_pending, la demande est refusée avec un 503"""
+        executor = BoundedExecutor('test', max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def scenario():
+            busy = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await executor.run(lambda: None)
+            finally:
+                release.set()
+                await busy
+            return exc_info.value.status_code
+
+        try:
+            assert asyncio.run(scenario()) == 503
+            assert executor.stats()['pending'] == 0
+        finally:
+            executor.shutdown()
+
+    def test_returns_result_and_propagates_errors(self):
+        """Le résultat et les exceptions de la fonction reviennent à l'appelant"""
+        executor = BoundedExecutor('test', max_workers=2, max_pending=4)
+
+        def fail():
+            raise ValueError("boom")
+
+        try:
+            assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+            with pytest.raises(ValueError):
+                asyncio.run(executor.run(fail))
+        finally:
+            executor.shutdown()
@@ -0,0 +1,773 @@
+"""
+Tests pour le moteur de prévision
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from prophet import Prophet
+
+from app.clustering import SeasonalClusters
+from app.concurrency import FileLock, LockTimeout
+from app.config import settings
+from app.data_utils import series_fingerprint
+from app.schemas import ColumnarForecastResponse
+from app.forecasting import (
+    ForecastEngine, ExponentialSmoothingForecaster, IntermittentDemandForecaster,
+    GlobalPanelForecaster
+)
+from app.training_pool import fit_prophet, shutdown_training_pool
+
+
+def make_series(days: int = 60, level: float = 10.0, seed: int = 0) -> pd.DataFrame:
+    """Série journalière synthétique avec saisonnalité hebdomadaire"""
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range('2024-01-01', periods=days, freq='D')
+    weekly = 1 + 0.3 * np.sin(2 * np.pi * ds.dayofweek / 7)
+    y = rng.poisson(level * weekly).astype(float) + 1
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+class TestParallelTraining:
+    """Tests de l'entraînement parallèle"""
+
+    def test_train_models_parallel(self, engine, monkeypatch):
+        """Les modèles entraînés dans le pool reviennent dans le cache et sur disque"""
+        monkeypatch.setattr(settings, 'training_workers', 2)
+        monkeypatch.setattr(settings, 'parallel_training_min_products', 2)
+        series = {f"P{i:03d}": make_series(seed=i) for i in range(3)}
+
+        try:
+            models = engine.train_models_parallel(series)
+        finally:
+            shutdown_training_pool()
+
+        assert set(models) == set(series)
+        for product_id in series:
+            assert product_id in engine.trained_models
+            assert (engine.models_dir / f"{product_id}_model.json").exists()
+
+    def test_train_models_parallel_skips_invalid(self, engine, monkeypatch):
+        """Les produits sans données suffisantes sont ignorés"""
+        monkeypatch.setattr(settings, 'training_workers', 1)
+        series = {'P001': make_series(days=3)}
+
+        models = engine.train_models_parallel(series)
+
+        assert models == {}
+        assert 'P001' not in engine.trained_models
+
+
+class TestDataVersioning:
+    """Tests de l'invalidation des modèles selon l'empreinte des données"""
+
+    def _count_trainings(self, engine, monkeypatch):
+        calls = []
+        original = engine._train_new_model
+
+        def counting_train(product_id, data, fingerprint=None):
+            calls.append(product_id)
+            return original(product_id, data, fingerprint)
+
+        monkeypatch.setattr(engine, '_train_new_model', counting_train)
+        return calls
+
+    def test_same_data_reuses_model(self, engine, monkeypatch):
+        """Une série identique ne déclenche pas de réentraînement"""
+        calls = self._count_trainings(engine, monkeypatch)
+        data = make_series()
+
+        engine._get_or_train_model('P001', data)
+        engine._get_or_train_model('P001', data.copy())
+
+        assert calls == ['P001']
+
+    def test_changed_data_retrains(self, engine, monkeypatch):
+        """Une série modifiée invalide le modèle en cache et sur disque"""
+        calls = self._count_trainings(engine, monkeypatch)
+        data = make_series()
+        engine._get_or_train_model('P001', data)
+
+        changed = data.copy()
+        changed.loc[changed.index[-1], 'y'] += 5
+        engine._get_or_train_model('P001', changed)
+
+        assert calls == ['P001', 'P001']
+
+    def test_saved_model_reused_after_restart(self, engine, monkeypatch):
+        """Un nouveau moteur recharge le modèle sauvegardé si les données n'ont pas changé"""
+        data = make_series()
+        engine._get_or_train_model('P001', data)
+
+        restarted = ForecastEngine()
+        calls = self._count_trainings(restarted, monkeypatch)
+        restarted._get_or_train_model('P001', data)
+
+        assert calls == []
+        assert restarted._read_model_meta('P001')['fingerprint'] == series_fingerprint(data)
+
+    def test_invalidate_products(self, engine):
+        """L'invalidation retire le modèle de la mémoire"""
+        engine._get_or_train_model('P001', make_series())
+
+        engine.invalidate_products(['P001'])
+
+        assert 'P001' not in engine.trained_models
+
+
+class TestSeriesFingerprint:
+    """Tests de l'empreinte des séries"""
+
+    def test_fingerprint_ignores_dtype(self):
+        """Quantités entières ou flottantes donnent la même empreinte"""
+        data = make_series()
+        as_int = data.assign(y=data['y'].astype(int))
+
+        assert series_fingerprint(data) == series_fingerprint(as_int)
+
+    def test_fingerprint_detects_change(self):
+        """Une quantité modifiée change l'empreinte"""
+        data = make_series()
+        changed = data.copy()
+        changed.loc[0, 'y'] += 1
+
+        assert series_fingerprint(data) != series_fingerprint(changed)
+
+
+class TestForecastCache:
+    """Tests du cache des prévisions"""
+
+    def _count_forecasts(self, engine, monkeypatch):
+        calls = []
+        original = engine.generate_forecast_frame
+
+        def counting_forecast(product_id, historical_data, horizon_days=30, *args, **kwargs):
+            calls.append((product_id, horizon_days))
+            return original(product_id, historical_data, horizon_days, *args, **kwargs)
+
+        monkeypatch.setattr(engine, 'generate_forecast_frame', counting_forecast)
+        return calls
+
+    def test_cache_hit_skips_prophet(self, engine, monkeypatch):
+        """Une requête identique est servie depuis le cache"""
+        calls = self._count_forecasts(engine, monkeypatch)
+        data = make_series()
+
+        first = engine.get_forecast_response('P001', data, 14)
+        second = engine.get_forecast_response('P001', data.copy(), 14)
+
+        assert first == second
+        assert len(first['forecasts']) == 14
+        assert calls == [('P001', 14)]
+        assert engine.forecast_cache_stats()['hits'] == 1
+
+    def test_cache_key_includes_horizon_and_data(self, engine, monkeypatch):
+        """Un autre horizon ou des données modifiées provoquent un miss"""
+        calls = self._count_forecasts(engine, monkeypatch)
+        data = make_series()
+        changed = data.copy()
+        changed.loc[0, 'y'] += 1
+
+        engine.get_forecast_response('P001', data, 14)
+        engine.get_forecast_response('P001', data, 7)
+        engine.get_forecast_response('P001', changed, 14)
+
+        assert len(calls) == 3
+
+    def test_cache_key_includes_model_configuration(self, engine, monkeypatch):
+        """Des priors, une famille ou un mode d'incertitude différents provoquent un miss"""
+        calls = self._count_forecasts(engine, monkeypatch)
+        data = make_series()
+
+        engine.get_forecast_response('P001', data, 14)
+        engine.save_tuned_config('P001', {'params': {'changepoint_prior_scale': 0.01}, 'mae': 1.0})
+        engine.get_forecast_response('P001', data, 14)
+        monkeypatch.setattr(settings, 'forecast_model_overrides', {'P001': 'naive'})
+        engine.get_forecast_response('P001', data, 14)
+        monkeypatch.setattr(settings, 'prophet_uncertainty_mode', 'analytic')
+        monkeypatch.setattr(settings, 'forecast_model_overrides', {})
+        engine.get_forecast_response('P001', data, 14)
+
+        assert len(calls) == 4
+
+    def test_invalidation_clears_cached_forecasts(self, engine, monkeypatch):
+        """Le nettoyage du cache d'un produit force une nouvelle prévision"""
+        calls = self._count_forecasts(engine, monkeypatch)
+        data = make_series()
+
+        engine.get_forecast_response('P001', data, 14)
+        engine.clear_cache('P001')
+        engine.get_forecast_response('P001', data, 14)
+
+        assert len(calls) == 2
+
+
+class TestHorizonSlicing:
+    """Tests du découpage d'une prévision à horizon maximal"""
+
+    def test_single_predict_for_all_horizons(self, engine, monkeypatch):
+        """Plusieurs horizons ne déclenchent qu'un seul appel à predict"""
+        calls = []
+        original = engine._predict_quantiles
+
+        def counting_predict(model, future, quality_metrics):
+            calls.append(len(future))
+            return original(model, future, quality_metrics)
+
+        data = make_series()
+        engine._get_or_train_model('P001', data)
+        monkeypatch.setattr(engine, '_predict_quantiles', counting_predict)
+
+        short_points, _ = engine.generate_forecast('P001', data, 7)
+        long_points, _ = engine.generate_forecast('P001', data, 60)
+
+        # Une seule prédiction, sur les dates futures uniquement
+        assert calls == [settings.max_forecast_horizon]
+        assert len(short_points) == 7
+        assert len(long_points) == 60
+        assert short_points == long_points[:7]
+
+
+class TestTrainTimeMetrics:
+    """Tests des métriques in-sample calculées à l'entraînement"""
+
+    def test_metrics_saved_with_model(self, engine):
+        """Les métriques sont sauvegardées à côté du modèle et reprises dans les métadonnées"""
+        data = make_series()
+
+        _, metadata = engine.generate_forecast('P001', data, 7)
+
+        meta = engine._read_model_meta('P001')
+        assert meta['quality_metrics'] == metadata['quality_metrics']
+        assert isinstance(meta['quality_metrics']['mae'], float)
+
+    def test_prediction_independent_of_history_length(self, engine, monkeypatch):
+        """La taille du DataFrame prédit ne dépend pas de la longueur de l'historique"""
+        sizes = []
+        original = engine._predict_quantiles
+
+        def recording_predict(model, future, quality_metrics):
+            sizes.append(len(future))
+            return original(model, future, quality_metrics)
+
+        for product_id, days in [('SHORT', 30), ('LONG', 400)]:
+            engine._get_or_train_model(product_id, make_series(days=days))
+        monkeypatch.setattr(engine, '_predict_quantiles', recording_predict)
+
+        engine.generate_forecast('SHORT', make_series(days=30), 7)
+        engine.generate_forecast('LONG', make_series(days=400), 7)
+
+        assert sizes[0] == sizes[1] == settings.max_forecast_horizon
+
+
+class TestExponentialSmoothing:
+    """Tests de la famille de modèles par lissage exponentiel vectorisé"""
+
+    def test_forecast_batch_shapes_and_quantiles(self):
+        """Une prévision par produit, quantiles ordonnés et positifs"""
+        series = {f"P{i:03d}": make_series(days=90 + 10 * i, seed=i) for i in range(5)}
+
+        predictions = ExponentialSmoothingForecaster().forecast_batch(series, 30)
+
+        assert set(predictions) == set(series)
+        for prediction in predictions.values():
+            assert len(prediction['ds']) == len(prediction['p50']) == 30
+            assert np.all(prediction['p10'] >= 0)
+            assert np.all(prediction['p10'] <= prediction['p50'])
+            assert np.all(prediction['p50'] <= prediction['p90'])
+            assert prediction['model_used'].startswith('ExponentialSmoothing')
+
+    def test_forecast_starts_after_last_date(self):
+        """Chaque série prévoit à partir du lendemain de sa propre dernière date"""
+        series = {'SHORT': make_series(days=40), 'LONG': make_series(days=120)}
+
+        predictions = ExponentialSmoothingForecaster().forecast_batch(series, 7)
+
+        for product_id, data in series.items():
+            first_day = pd.Timestamp(predictions[product_id]['ds'][0])
+            assert first_day == data['ds'].max() + pd.Timedelta(days=1)
+
+    def test_seasonal_pattern_captured(self):
+        """Une saisonnalité hebdomadaire marquée est reproduite dans la prévision"""
+        ds = pd.date_range('2024-01-01', periods=140, freq='D')
+        y = np.where(ds.dayofweek >= 5, 30.0, 10.0)
+        series = {'P001': pd.DataFrame({'ds': ds, 'y': y})}
+
+        prediction = ExponentialSmoothingForecaster().forecast_batch(series, 14)['P001']
+
+        weekend = pd.DatetimeIndex(prediction['ds']).dayofweek >= 5
+        assert prediction['p50'][weekend].min() > prediction['p50'][~weekend].max()
+
+    def test_engine_override_uses_ets(self, engine, monkeypatch):
+        """Une surcharge par produit route la prévision vers le lissage exponentiel"""
+        monkeypatch.setattr(settings, 'forecast_model_overrides', {'P001': 'ets'})
+
+        points, metadata = engine.generate_forecast('P001', make_series(), 14)
+
+        assert len(points) == 14
+        assert metadata['model_used'].startswith('ExponentialSmoothing')
+        assert 'P001' not in engine.trained_models
+
+    def test_unknown_family_rejected(self, engine, monkeypatch):
+        """Une famille de modèle inconnue est signalée"""
+        monkeypatch.setattr(settings, 'forecast_model', 'arima')
+
+        with pytest.raises(HTTPException) as exc_info:
+            engine.generate_forecast('P001', make_series(), 7)
+
+        assert exc_info.value.status_code == 422
+
+
+def make_intermittent_series(days: int = 120, every: int = 6, seed: int = 0) -> pd.DataFrame:
+    """Série journalière avec une vente tous les `every` jours en moyenne"""
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range('2024-01-01', periods=days, freq='D')
+    sold = rng.random(days) < 1 / every
+    sold[-1] = True
+    y = np.where(sold, rng.integers(1, 8, days), 0).astype(float)
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+class TestIntermittentDemand:
+    """Tests du routage et des prévisions Croston/TSB"""
+
+    @pytest.mark.parametrize('method', ['croston', 'tsb'])
+    def test_rate_matches_average_demand(self, method):
+        """Le taux prévu est proche de la demande journalière moyenne"""
+        data = make_intermittent_series(days=365)
+
+        prediction = IntermittentDemandForecaster(method=method).forecast_batch({'P001': data}, 14)['P001']
+
+        assert len(prediction['p50']) == 14
+        assert np.all(prediction['p50'] == prediction['p50'][0])
+        assert prediction['p50'][0] == pytest.approx(data['y'].mean(), rel=0.5)
+        assert np.all(prediction['p10'] <= prediction['p50'])
+        assert np.all(prediction['p50'] <= prediction['p90'])
+
+    def test_intermittent_series_routed_without_prophet(self, engine, monkeypatch):
+        """Une série intermittente est routée vers TSB sans entraîner Prophet"""
+        monkeypatch.setattr(settings, 'intermittent_method', 'tsb')
+        monkeypatch.setattr(engine, '_train_new_model', lambda *args: pytest.fail("Prophet entraîné"))
+
+        _, metadata = engine.generate_forecast('P001', make_intermittent_series(), 14)
+
+        assert metadata['model_used'] == 'TSB'
+        assert metadata['demand_profile']['demand_class'] in ('intermittent', 'lumpy')
+        assert metadata['routing'] == {'model_family': 'intermittent', 'reason': 'demand_class'}
+
+    def test_smooth_series_keeps_default_family(self, engine):
+        """Une série régulière suit la famille de modèle par défaut"""
+        _, metadata = engine.generate_forecast('P001', make_series(), 7)
+
+        assert metadata['demand_profile']['demand_class'] == 'smooth'
+        assert metadata['routing'] == {'model_family': 'prophet', 'reason': 'default'}
+
+    def test_override_beats_demand_class(self, engine, monkeypatch):
+        """Une surcharge par produit l'emporte sur la classe de demande"""
+        monkeypatch.setattr(settings, 'forecast_model_overrides', {'P001': 'ets'})
+
+        _, metadata = engine.generate_forecast('P001', make_intermittent_series(), 7)
+
+        assert metadata['routing'] == {'model_family': 'ets', 'reason': 'override'}
+
+    def test_prepare_batch_groups_by_family(self, engine, monkeypatch):
+        """Le lot est réparti entre Croston/TSB et Prophet selon les profils"""
+        trained = []
+        monkeypatch.setattr(engine, 'train_models_parallel', lambda series: trained.extend(series))
+        series = {'SMOOTH': make_series(), 'SPARSE': make_intermittent_series()}
+
+        engine.prepare_batch(series)
+
+        assert trained == ['SMOOTH']
+        assert any(key.startswith('prediction:intermittent:SPARSE') for key in engine._forecast_keys['SPARSE'])
+
+
+class TestSingleFlightTraining:
+    """Tests de l'entraînement unique par produit entre threads et workers"""
+
+    def _count_trainings(self, engine, monkeypatch):
+        calls = []
+        original = engine._train_new_model
+
+        def counting_train(product_id, data, fingerprint=None):
+            calls.append(product_id)
+            return original(product_id, data, fingerprint)
+
+        monkeypatch.setattr(engine, '_train_new_model', counting_train)
+        return calls
+
+    def test_concurrent_requests_share_one_fit(self, engine, monkeypatch):
+        """Des requêtes simultanées sur un produit froid ne déclenchent qu'un entraînement"""
+        calls = self._count_trainings(engine, monkeypatch)
+        data = make_series()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(
+                lambda _: engine._get_or_train_model('P001', data.copy()), range(8)
+            ))
+
+        assert calls == ['P001']
+        assert all(model is models[0] for model in models)
+
+    def test_waits_for_other_worker(self, engine, monkeypatch):
+        """Un worker qui trouve le verrou pris reprend le modèle entraîné par l'autre"""
+        data = make_series()
+        other_worker = ForecastEngine()
+        calls = self._count_trainings(engine, monkeypatch)
+
+        training_lock = engine._training_lock('P001')
+        training_lock.acquire()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiting = executor.submit(engine._get_or_train_model, 'P001', data)
+            time.sleep(0.3)
+            assert not waiting.done()
+
+            # L'autre worker termine son entraînement puis libère le verrou
+            other_worker._train_new_model('P001', data, series_fingerprint(data))
+            training_lock.release()
+            waiting.result(timeout=30)
+
+        assert calls == []
+
+    def test_batch_defers_products_locked_elsewhere(self, engine, monkeypatch):
+        """Le pool n'entraîne pas un produit déjà en cours d'entraînement ailleurs"""
+        monkeypatch.setattr(settings, 'training_workers', 2)
+        monkeypatch.setattr(settings, 'parallel_training_min_products', 1)
+        pooled = []
+        monkeypatch.setattr(engine, '_train_in_pool', lambda to_train, *args: pooled.extend(to_train))
+        deferred = []
+        monkeypatch.setattr(engine, '_get_or_train_model', lambda product_id, *args: deferred.append(product_id))
+
+        training_lock = engine._training_lock('P001')
+        training_lock.acquire()
+        try:
+            engine.train_models_parallel({'P001': make_series(seed=1), 'P002': make_series(seed=2)})
+        finally:
+            training_lock.release()
+
+        assert pooled == ['P002']
+        assert deferred == ['P001']
+
+
+class TestFileLock:
+    """Tests du verrou fichier inter-processus"""
+
+    def test_non_blocking_acquire(self, tmp_path):
+        """Un second verrou sur le même fichier échoue tant que le premier est tenu"""
+        first, second = FileLock(tmp_path / 'p.lock'), FileLock(tmp_path / 'p.lock')
+
+        with first:
+            assert not second.acquire(blocking=False)
+        assert second.acquire(blocking=False)
+        second.release()
+
+    def test_timeout(self, tmp_path):
+        """L'attente est bornée par le timeout"""
+        with FileLock(tmp_path / 'p.lock'):
+            with pytest.raises(LockTimeout):
+                FileLock(tmp_path / 'p.lock', timeout=0.1).acquire()
+
+
+class TestColumnarForecast:
+    """Tests de la prévision en colonnes"""
+
+    def test_frame_matches_points(self, engine):
+        """Le DataFrame et les ForecastPoint portent les mêmes valeurs"""
+        data = make_series()
+
+        frame, _ = engine.generate_forecast_frame('P001', data, 14)
+        points, _ = engine.generate_forecast('P001', data, 14)
+
+        assert list(frame.columns) == ['date', 'p10', 'p50', 'p90']
+        assert len(frame) == 14
+        assert [point.p50 for point in points] == frame['p50'].tolist()
+        assert points[0].date == frame['date'].iloc[0].date()
+
+    def test_columnar_response(self, engine):
+        """Le format colonnes est valide et cohérent avec le format par points"""
+        data = make_series()
+
+        columnar = engine.get_forecast_response('P001', data, 14, response_format='columnar')
+        points = engine.get_forecast_response('P001', data, 14)
+
+        ColumnarForecastResponse(**columnar)
+        assert columnar['forecasts']['date'] == [point['date'] for point in points['forecasts']]
+        assert columnar['forecasts']['p90'] == [point['p90'] for point in points['forecasts']]
+
+    def test_unknown_format_rejected(self, engine):
+        """Un format de réponse inconnu est refusé"""
+        with pytest.raises(ValueError):
+            engine.get_forecast_response('P001', make_series(), 14, response_format='csv')
+
+
+class TestUncertaintyModes:
+    """Tests des modes de calcul de l'incertitude Prophet"""
+
+    def _quantiles(self, engine, data):
+        frame, _ = engine.generate_forecast_frame('P001', data, 30)
+        return frame
+
+    def test_sampling_quantiles_from_one_matrix(self, engine, monkeypatch):
+        """En mode sampling, une seule matrice de trajectoires fournit tous les quantiles"""
+        monkeypatch.setattr(settings, 'prophet_uncertainty_samples', 200)
+        calls = []
+        original = Prophet.predictive_samples
+
+        def counting_samples(model, df, *args, **kwargs):
+            calls.append(model.uncertainty_samples)
+            return original(model, df, *args, **kwargs)
+
+        data = make_series(days=120)
+        engine._get_or_train_model('P001', data)
+        monkeypatch.setattr(Prophet, 'predictive_samples', counting_samples)
+
+        frame = self._quantiles(engine, data)
+
+        assert calls == [200]
+        assert (frame['p10'] <= frame['p50']).all()
+        assert (frame['p50'] <= frame['p90']).all()
+
+    def test_analytic_skips_sampling(self, engine, monkeypatch):
+        """En mode analytic, aucune trajectoire n'est simulée et l'intervalle suit le RMSE"""
+        monkeypatch.setattr(settings, 'prophet_uncertainty_mode', 'analytic')
+        data = make_series(days=120)
+        engine._get_or_train_model('P001', data)
+        monkeypatch.setattr(
+            Prophet, 'predictive_samples', lambda *args, **kwargs: pytest.fail("simulation")
+        )
+
+        frame = self._quantiles(engine, data)
+
+        rmse = engine._read_model_meta('P001')['quality_metrics']['rmse']
+        width = (frame['p90'] - frame['p10'])[frame['p10'] > 0]
+        assert width.to_numpy() == pytest.approx(2 * 1.2816 * rmse, abs=0.05)
+
+    def test_mode_is_part_of_prediction_cache_key(self, engine, monkeypatch):
+        """Changer de mode ne sert pas une prévision calculée dans l'autre mode"""
+        data = make_series(days=120)
+        sampled = self._quantiles(engine, data)
+        monkeypatch.setattr(settings, 'prophet_uncertainty_mode', 'analytic')
+
+        analytic = self._quantiles(engine, data)
+
+        assert not analytic['p90'].equals(sampled['p90'])
+
+
+class TestWarmStart:
+    """Tests du réentraînement à chaud"""
+
+    def _retrain_with_new_days(self, engine):
+        data = make_series(days=120)
+        engine._get_or_train_model('P001', data.iloc[:-3])
+        _, metadata = engine.generate_forecast('P001', data, 7)
+        return metadata
+
+    def test_first_fit_is_cold(self, engine):
+        """Sans modèle précédent, l'entraînement part de zéro"""
+        _, metadata = engine.generate_forecast('P001', make_series(), 7)
+
+        assert metadata['training']['path'] == 'cold'
+        assert metadata['training']['iterations'] > 0
+
+    def test_new_days_retrain_warm(self, engine):
+        """Quelques jours de ventes en plus: l'optimiseur repart du modèle précédent"""
+        metadata = self._retrain_with_new_days(engine)
+
+        assert metadata['training']['path'] == 'warm_start'
+        assert metadata['training']['converged'] is True
+        assert isinstance(metadata['training']['iterations'], int)
+        assert 'stan_params' in engine._read_model_meta('P001')
+
+    def test_degraded_fit_falls_back_to_cold(self, engine, monkeypatch):
+        """Un entraînement à chaud moins précis est remplacé par un entraînement à froid"""
+        monkeypatch.setattr(settings, 'warm_start_max_rmse_increase', -1.0)
+
+        metadata = self._retrain_with_new_days(engine)
+
+        assert metadata['training']['path'] == 'cold_fallback'
+        assert metadata['training']['fallback_reason'] == 'rmse_degraded'
+
+    def test_disabled(self, engine, monkeypatch):
+        """Le réentraînement à chaud peut être désactivé"""
+        monkeypatch.setattr(settings, 'warm_start_enabled', False)
+
+        metadata = self._retrain_with_new_days(engine)
+
+        assert metadata['training']['path'] == 'cold'
+
+
+def make_sales_data(series: dict) -> pd.DataFrame:
+    """Ventes brutes (format DataManager.sales_data) à partir de séries (ds, y)"""
+    return pd.concat([
+        pd.DataFrame({'product_id': product_id, 'date': data['ds'], 'quantity': data['y']})
+        for product_id, data in series.items()
+    ], ignore_index=True)
+
+
+def make_weekend_series(days: int, level: float, seed: int = 0) -> pd.DataFrame:
+    """Série dont les ventes du week-end sont trois fois plus fortes"""
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range('2024-01-01', periods=days, freq='D')
+    y = rng.poisson(level * np.where(ds.dayofweek >= 5, 3.0, 1.0)).astype(float)
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+class TestGlobalPanelModel:
+    """Tests du modèle global entraîné sur le panel de tous les produits"""
+
+    @pytest.fixture
+    def panel(self):
+        return {f"P{i:03d}": make_weekend_series(140, level=2 + 3 * i, seed=i) for i in range(6)}
+
+    def test_forecast_batch_shapes_and_quantiles(self, panel):
+        """Une prévision par produit, à partir du lendemain de sa dernière date"""
+        forecaster = GlobalPanelForecaster().fit(panel)
+
+        predictions = forecaster.forecast_batch(panel, 30)
+
+        assert set(predictions) == set(panel)
+        for product_id, prediction in predictions.items():
+            assert len(prediction['p50']) == 30
+            assert pd.Timestamp(prediction['ds'][0]) == panel[product_id]['ds'].max() + pd.Timedelta(days=1)
+            assert np.all(prediction['p10'] >= 0)
+            assert np.all(prediction['p10'] <= prediction['p50'])
+            assert np.all(prediction['p50'] <= prediction['p90'])
+            assert prediction['quality_metrics']['mae'] is not None
+
+    def test_short_series_benefits_from_panel(self, panel):
+        """Un produit à l'historique trop court reçoit le motif hebdomadaire appris sur les autres"""
+        forecaster = GlobalPanelForecaster().fit(panel)
+        newcomer = {'NEW': make_weekend_series(10, level=8, seed=42)}
+
+        prediction = forecaster.forecast_batch(newcomer, 14)['NEW']
+
+        weekend = pd.DatetimeIndex(prediction['ds']).dayofweek >= 5
+        assert prediction['p50'][weekend].mean() > 1.5 * prediction['p50'][~weekend].mean()
+        assert prediction['quality_metrics']['mae'] is None
+
+    def test_engine_serves_global_family(self, engine, panel, monkeypatch):
+        """Le modèle global est servi par generate_forecast avec le même contrat"""
+        monkeypatch.setattr(settings, 'forecast_model', 'global')
+        engine.fit_global_model(make_sales_data(panel))
+
+        points, metadata = engine.generate_forecast('P002', panel['P002'], 14)
+
+        assert len(points) == 14
+        assert metadata['model_used'].startswith('GlobalPanel')
+        assert metadata['routing']['model_family'] == 'global'
+        assert 'P002' not in engine.trained_models
+
+    def test_unfitted_global_model_rejected(self, engine, monkeypatch):
+        """Sans panel chargé, une prévision globale est refusée proprement"""
+        monkeypatch.setattr(settings, 'forecast_model', 'global')
+
+        with pytest.raises(HTTPException) as exc_info:
+            engine.generate_forecast('P001', make_series(), 7)
+
+        assert exc_info.value.status_code == 422
+
+    def test_unchanged_panel_not_retrained(self, engine, panel, monkeypatch):
+        """Le même panel ne réentraîne pas; un moteur neuf recharge le modèle sauvegardé"""
+        sales_data = make_sales_data(panel)
+        version = engine.fit_global_model(sales_data)
+
+        def fail_fit(*args, **kwargs):
+            raise AssertionError("modèle global réentraîné")
+
+        monkeypatch.setattr(GlobalPanelForecaster, 'fit', fail_fit)
+        assert engine.fit_global_model(sales_data) == version
+        assert ForecastEngine().fit_global_model(sales_data) == version
+
+
+def make_shaped_series(days: int, level: float, weekend: bool, seed: int = 0) -> pd.DataFrame:
+    """Série dont les ventes sont concentrées le week-end (ou en semaine)"""
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range('2024-01-01', periods=days, freq='D')
+    shape = np.where((ds.dayofweek >= 5) == weekend, 3.0, 0.5)
+    y = rng.poisson(level * shape).astype(float)
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+class TestClusterMode:
+    """Tests des modèles Prophet partagés par cluster de saisonnalité"""
+
+    @pytest.fixture
+    def catalogue(self):
+        return {
+            f"{'WE' if weekend else 'WD'}{i}": make_shaped_series(
+                120, level=6 + 4 * i, weekend=weekend, seed=10 * i + weekend
+            )
+            for weekend in (True, False) for i in range(4)
+        }
+
+    @pytest.fixture
+    def cluster_engine(self, engine, monkeypatch):
+        monkeypatch.setattr(settings, 'forecast_model', 'cluster')
+        engine.clusters = SeasonalClusters(n_clusters=2)
+        return engine
+
+    def test_products_grouped_by_weekly_shape(self, catalogue):
+        """Les produits de même forme hebdomadaire partagent un cluster, quel que soit leur niveau"""
+        clusters = SeasonalClusters(n_clusters=2)
+        clusters.update(catalogue, {p: series_fingerprint(d) for p, d in catalogue.items()})
+
+        weekend_clusters = {clusters.assignments[p] for p in catalogue if p.startswith('WE')}
+        weekday_clusters = {clusters.assignments[p] for p in catalogue if p.startswith('WD')}
+        assert len(weekend_clusters) == len(weekday_clusters) == 1
+        assert weekend_clusters != weekday_clusters
+
+    def test_incremental_reassignment(self, catalogue, monkeypatch):
+        """Un produit modifié est réaffecté seul, sans regrouper tout le catalogue"""
+        clusters = SeasonalClusters(n_clusters=2, refit_ratio=0.5)
+        fingerprints = {p: series_fingerprint(d) for p, d in catalogue.items()}
+        clusters.update(catalogue, fingerprints)
+        weekday_cluster = clusters.assignments['WD0']
+
+        # WE1 change de forme: ses ventes passent en semaine
+        catalogue['WE1'] = make_shaped_series(120, level=6, weekend=False, seed=99)
+        fingerprints['WE1'] = series_fingerprint(catalogue['WE1'])
+        monkeypatch.setattr(SeasonalClusters, '_fit', lambda self: pytest.fail("regroupement complet"))
+        affected = clusters.update(catalogue, fingerprints)
+
+        assert clusters.assignments['WE1'] == weekday_cluster
+        assert affected == {weekday_cluster, clusters.assignments['WE0']}
+
+    def test_one_fit_per_cluster_scaled_by_level(self, cluster_engine, catalogue, monkeypatch):
+        """Les membres d'un cluster partagent un entraînement et sont mis à leur niveau"""
+        fits = []
+        original_fit = fit_prophet
+
+        def counting_fit(*args, **kwargs):
+            fits.append(args[0])
+            return original_fit(*args, **kwargs)
+
+        monkeypatch.setattr('app.forecasting.fit_prophet', counting_fit)
+        cluster_engine.update_clusters(make_sales_data(catalogue))
+
+        _, small = cluster_engine.generate_forecast('WE0', catalogue['WE0'], 14)
+        points, large = cluster_engine.generate_forecast('WE3', catalogue['WE3'], 14)
+
+        assert len(fits) == 1
+        assert small['cluster']['cluster_id'] == large['cluster']['cluster_id']
+        assert large['cluster']['assignment'] == 'member'
+        assert large['routing']['model_family'] == 'cluster'
+        ratio = catalogue['WE3']['y'].mean() / catalogue['WE0']['y'].mean()
+        small_p50 = cluster_engine._get_cluster_prediction(
+            'WE0', catalogue['WE0'], series_fingerprint(catalogue['WE0'])
+        )['p50'][:14]
+        assert np.mean([p.p50 for p in points]) == pytest.approx(ratio * small_p50.mean(), rel=0.01)
+
+    def test_assignment_cached_per_data_version(self, cluster_engine, catalogue, monkeypatch):
+        """Un autre moteur relit l'affectation de la même version des données depuis le cache"""
+        sales_data = make_sales_data(catalogue)
+        version = cluster_engine.update_clusters(sales_data)
+
+        monkeypatch.setattr(SeasonalClusters, 'update', lambda *args: pytest.fail("regroupement recalculé"))
+        other = ForecastEngine()
+
+        assert other.update_clusters(sales_data) == version
+        assert other.clusters.assignments == cluster_engine.clusters.assignments
@@ -0,0 +1,112 @@
+"""
+Tests pour le réentraînement en tâche de fond après upload
+"""
+
+import time
+from threading import Event
+
+import pytest
+
+import app.jobs as jobs
+import app.scheduler as scheduler
+from app.config import settings
+from app.data_manager import DataManager
+from app.jobs import RetrainJobManager
+from tests.test_data_manager import make_sales, upload
+
+
+def wait_for(job, statuses=('completed', 'cancelled', 'failed'), timeout: float = 30.0):
+    """Attend la fin d'un job"""
+    deadline = time.monotonic() + timeout
+    while job.status not in statuses and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def manager():
+    retrain_jobs = RetrainJobManager()
+    yield retrain_jobs
+    retrain_jobs.shutdown()
+
+
+@pytest.fixture
+def recorded_batches(monkeypatch):
+    """Remplace le précalcul par un enregistrement des lots traités"""
+    batches = []
+
+    def fake_precompute(product_ids):
+        batches.append(list(product_ids))
+        return {'computed': list(product_ids), 'failed': []}
+
+    monkeypatch.setattr(jobs, 'precompute_forecasts', fake_precompute)
+    return batches
+
+
+class TestRetrainJobs:
+    """Tests de la file des jobs de réentraînement"""
+
+    def test_most_requested_products_first(self, manager, recorded_batches, monkeypatch):
+        """Les produits sont traités par lots, du plus au moins demandé"""
+        monkeypatch.setattr(settings, 'retrain_batch_size', 2)
+        for product_id, requests in (('P003', 3), ('P002', 1)):
+            for _ in range(requests):
+                manager.record_request(product_id)
+
+        job = wait_for(manager.submit(['P001', 'P002', 'P003', 'P004']))
+
+        assert job.status == 'completed'
+        assert recorded_batches == [['P003', 'P002'], ['P001', 'P004']]
+        state = job.to_dict()
+        assert state['products_ready'] == 4
+        assert state['progress'] == 1.0
+
+    def test_newer_upload_supersedes_running_job(self, manager, monkeypatch):
+        """Le job en cours s'arrête au lot suivant; le nouveau reprend ses produits restants"""
+        monkeypatch.setattr(settings, 'retrain_batch_size', 1)
+        started, release = Event(), Event()
+        batches = []
+
+        def blocking_precompute(product_ids):
+            batches.append(list(product_ids))
+            started.set()
+            release.wait(10)
+            return {'computed': list(product_ids), 'failed': []}
+
+        monkeypatch.setattr(jobs, 'precompute_forecasts', blocking_precompute)
+
+        first = manager.submit(['P001', 'P002', 'P003'])
+        assert started.wait(10)
+        second = manager.submit(['P004', 'P002'])
+        release.set()
+
+        wait_for(first)
+        wait_for(second)
+        assert first.status == 'cancelled'
+        assert first.superseded_by == second.job_id
+        assert first.ready == {'P001'}
+        assert second.status == 'completed'
+        assert second.product_ids == ['P004', 'P002', 'P003']  # P001 était déjà en cours
+        assert batches == [['P001'], ['P004'], ['P002'], ['P003']]
+
+    def test_job_stores_forecasts_of_changed_products(self, manager, engine, tmp_path, monkeypatch):
+        """Après le job, les prévisions des produits modifiés sont servies sans recalcul"""
+        monkeypatch.setattr(settings, 'data_dir', str(tmp_path / 'data'))
+        monkeypatch.setattr(settings, 'forecast_model', 'ets')
+        data_manager = DataManager()
+        upload(data_manager, make_sales(products=('P001', 'P002'), days=60), tmp_path)
+        for module in (jobs, scheduler):
+            monkeypatch.setattr(module, 'data_manager', data_manager)
+            monkeypatch.setattr(module, 'forecast_engine', engine)
+
+        job = wait_for(manager.submit(data_manager.changed_products))
+
+        assert job.status == 'completed'
+        assert job.ready == {'P001', 'P002'}
+
+        def no_refit(*args, **kwargs):
+            raise AssertionError("prévision attendue depuis le magasin")
+
+        monkeypatch.setattr(engine.vectorized_forecasters['ets'], 'forecast_batch', no_refit)
+        frame, _ = engine.generate_forecast_frame('P001', data_manager.prepare_forecast_data('P001'), 7)
+        assert len(frame) == 7
@@ -0,0 +1,168 @@
+"""
+Tests pour le cache LRU des modèles
+"""
+
+import pytest
+
+import app.cache as cache_module
+import app.forecasting as forecasting
+from app.cache import CacheBackend, DictCache
+from app.model_cache import ModelLRUCache, estimate_model_bytes
+from app.monitoring import MODEL_CACHE_SIZE
+from tests.test_forecaster import make_series
+
+
+def make_cache(max_models: int = 3, max_bytes: int = 1000, spilled=None) -> ModelLRUCache:
+    """Cache dont la taille d'un 'modèle' est sa propre valeur"""
+    on_evict = (lambda product_id, model: spilled.append(product_id)) if spilled is not None else None
+    return ModelLRUCache(max_models, max_bytes, on_evict=on_evict, sizer=lambda model: model)
+
+
+class TestModelLRUCache:
+    """Tests des limites et de l'éviction"""
+
+    def test_evicts_least_recently_used(self):
+        """Au-delà du nombre maximal, le modèle le moins récemment utilisé est évincé"""
+        spilled = []
+        models = make_cache(max_models=2, spilled=spilled)
+        models['A'] = 10
+        models['B'] = 10
+        models['A']  # A devient le plus récent
+        models['C'] = 10
+
+        assert list(models) == ['A', 'C']
+        assert spilled == ['B']
+        assert models.evictions == 1
+
+    def test_get_is_atomic_lookup(self):
+        """get() marque le modèle comme récent et renvoie None une fois évincé, sans KeyError"""
+        models = make_cache(max_models=2)
+        models['A'] = 10
+        models['B'] = 10
+
+        assert models.get('A') == 10  # A devient le plus récent
+        models['C'] = 10
+
+        assert models.get('B') is None
+        assert models.get('B', 0) == 0
+        assert list(models) == ['A', 'C']
+
+    def test_byte_limit(self):
+        """La somme des tailles reste sous max_bytes"""
+        models = make_cache(max_models=10, max_bytes=100)
+        for product_id in 'ABCD':
+            models[product_id] = 40
+
+        assert len(models) == 2
+        assert models.resident_bytes == 80
+
+    def test_oversized_model_kept(self):
+        """Un modèle plus gros que la limite reste disponible"""
+        models = make_cache(max_bytes=100)
+        models['A'] = 500
+
+        assert 'A' in models
+        assert models.resident_bytes == 500
+
+    def test_replace_and_delete_update_bytes(self):
+        """Remplacer ou retirer un modèle met à jour les octets résidents"""
+        models = make_cache()
+        models['A'] = 30
+        models['A'] = 50
+        models['B'] = 20
+        models.pop('A')
+
+        assert models.resident_bytes == 20
+
+    def test_gauge_reports_state(self):
+        """La jauge MODEL_CACHE_SIZE expose modèles, octets et évictions"""
+        models = make_cache(max_models=1)
+        models['A'] = 10
+        models['B'] = 20
+
+        assert MODEL_CACHE_SIZE.labels(measure="models")._value.get() == 1
+        assert MODEL_CACHE_SIZE.labels(measure="bytes")._value.get() == 20
+        assert MODEL_CACHE_SIZE.labels(measure="evictions")._value.get() == 1
+
+
+class TestEngineModelCache:
+    """Tests de l'intégration du cache LRU dans le moteur de prévision"""
+
+    def test_evicted_model_reloaded_from_disk(self, engine, monkeypatch):
+        """Un modèle évincé est rechargé depuis models_dir sans réentraînement"""
+        engine.trained_models.max_models = 1
+        first, second = make_series(seed=1), make_series(seed=2)
+        engine._get_or_train_model('P001', first)
+        engine._get_or_train_model('P002', second)
+        assert 'P001' not in engine.trained_models
+
+        monkeypatch.setattr(engine, '_train_new_model', lambda *args: pytest.fail("réentraînement"))
+        engine._get_or_train_model('P001', first)
+
+        assert 'P001' in engine.trained_models
+
+    def test_shared_model_registered_with_metadata(self, engine, monkeypatch):
+        """Un modèle lu dans le cache partagé (Redis) garde ses métriques et ses priors"""
+        class SharedCache(CacheBackend):
+            def __init__(self):
+                self.entries = {}
+
+            def get(self, key):
+                return self.entries.get(key)
+
+            def set(self, key, value, ttl=None):
+                self.entries[key] = value
+
+            def delete(self, key):
+                self.entries.pop(key, None)
+
+            def clear(self):
+                self.entries.clear()
+
+        monkeypatch.setattr(forecasting, 'cache', SharedCache())
+        data = make_series()
+        engine._get_or_train_model('P001', data)
+
+        other = type(engine)()
+        monkeypatch.setattr(other, '_load_saved_model', lambda *args: pytest.fail("lecture disque"))
+        fingerprint = engine._model_info['P001']['fingerprint']
+
+        assert other._get_cached_model('P001', fingerprint) is not None
+        assert other._model_info['P001']['quality_metrics'] == engine._model_info['P001']['quality_metrics']
+        assert other._model_info['P001']['prophet_params'] == engine._model_info['P001']['prophet_params']
+
+    def test_estimate_model_bytes(self, engine):
+        """L'estimation grandit avec l'historique d'entraînement"""
+        short = engine._get_or_train_model('SHORT', make_series(days=30))
+        long = engine._get_or_train_model('LONG', make_series(days=400))
+
+        assert estimate_model_bytes(long) > estimate_model_bytes(short) > 0
+
+
+class TestDictCache:
+    """Tests du cache en mémoire (sans Redis)"""
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Une entrée n'est plus servie après son TTL; sans TTL elle reste"""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+        memory = DictCache()
+        memory.set('forecast:A', 'a', ttl=60)
+        memory.set('forever', 'b')
+
+        now[0] += 61
+
+        assert memory.get('forecast:A') is None
+        assert memory.get('forever') == 'b'
+
+    def test_entry_count_is_bounded(self):
+        """Au-delà de max_entries, les entrées les moins récemment lues sont évincées"""
+        memory = DictCache(max_entries=2)
+        memory.set('A', 1)
+        memory.set('B', 2)
+        memory.get('A')
+        memory.set('C', 3)
+
+        assert memory.get('B') is None
+        assert memory.get('A') == 1
+        assert memory.get('C') == 3
@@ -0,0 +1,32 @@
+"""
+Tests pour la liste des produits (GET /products)
+"""
+
+from app.config import settings
+from tests.test_data_manager import make_sales, upload
+from tests.test_upload import HEADERS, client, manager  # noqa: F401 (fixture)
+
+
+class TestProductsEndpoint:
+    """Tests de la pagination sur demande"""
+
+    def test_without_limit_returns_all_products(self, manager, tmp_path):
+        """Sans limit, tous les produits (clients historiques, dashboard)"""
+        products = tuple(f"P{i:03d}" for i in range(12))
+        upload(manager, make_sales(products=products), tmp_path)
+
+        data = client.get("/products", headers=HEADERS).json()
+
+        assert data['total'] == len(data['products']) == 12
+        assert data['limit'] is None
+
+    def test_limit_pages_and_is_capped(self, manager, tmp_path, monkeypatch):
+        """Avec limit, une page plafonnée à products_max_page_size"""
+        monkeypatch.setattr(settings, 'products_max_page_size', 5)
+        upload(manager, make_sales(products=tuple(f"P{i:03d}" for i in range(12))), tmp_path)
+
+        data = client.get("/products?offset=10&limit=50", headers=HEADERS).json()
+
+        assert data['total'] == 12
+        assert data['limit'] == 5
+        assert [product['product_id'] for product in data['products']] == ['P010', 'P011']
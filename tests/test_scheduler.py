@@ -0,0 +1,101 @@
+"""
+Tests pour le précalcul des prévisions en tâche de fond
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import app.scheduler as scheduler
+from app.config import settings
+from app.data_manager import DataManager
+from app.executors import shutdown_executors
+from app.scheduler import ForecastScheduler, next_daily_run
+from tests.test_data_manager import make_sales, upload
+
+
+@pytest.fixture
+def catalogue(engine, tmp_path, monkeypatch):
+    """Catalogue chargé dans un gestionnaire isolé, prévu par lissage exponentiel"""
+    monkeypatch.setattr(settings, 'data_dir', str(tmp_path / 'data'))
+    monkeypatch.setattr(settings, 'forecast_model', 'ets')
+    monkeypatch.setattr(settings, 'precompute_batch_size', 2)
+    manager = DataManager()
+    upload(manager, make_sales(products=('P001', 'P002', 'P003'), days=60), tmp_path)
+    monkeypatch.setattr(scheduler, 'data_manager', manager)
+    monkeypatch.setattr(scheduler, 'forecast_engine', engine)
+    yield manager
+    shutdown_executors()
+
+
+class TestSchedule:
+    """Tests de la planification quotidienne"""
+
+    def test_next_daily_run(self):
+        """L'heure du jour si elle n'est pas passée, sinon celle du lendemain"""
+        now = datetime(2024, 3, 10, 1, 30)
+
+        assert next_daily_run('02:00', now) == datetime(2024, 3, 10, 2, 0)
+        assert next_daily_run('01:00', now) == datetime(2024, 3, 11, 1, 0)
+
+
+class TestPrecompute:
+    """Tests du précalcul vers le magasin de prévisions"""
+
+    def test_run_stores_forecasts_read_by_requests(self, catalogue, engine, monkeypatch):
+        """Après une exécution, les prévisions sont servies sans recalcul"""
+        run = asyncio.run(ForecastScheduler().run_once('manual'))
+
+        assert run['products'] == run['computed'] == 3
+        assert run['failed'] == 0
+        assert run['products_per_second'] > 0
+
+        def no_refit(*args, **kwargs):
+            raise AssertionError("prévision attendue depuis le magasin")
+
+        monkeypatch.setattr(engine.vectorized_forecasters['ets'], 'forecast_batch', no_refit)
+        frame, _ = engine.generate_forecast_frame('P002', catalogue.prepare_forecast_data('P002'), 14)
+        assert len(frame) == 14
+
+    def test_unexpected_error_fails_only_its_product(self, catalogue, engine, monkeypatch):
+        """Une erreur inattendue sur un produit n'interrompt pas le lot"""
+        original = engine.generate_forecast_frame
+
+        def flaky_forecast(product_id, *args, **kwargs):
+            if product_id == 'P002':
+                raise RuntimeError("modèle corrompu")
+            return original(product_id, *args, **kwargs)
+
+        monkeypatch.setattr(engine, 'generate_forecast_frame', flaky_forecast)
+        result = scheduler.precompute_forecasts(['P001', 'P002', 'P003'])
+
+        assert result == {'computed': ['P001', 'P003'], 'failed': ['P002']}
+
+    def test_upload_trigger_runs_in_background(self, catalogue, monkeypatch):
+        """Un déclenchement réveille la boucle; l'état de la dernière exécution est exposé"""
+        monkeypatch.setattr(settings, 'precompute_enabled', True)
+        monkeypatch.setattr(settings, 'precompute_daily_at', '03:00')
+        forecast_scheduler = ForecastScheduler()
+
+        async def scenario():
+            forecast_scheduler.start()  # Données chargées: premier calcul au démarrage
+            for _ in range(200):
+                if forecast_scheduler.runs_total >= 1 and not forecast_scheduler.running:
+                    break
+                await asyncio.sleep(0.05)
+            forecast_scheduler.trigger('upload')
+            for _ in range(200):
+                if forecast_scheduler.runs_total >= 2:
+                    break
+                await asyncio.sleep(0.05)
+            status = forecast_scheduler.status()
+            await forecast_scheduler.stop()
+            return status
+
+        status = asyncio.run(scenario())
+
+        assert status['runs_total'] == 2
+        assert [run['reason'] for run in status['history']] == ['startup', 'upload']
+        assert status['last_run']['computed'] == 3
+        assert status['next_run_at'].endswith('03:00:00')
@@ -0,0 +1,129 @@
+"""
+Tests pour le tournoi de modèles par produit (politique 'auto')
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.tournament as tournament
+from app.cache import cache
+from app.config import settings
+from app.forecasting import SeasonalNaiveForecaster
+from app.tournament import run_tournament, select_winner
+from tests.test_forecaster import make_intermittent_series, make_series
+
+
+@pytest.fixture
+def sequential(monkeypatch):
+    monkeypatch.setattr(settings, 'training_workers', 1)
+    monkeypatch.setattr(settings, 'tournament_holdout_days', 14)
+
+
+def make_weekly_series(days: int = 120) -> pd.DataFrame:
+    """Série au motif hebdomadaire exact: la référence naïve est parfaite"""
+    ds = pd.date_range('2024-01-01', periods=days, freq='D')
+    return pd.DataFrame({'ds': ds, 'y': np.where(ds.dayofweek >= 5, 30.0, 10.0)})
+
+
+class TestSeasonalNaive:
+    """Tests du naïf saisonnier vectorisé"""
+
+    def test_repeats_last_season_with_widening_interval(self):
+        """La prévision reprend la dernière semaine; l'intervalle s'élargit chaque semaine"""
+        series = {'P001': make_series(days=90, seed=1)}
+
+        prediction = SeasonalNaiveForecaster().forecast_batch(series, 14)['P001']
+
+        last_week = series['P001']['y'].values[-7:]
+        assert np.allclose(prediction['p50'][:7], last_week)
+        assert np.allclose(prediction['p50'][7:], last_week)
+        spread = prediction['p90'] - prediction['p50']
+        assert spread[7] > spread[0]
+        assert pd.Timestamp(prediction['ds'][0]) == series['P001']['ds'].max() + pd.Timedelta(days=1)
+
+
+class TestSelectWinner:
+    """Tests du choix du vainqueur"""
+
+    def test_cheapest_within_tolerance_wins(self):
+        """Un candidat plus cher ne gagne que s'il bat les moins chers de plus de la tolérance"""
+        scores = {'naive': 10.3, 'ets': 10.1, 'prophet': 10.0}
+
+        assert select_winner(scores, tolerance=0.05) == 'naive'
+        assert select_winner(scores, tolerance=0.02) == 'ets'
+        assert select_winner(scores, tolerance=0.0) == 'prophet'
+
+
+class TestTournament:
+    """Tests du tournoi et de la politique 'auto' du moteur"""
+
+    def test_prophet_skipped_for_intermittent_demand(self, sequential):
+        """Prophet n'est pas évalué pour la demande intermittente"""
+        series = {'SMOOTH': make_series(days=120, seed=1), 'SPARSE': make_intermittent_series(days=120)}
+
+        results = run_tournament(series)
+
+        assert 'prophet' in results['SMOOTH']['scores']
+        assert set(results['SPARSE']['scores']) == {'naive', 'ets', 'intermittent'}
+        for result in results.values():
+            assert result['winner'] in result['scores']
+
+    def test_auto_policy_routes_to_cached_winner(self, engine, sequential, monkeypatch):
+        """Le vainqueur sert la prévision, sans modèle Prophet, et est réutilisé par version des données"""
+        monkeypatch.setattr(settings, 'forecast_model', 'auto')
+        calls = []
+        original = tournament.run_tournament
+
+        def counting_tournament(series, *args, **kwargs):
+            calls.append(set(series))
+            return original(series, *args, **kwargs)
+
+        monkeypatch.setattr(tournament, 'run_tournament', counting_tournament)
+        data = make_weekly_series()
+
+        frame, metadata = engine.generate_forecast_frame('P001', data, 14)
+        engine.generate_forecast_frame('P001', data, 14)
+
+        assert metadata['routing']['reason'] == 'tournament'
+        assert metadata['routing']['model_family'] == 'naive'
+        assert metadata['routing']['tournament']['scores']['naive'] == 0
+        assert np.allclose(frame['p50'].values[:7], data['y'].values[-7:])
+        assert not (engine.models_dir / 'P001_model.json').exists()
+        assert calls == [{'P001'}]
+
+        # Nouvelles données: nouveau tournoi
+        engine.generate_forecast_frame('P001', make_weekly_series(days=127), 14)
+        assert len(calls) == 2
+
+    def test_winner_cached_with_tournament_ttl(self, engine, sequential, monkeypatch):
+        """Le vainqueur n'expire pas avec le cache court: il est versionné par les données"""
+        ttls = {}
+        original = cache.set
+
+        def recording_set(key, value, ttl=None):
+            ttls[key.split(':')[0]] = ttl
+            return original(key, value, ttl=ttl)
+
+        monkeypatch.setattr(cache, 'set', recording_set)
+        engine.select_models({'P001': make_weekly_series()})
+
+        assert ttls['tournament'] == settings.tournament_cache_ttl_seconds
+        assert settings.tournament_cache_ttl_seconds > settings.cache_ttl_seconds
+
+    def test_prepare_batch_runs_one_tournament(self, engine, sequential, monkeypatch):
+        """Un lot de produits en politique 'auto' ne passe qu'un seul tournoi"""
+        monkeypatch.setattr(settings, 'forecast_model', 'auto')
+        calls = []
+        original = tournament.run_tournament
+        monkeypatch.setattr(
+            tournament, 'run_tournament',
+            lambda series, *args, **kwargs: calls.append(set(series)) or original(series, *args, **kwargs)
+        )
+        series = {f"P{i:03d}": make_weekly_series() for i in range(3)}
+
+        engine.prepare_batch(series)
+        for product_id, data in series.items():
+            engine.generate_forecast_frame(product_id, data, 7)
+
+        assert calls == [set(series)]
@@ -0,0 +1,112 @@
+"""
+Tests pour la recherche des priors Prophet
+"""
+
+import pytest
+
+import app.tuning as tuning
+from app.config import settings
+from app.tuning import search_space, tune_products
+from tests.test_forecaster import make_series
+
+
+@pytest.fixture
+def sequential(monkeypatch):
+    """Évaluations exécutées localement, sur des folds courts"""
+    monkeypatch.setattr(settings, 'training_workers', 1)
+    monkeypatch.setattr(settings, 'tuning_folds', 3)
+    monkeypatch.setattr(settings, 'tuning_horizon_days', 7)
+
+
+@pytest.fixture
+def small_grid(monkeypatch):
+    """Grille réduite (défaut compris) pour les tests qui entraînent Prophet"""
+    monkeypatch.setattr(tuning, 'CHANGEPOINT_PRIOR_SCALES', (0.001, 0.05))
+    monkeypatch.setattr(tuning, 'SEASONALITY_PRIOR_SCALES', (10.0,))
+    monkeypatch.setattr(tuning, 'SEASONALITY_MODES', ('multiplicative',))
+
+
+class TestTuneProducts:
+    """Tests de la recherche par produit"""
+
+    def test_losing_configurations_pruned_after_first_fold(self, engine, sequential, monkeypatch):
+        """Seules les configurations proches de la meilleure passent aux folds suivants"""
+        evaluations = []
+
+        def fake_score(product_id, config_index, train, actual, params):
+            evaluations.append(config_index)
+            return product_id, config_index, 1.0 + config_index
+
+        monkeypatch.setattr(tuning, '_score_config', fake_score)
+        monkeypatch.setattr(settings, 'tuning_prune_ratio', 1.2)
+
+        result = tune_products({'P001': make_series(days=90)}, engine=engine)['P001']
+
+        n_configs = len(search_space())
+        assert result['status'] == 'tuned'
+        assert result['params'] == search_space()[0]
+        assert result['pruned'] == n_configs - 1
+        assert result['evaluations'] == len(evaluations) == n_configs + 2
+        assert len(evaluations) < n_configs * settings.tuning_folds
+
+    def test_at_most_best_half_kept_per_fold(self, engine, sequential, monkeypatch):
+        """Des configurations ex aequo sont quand même divisées par deux à chaque fold"""
+        monkeypatch.setattr(tuning, '_score_config', lambda p, i, *args: (p, i, 1.0))
+
+        result = tune_products({'P001': make_series(days=90)}, engine=engine)['P001']
+
+        assert result['evaluations'] == 24 + 12 + 6
+        assert result['pruned'] == 24 - 3
+
+    def test_winner_persisted_and_used_for_training(self, engine, sequential, small_grid):
+        """La configuration gagnante est sauvegardée et utilisée par _prophet_params"""
+        result = tune_products({'P001': make_series(days=90)}, engine=engine)['P001']
+
+        assert result['status'] == 'tuned'
+        assert (engine.models_dir / 'P001_tuning.json').exists()
+        assert result['default_mae'] is not None
+        params = engine._prophet_params('P001')
+        for key, value in result['params'].items():
+            assert params[key] == value
+
+        # Un nouveau moteur relit la configuration sur disque
+        reloaded = type(engine)()
+        assert reloaded.tuned_config('P001')['params'] == result['params']
+
+    def test_saved_configuration_reused(self, engine, sequential, monkeypatch):
+        """Un produit déjà ajusté n'est recherché à nouveau qu'avec force"""
+        engine.save_tuned_config('P001', {'params': {'changepoint_prior_scale': 0.01}, 'mae': 1.0})
+
+        def fail_score(*args):
+            raise AssertionError("aucune évaluation attendue")
+
+        monkeypatch.setattr(tuning, '_score_config', fail_score)
+        result = tune_products({'P001': make_series(days=90)}, engine=engine)['P001']
+
+        assert result['status'] == 'reused'
+        assert result['params'] == {'changepoint_prior_scale': 0.01}
+
+    def test_tuning_invalidates_trained_model(self, engine, sequential):
+        """Un modèle entraîné avec d'autres priors est réentraîné, même depuis le disque"""
+        data = make_series(days=90)
+        engine._get_or_train_model('P001', data)
+        engine.save_tuned_config('P001', {'params': {'changepoint_prior_scale': 0.001}, 'mae': 1.0})
+
+        assert 'P001' not in engine.trained_models
+        model = engine._get_or_train_model('P001', data)
+        assert model.changepoint_prior_scale == 0.001
+        assert engine._read_model_meta('P001')['prophet_params']['changepoint_prior_scale'] == 0.001
+
+    def test_tuning_seen_by_other_engine_sharing_models_dir(self, engine, sequential):
+        """Un autre worker voit les priors ajustés et réutilise le modèle au lieu de le réentraîner"""
+        data = make_series(days=90)
+        other = type(engine)()
+        assert other.tuned_config('P001') is None  # Absence lue avant le /tune
+
+        engine.save_tuned_config('P001', {'params': {'changepoint_prior_scale': 0.001}, 'mae': 1.0})
+        engine._get_or_train_model('P001', data)
+
+        assert other._prophet_params('P001')['changepoint_prior_scale'] == 0.001
+        loaded = other._load_saved_model('P001', engine._model_info['P001']['fingerprint'])
+        assert loaded is not None
+        assert loaded[0].changepoint_prior_scale == 0.001
@@ -0,0 +1,90 @@
+"""
+Tests pour l'upload des fichiers de ventes (copie par blocs, compression, taille maximale)
+"""
+
+import gzip
+import io
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.config import settings
+from app.data_manager import DataManager
+from tests.test_data_manager import make_sales
+
+client = TestClient(main.app)
+HEADERS = {"Authorization": f"Bearer {settings.api_token}"}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Gestionnaire de données isolé, sans job de réentraînement"""
+    monkeypatch.setattr(settings, 'data_dir', str(tmp_path / 'data'))
+    monkeypatch.setattr(settings, 'retrain_on_upload', False)
+    monkeypatch.setattr(settings, 'upload_chunk_bytes', 256)
+    manager = DataManager()
+    monkeypatch.setattr(main, 'data_manager', manager)
+    return manager
+
+
+def csv_bytes() -> bytes:
+    return make_sales(days=20).to_csv(index=False).encode()
+
+
+def post(filename: str, content: bytes):
+    return client.post("/upload_sales", files={"file": (filename, content)}, headers=HEADERS)
+
+
+class TestUpload:
+    """Tests de l'endpoint /upload_sales"""
+
+    @pytest.mark.parametrize("filename", ["sales.csv", "sales.csv.gz", "sales.zip", "sales.xlsx"])
+    def test_formats_are_parsed(self, manager, filename):
+        """CSV brut, gzip, zip et XLSX donnent les mêmes ventes"""
+        if filename.endswith('.gz'):
+            content = gzip.compress(csv_bytes())
+        elif filename.endswith('.zip'):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('export.csv', csv_bytes())
+            content = buffer.getvalue()
+        elif filename.endswith('.xlsx'):
+            buffer = io.BytesIO()
+            make_sales(days=20).to_excel(buffer, index=False)
+            content = buffer.getvalue()
+        else:
+            content = csv_bytes()
+
+        response = post(filename, content)
+
+        assert response.status_code == 200, response.text
+        assert response.json()['total_records'] == 40
+        assert manager.prepare_forecast_data('P002')['y'].iloc[0] == 2
+
+    def test_oversized_upload_is_rejected(self, manager, monkeypatch):
+        """Au-delà de la taille maximale: 413, aucune donnée chargée"""
+        monkeypatch.setattr(settings, 'upload_max_bytes', 500)
+
+        response = post("sales.csv", csv_bytes())
+
+        assert response.status_code == 413
+        assert not manager.has_data()
+
+    def test_oversized_stream_stops_copy(self, monkeypatch, tmp_path):
+        """Sans taille annoncée, la copie s'arrête au dépassement et le fichier temporaire est supprimé"""
+        monkeypatch.setattr(settings, 'upload_max_bytes', 500)
+        monkeypatch.setattr(settings, 'upload_chunk_bytes', 256)
+        monkeypatch.setattr(main.tempfile, 'tempdir', str(tmp_path))
+
+        with pytest.raises(main.HTTPException) as error:
+            main._spool_upload(io.BytesIO(csv_bytes()), '.csv')
+
+        assert error.value.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unsupported_format(self, manager):
+        response = post("sales.json", b"{}")
+
+        assert response.status_code == 400